@@ -0,0 +1,96 @@
+"""
+Benchmark ancestry queries (`--with-ancestors`/`--with-descendants`) on a synthetic
+dependency graph, comparing the original depth-first walk of the Nodes against the
+bitset closures of the `CompactGraph`::
+
+    poetry run python benchmarks/bench_ancestry.py --packages 10000
+"""
+import argparse
+import random
+import timeit
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+from mazel.graph import Node, PackageGraph
+
+
+class StubPackage(object):
+    def __init__(self, label_path: str):
+        self.label_path = label_path
+        self.dependencies: List["StubPackage"] = []
+
+    def depends_on(self) -> List["StubPackage"]:
+        return self.dependencies
+
+
+def make_graph(packages: int, fanout: int) -> PackageGraph:
+    random.seed(0)
+    stubs = [StubPackage(f"//group_{i // 25}/package_{i}") for i in range(packages)]
+    for i, stub in enumerate(stubs[1:], start=1):
+        start = max(i - 50, 0)
+        stub.dependencies = random.sample(stubs[start:i], min(i, fanout))
+    return PackageGraph.from_packages(stubs)  # type: ignore[arg-type]
+
+
+def walk_ancestry(initial: List[Any], graph: PackageGraph) -> List[Any]:
+    """The original `expand_ancestry`, with_ancestors and with_descendants"""
+    packages: Dict[Any, None] = {}
+    wanted = set(initial)
+    stack: List[Tuple[Node, bool]] = [
+        (node, False) for node in reversed(graph.nodes()) if node.package in wanted
+    ]
+    while stack:
+        node, walking_ancestors = stack.pop()
+        if node.package in packages:
+            continue
+        packages[node.package] = None
+        following: List[Tuple[Node, bool]] = [(parent, True) for parent in node.parents]
+        if not walking_ancestors:
+            following.extend((child, False) for child in node.children)
+        stack.extend(reversed(following))
+    return list(packages)
+
+
+def bitset_ancestry(initial: List[Any], graph: PackageGraph) -> List[Any]:
+    compact = graph.compact()
+    bits = compact.with_descendants(compact.bits(initial))
+    return compact.packages_of(compact.with_ancestors(bits))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=10000)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    graph = make_graph(args.packages, args.fanout)
+    print(f"{args.packages} packages, {args.fanout} dependencies each")
+
+    def build() -> None:
+        compact = graph.compact()
+        compact.with_ancestors(0)
+        compact.with_descendants(0)
+        graph._forget_compact()
+
+    best = min(timeit.repeat(build, number=1, repeat=args.repeat))
+    print(f"{'closures':>24}: {best * 1000:10.2f} ms (once per graph)")
+    build()
+    graph.compact().with_ancestors(0)
+    graph.compact().with_descendants(0)
+
+    nodes = graph.nodes()
+    cases = [
+        ("leaf", [nodes[-1].package]),
+        ("middle", [nodes[len(nodes) // 2].package]),
+    ]
+    for case, initial in cases:
+        for name, fn in [("walk", walk_ancestry), ("bitset", bitset_ancestry)]:
+            best = min(
+                timeit.repeat(partial(fn, initial, graph), number=1, repeat=args.repeat)
+            )
+            print(f"{name + ' (' + case + ')':>24}: {best * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
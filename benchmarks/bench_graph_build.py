@@ -0,0 +1,105 @@
+"""
+Benchmark building the dependency graph of a synthetic workspace of Python packages,
+on a cold DependencyCache (serially, and across worker processes) and a warm one,
+then re-reads every Package's metadata::
+
+    poetry run python benchmarks/bench_graph_build.py --packages 2000 --workers 4
+"""
+import argparse
+import os
+import resource
+import shutil
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from mazel import workspace as workspace_module
+from mazel.cache import CACHE_DIR
+from mazel.workspace import Workspace
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+name = "package-{i}"
+version = "0.1.0"
+
+[tool.poetry.dependencies]
+python = "^3.10"
+click = "^8.1.3"
+{deps}
+
+[tool.poetry.dev-dependencies]
+pytest = "^7.2.0"
+"""
+
+
+def make_workspace(root: Path, packages: int) -> None:
+    root.joinpath("WORKSPACE.toml").touch()
+    for i in range(packages):
+        package = root.joinpath(f"group_{i // 25}", f"package_{i}")
+        package.mkdir(parents=True)
+        package.joinpath("BUILD.toml").write_text('[package]\nruntimes = ["python"]\n')
+        deps = "\n".join(
+            f'package_{j} = {{ path = "../../group_{j // 25}/package_{j}" }}'
+            for j in range(max(i - 3, 0), i)
+        )
+        package.joinpath("pyproject.toml").write_text(
+            PYPROJECT_TOML.format(i=i, deps=deps)
+        )
+
+    # Backdate, like an existing checkout, so the warm cache trusts the mtimes
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (1_600_000_000, 1_600_000_000))
+
+
+def build(root: Path, workers: int, cold: bool) -> float:
+    if cold:
+        shutil.rmtree(root.joinpath(CACHE_DIR), ignore_errors=True)
+    workspace = Workspace(root)
+    packages = workspace.packages()
+
+    start = time.perf_counter()
+    workspace.extract_dependencies(packages, workers=workers)
+    workspace.graph()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        make_workspace(root, args.packages)
+
+        print(f"{args.packages} packages")
+        for name, workers, cold in [
+            ("cold, serial", 1, True),
+            (f"cold, {args.workers} workers", args.workers, True),
+            ("warm", args.workers, False),
+        ]:
+            # Always above the threshold, to show the overhead of the worker processes
+            with mock.patch.object(workspace_module, "EXTRACT_PARALLEL_THRESHOLD", 1):
+                best = min(build(root, workers, cold) for _ in range(args.repeat))
+            print(f"{name:>20}: {best * 1000:8.2f} ms")
+
+        # Once computed, a Package's metadata is kept instead of its parsed files
+        workspace = Workspace(root)
+        workspace.graph()
+        start = time.perf_counter()
+        for package in workspace.packages():
+            package.depends_on()
+            package.runtimes()
+        print(
+            f"{'metadata re-read':>20}: {(time.perf_counter() - start) * 1000:8.2f} ms"
+        )
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        print(f"{'peak RSS':>20}: {peak:8d} MiB")
+
+
+if __name__ == "__main__":
+    main()
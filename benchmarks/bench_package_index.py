@@ -0,0 +1,69 @@
+"""
+Benchmark mapping modified files to their packages (`mazel --modified-since`),
+comparing the original linear search against the path trie::
+
+    poetry run python benchmarks/bench_package_index.py --packages 5000 --files 5000
+"""
+import argparse
+import random
+import timeit
+from pathlib import Path
+from typing import List, Optional
+
+from mazel.trie import PathTrie
+
+ROOT = Path("/workspace")
+
+
+def linear_owners(packages: List[Path], dirs: List[Path]) -> List[Path]:
+    """The original `Workspace.modified_packages` loop"""
+    owners: List[Path] = []
+    for path in dirs:
+        parents = list(path.parents) + [path]
+        for package in packages:
+            if package in parents and package not in owners:
+                owners.append(package)
+    return owners
+
+
+def trie_owners(trie: PathTrie[Path], dirs: List[Path]) -> List[Path]:
+    owners = {}
+    for path in dirs:
+        owner: Optional[Path] = trie.owner(path.relative_to(ROOT).parts)
+        if owner is not None:
+            owners[owner] = None
+    return list(owners)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    packages = [
+        ROOT.joinpath(f"group_{i // 25}", f"package_{i}") for i in range(args.packages)
+    ]
+    rng = random.Random(0)
+    dirs = sorted(
+        set(
+            rng.choice(packages).joinpath("src", f"module_{rng.randrange(10)}")
+            for _ in range(args.files)
+        )
+    )
+    trie = PathTrie((package.relative_to(ROOT).parts, package) for package in packages)
+
+    assert linear_owners(packages, dirs) == trie_owners(trie, dirs), "disagree"
+
+    print(f"{len(packages)} packages, {len(dirs)} modified directories")
+    for name, fn in [
+        ("linear", lambda: linear_owners(packages, dirs)),
+        ("path trie", lambda: trie_owners(trie, dirs)),
+    ]:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:>20}: {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark ordering every package of a synthetic dependency graph (`mazel run
+--with-descendants` from the roots), comparing the original level scan over the
+remaining nodes against Kahn's algorithm (`PackageGraph.plan`)::
+
+    poetry run python benchmarks/bench_package_order.py --packages 5000
+"""
+import argparse
+import random
+import timeit
+from functools import partial
+from typing import Any, List, Set
+
+from mazel.graph import Node, PackageGraph
+
+
+class StubPackage(object):
+    def __init__(self, label_path: str):
+        self.label_path = label_path
+        self.dependencies: List["StubPackage"] = []
+
+    def depends_on(self) -> List["StubPackage"]:
+        return self.dependencies
+
+
+def make_graph(packages: int, fanout: int) -> PackageGraph:
+    random.seed(0)
+    stubs = [StubPackage(f"//group_{i // 25}/package_{i}") for i in range(packages)]
+    for i, stub in enumerate(stubs[1:], start=1):
+        start = max(i - 50, 0)
+        stub.dependencies = random.sample(stubs[start:i], min(i, fanout))
+    return PackageGraph.from_packages(stubs)  # type: ignore[arg-type]
+
+
+def level_scan_order(graph: PackageGraph) -> List[Any]:
+    """The original `consume_tree`, then sorting with `list.index`"""
+    consumed: Set[Node] = set()
+    remaining: Set[Node] = set(graph.nodes())
+    expected = []
+    while len(remaining) > 0:
+        for node in list(remaining):
+            if len(set(node.parents) - consumed) == 0:
+                consumed.add(node)
+                remaining.remove(node)
+                expected.append(node.package)
+    packages = [node.package for node in graph.nodes()]
+    return sorted(packages, key=lambda pkg: expected.index(pkg))
+
+
+def plan_order(graph: PackageGraph) -> List[Any]:
+    position = {node.package: i for i, (node, _) in enumerate(graph.plan())}
+    packages = [node.package for node in graph.nodes()]
+    return sorted(packages, key=position.__getitem__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    graph = make_graph(args.packages, args.fanout)
+    print(f"{args.packages} packages, {args.fanout} dependencies each")
+    for name, fn in [("level scan", level_scan_order), ("kahn", plan_order)]:
+        best = min(timeit.repeat(partial(fn, graph), number=1, repeat=args.repeat))
+        print(f"{name:>12}: {best * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark package discovery against the original recursive implementation.
+
+Generates a synthetic workspace in a temporary directory and times each scanner::
+
+    poetry run python benchmarks/bench_package_scan.py --packages 500 --noise 20
+"""
+import argparse
+import os
+import timeit
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+from mazel.scan import PackageScanner, scan_packages
+
+
+def recursive_scan(path: Path) -> List[Path]:
+    """The original `mazel.workspace.package_scan`, via Path.iterdir()"""
+    queued_dirs = []
+    for entry in path.iterdir():
+        if entry.is_file() and entry.name == "BUILD.toml":
+            return [entry.parent]
+        elif entry.is_dir() and not entry.name.startswith("."):
+            queued_dirs.append(entry)
+
+    results = []
+    for queued_dir in queued_dirs:
+        results.extend(recursive_scan(queued_dir))
+    return results
+
+
+def make_workspace(root: Path, packages: int, noise: int) -> None:
+    """
+    Lay out `packages` packages, grouped 25 per directory, with `noise` directories
+    that are not packages (e.g. docs/, scripts/) next to each group.
+    """
+    root.joinpath("WORKSPACE.toml").touch()
+    for i in range(packages):
+        group = root.joinpath(f"group_{i // 25}")
+        package = group.joinpath(f"package_{i}")
+        package.joinpath("src", "module").mkdir(parents=True)
+        package.joinpath("BUILD.toml").touch()
+        package.joinpath("Makefile").touch()
+
+        for j in range(noise if i % 25 == 0 else 0):
+            group.joinpath(f"noise_{j}", "a", "b").mkdir(parents=True)
+            group.joinpath(f"noise_{j}", "a", "file.txt").touch()
+
+    # Backdate, like an existing checkout, so the warm index trusts the mtimes
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (1_600_000_000, 1_600_000_000))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=500)
+    parser.add_argument("--noise", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        make_workspace(root, args.packages, args.noise)
+
+        expected = sorted(recursive_scan(root))
+        assert scan_packages(root) == expected, "scanners disagree"
+
+        cold = PackageScanner(root)
+        cold.scan()
+
+        print(f"{len(expected)} packages, {len(cold.index.dirs)} directories")
+        for name, fn in [
+            ("recursive iterdir", lambda: recursive_scan(root)),
+            ("scandir thread pool", lambda: scan_packages(root)),
+            ("warm index", lambda: PackageScanner(root, index=cold.index).scan()),
+        ]:
+            best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+            print(f"{name:>20}: {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark parsing the BUILD.toml and pyproject.toml files of a synthetic workspace,
+comparing tomlkit against the standard library's tomllib (`PathableConcept.read_toml`)::
+
+    poetry run python benchmarks/bench_toml_parse.py --packages 2000
+"""
+import argparse
+import sys
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import tomlkit
+
+BUILD_TOML = """\
+[package]
+runtimes = ["python"]
+depends_on = ["//libs/package_{dep}"]
+"""
+
+PYPROJECT_TOML = """\
+[tool.poetry]
+name = "package-{i}"
+version = "0.1.0"
+description = "Synthetic package {i}"
+authors = ["Someone <someone@example.com>"]
+
+[tool.poetry.dependencies]
+python = "^3.10"
+click = "^8.1.3"
+requests = {{ version = "^2.28", extras = ["socks"] }}
+package_{dep} = {{ path = "../package_{dep}", develop = true }}
+
+[tool.poetry.dev-dependencies]
+pytest = "^7.2.0"
+black = "^22.12.0"
+
+[build-system]
+requires = ["poetry-core>=1.0.0"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+
+def create_workspace(root: Path, packages: int) -> List[Path]:
+    files = []
+    for i in range(packages):
+        path = root.joinpath("libs", f"package_{i}")
+        path.mkdir(parents=True)
+        dep = max(i - 1, 0)
+        path.joinpath("BUILD.toml").write_text(BUILD_TOML.format(dep=dep))
+        path.joinpath("pyproject.toml").write_text(PYPROJECT_TOML.format(i=i, dep=dep))
+        files.extend([path / "BUILD.toml", path / "pyproject.toml"])
+    return files
+
+
+def parse_all(files: List[Path], parse: Callable[[str], Dict[str, Any]]) -> None:
+    for path in files:
+        parse(path.read_text())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parsers: Dict[str, Callable[[str], Dict[str, Any]]] = {"tomlkit": tomlkit.parse}
+    if sys.version_info >= (3, 11):
+        import tomllib
+
+        parsers["tomllib"] = tomllib.loads
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = create_workspace(Path(tmpdir), args.packages)
+
+        print(f"{args.packages} packages, {len(files)} files")
+        for name, parse in parsers.items():
+            fn = partial(parse_all, files, parse)
+            best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+            print(
+                f"{name:>20}: {best * 1000:8.2f} ms  "
+                f"({len(files) / best:,.0f} files/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
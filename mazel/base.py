@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import sys
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, Union
 
-import tomlkit
+if sys.version_info >= (3, 11):
+    import tomllib
+else:  # pragma: no cover
+    import tomlkit
 
 
 class PathableConcept(object):
@@ -15,11 +19,17 @@ class PathableConcept(object):
         #   rules)? Allow overriding via config?
         self.name = self.path.name
 
-    def read_toml(
-        self, toml_path: Union[str, Path]
-    ) -> tomlkit.toml_document.TOMLDocument:
-        # TODO Consider caching the result
-        return tomlkit.parse(self.read_path(toml_path))
+    def read_toml(self, toml_path: Union[str, Path]) -> Dict[str, Any]:
+        """
+        Parse the TOML file into plain dicts & lists, for reading only. Uses the
+        standard library's tomllib (Python 3.11+), which is several times faster
+        than tomlkit. tomlkit is only needed to write TOML, preserving its style.
+        """
+        text = self.read_path(toml_path)
+        if sys.version_info >= (3, 11):
+            return tomllib.loads(text)
+        else:  # pragma: no cover
+            return tomlkit.parse(text).unwrap()
 
     def read_path(self, path: Union[str, Path]) -> str:
         with open(self.path.joinpath(path)) as f:
@@ -0,0 +1,61 @@
+"""
+Persistent caches, stored as JSON under the Workspace's ``.mazel/cache/``.
+
+Caches are an optimization only: a missing, corrupt or outdated cache file is
+treated as empty, and failures to write (e.g. a read-only checkout) are ignored.
+Set ``MAZEL_CACHE=0`` to neither read nor write them.
+"""
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Optional
+
+CACHE_DIR = ".mazel/cache"
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("MAZEL_CACHE") != "0"
+
+
+def cache_path(workspace_path: Path, name: str) -> Path:
+    return workspace_path.joinpath(CACHE_DIR, f"{name}.json")
+
+
+def read_cache(path: Path, version: int) -> Optional[Dict[str, Any]]:
+    """Load the cache file, if it exists and was written with the same `version`"""
+    if not cache_enabled():
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def write_cache(path: Path, version: int, data: Dict[str, Any]) -> None:
+    """
+    Atomically replace the cache file, so that concurrent mazel invocations never
+    read a partially written file.
+    """
+    if not cache_enabled():
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+        )
+    except OSError:
+        # Caching is best effort
+        return
+
+    try:
+        with tmp:
+            json.dump(dict(data, version=version), tmp, separators=(",", ":"))
+        os.replace(tmp.name, path)
+    except OSError:
+        Path(tmp.name).unlink(missing_ok=True)
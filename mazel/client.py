@@ -0,0 +1,267 @@
+"""
+The `mazel` entry point: a thin client for the mazel server (see `mazel.server`).
+
+Deliberately only imports the standard library, so that when a server is running
+for the Workspace, an invocation costs little more than starting Python. The
+command line, working directory, environment and stdin/stdout/stderr are handed to
+the server, which runs the command with its already loaded Workspace.
+
+Without a server (or with ``MAZEL_SERVER=0``), the command runs in this process as
+usual. ``MAZEL_SERVER=1`` starts a server in the background when none is running.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+WORKSPACE_TOML = "WORKSPACE.toml"
+
+# Commands that are always run by the client itself
+LOCAL_COMMANDS = {"server", "shutdown"}
+
+# How long to wait for a newly started server to accept connections
+STARTUP_TIMEOUT = 10.0
+
+MAX_MESSAGE = 64 * 1024
+
+# The environment variables handed to the server's commands. Others (e.g. a Makefile's
+# credentials) can be added via MAZEL_SERVER_ENV, a comma separated list of names
+ENV_NAMES = {
+    "CI",
+    "COLORTERM",
+    "COLUMNS",
+    "FORCE_COLOR",
+    "HOME",
+    "LANG",
+    "LANGUAGE",
+    "LINES",
+    "LOGNAME",
+    "NO_COLOR",
+    "PATH",
+    "SHELL",
+    "TERM",
+    "TMPDIR",
+    "TZ",
+    "USER",
+    "VIRTUAL_ENV",
+}
+ENV_PREFIXES = ("CARGO_", "GIT_", "GO", "LC_", "MAZEL_", "PYTHON", "RUSTUP_", "XDG_")
+
+
+class ServerUnavailable(Exception):
+    pass
+
+
+def find_workspace(cwd: Path) -> Optional[Path]:
+    """Like `Workspace.find()`, without importing the rest of mazel"""
+    for path in [cwd, *cwd.parents]:
+        if path.joinpath(WORKSPACE_TOML).exists():
+            return path
+    return None
+
+
+def socket_path(workspace_path: Path) -> Path:
+    """
+    The server's socket for the Workspace. Kept out of the Workspace, since socket
+    paths are limited to ~100 characters. Also keyed on the Python interpreter and
+    mazel installation, so an upgrade starts a new server.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    installed = Path(__file__).parent
+    key = "\0".join(
+        [
+            str(workspace_path),
+            sys.executable,
+            str(installed),
+            str(installed.joinpath("server.py").stat().st_mtime_ns),
+        ]
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return Path(runtime_dir, f"mazel-{os.getuid()}", f"{digest}.sock")
+
+
+def is_private(path: Path) -> bool:
+    """
+    Whether the path is only accessible to us: owned by us and not a symlink, and
+    for a directory, with 0700 permissions. Otherwise another user could be
+    listening on the socket, or replace it.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if st.st_uid != os.getuid():
+        return False
+    if stat.S_ISDIR(st.st_mode):
+        return stat.S_IMODE(st.st_mode) == 0o700
+    return stat.S_ISSOCK(st.st_mode)
+
+
+def server_env(environ: Mapping[str, str]) -> Dict[str, str]:
+    """The environment variables to hand to the server, see `ENV_NAMES`"""
+    names = ENV_NAMES.union(
+        name.strip() for name in environ.get("MAZEL_SERVER_ENV", "").split(",")
+    )
+    return {
+        name: value
+        for name, value in environ.items()
+        if name in names or name.startswith(ENV_PREFIXES)
+    }
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+class MessageReader(object):
+    """Newline delimited JSON messages from a stream socket"""
+
+    def __init__(self, sock: socket.socket, buffer: bytes = b""):
+        self.sock = sock
+        self.buffer = buffer
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """The next message, or None once the connection is closed"""
+        while b"\n" not in self.buffer:
+            data = self.sock.recv(MAX_MESSAGE)
+            if not data:
+                return None
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return dict(json.loads(line))
+
+
+def connect(workspace_path: Path) -> socket.socket:
+    path = socket_path(workspace_path)
+    if not (is_private(path.parent) and is_private(path)):
+        raise ServerUnavailable()
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        raise ServerUnavailable()
+    return sock
+
+
+def start_server(workspace_path: Path) -> socket.socket:
+    """Start a server in the background, then connect to it"""
+    log_path = workspace_path.joinpath(".mazel", "server.log")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "ab") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "mazel.main", "server"],
+            cwd=workspace_path,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            # Detach, so the server outlives this process and its terminal
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            return connect(workspace_path)
+        except ServerUnavailable:
+            # Exited, e.g. without inotify support, see the log
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def run_remote(
+    sock: socket.socket,
+    argv: Sequence[str],
+    cwd: Path,
+    env: Dict[str, str],
+    fds: Sequence[int] = (0, 1, 2),
+) -> int:
+    """
+    Run the command on the server, passing our stdin/stdout/stderr. Returns the
+    exit code.
+    """
+    request = {"argv": list(argv), "cwd": str(cwd), "env": env}
+    socket.send_fds(sock, [json.dumps(request).encode() + b"\n"], list(fds))
+
+    reader = MessageReader(sock)
+    pid = None
+    while True:
+        try:
+            message = reader.read()
+        except KeyboardInterrupt:
+            # The server's process is not in our terminal's foreground process
+            # group, so pass Ctrl-C along
+            if pid is not None:
+                os.kill(pid, signal.SIGINT)
+            continue
+
+        if message is None:
+            print("mazel: lost connection to the mazel server", file=sys.stderr)
+            return 1
+        elif "pid" in message:
+            pid = message["pid"]
+        elif "exit" in message:
+            return int(message["exit"])
+
+
+def shutdown(workspace_path: Path) -> bool:
+    """Stop the Workspace's server, returning whether one was running"""
+    try:
+        sock = connect(workspace_path)
+    except ServerUnavailable:
+        return False
+    with sock:
+        send_message(sock, {"command": "shutdown"})
+        MessageReader(sock).read()
+    return True
+
+
+def server_connection(argv: List[str]) -> Optional[socket.socket]:
+    """Connect to the Workspace's server, if one should be used"""
+    mode = os.environ.get("MAZEL_SERVER")
+    workspace_path = find_workspace(Path.cwd())
+    if mode == "0" or workspace_path is None or LOCAL_COMMANDS.intersection(argv[:1]):
+        return None
+
+    try:
+        return connect(workspace_path)
+    except ServerUnavailable:
+        if mode != "1":
+            return None
+
+    try:
+        return start_server(workspace_path)
+    except ServerUnavailable:
+        print("mazel: unable to start the server", file=sys.stderr)
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+
+    sock = server_connection(argv)
+    if sock is not None:
+        with sock:
+            code = run_remote(sock, argv, Path.cwd(), server_env(os.environ))
+        sys.exit(code)
+
+    # No server, run in this process
+    from .main import cli
+
+    cli.main(args=argv, prog_name="mazel")
+
+
+if __name__ == "__main__":
+    main()
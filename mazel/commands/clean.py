@@ -15,6 +15,7 @@ def clean(
     with_ancestors: bool,
     with_descendants: bool,
     modified_since: Optional[str] = None,
+    watch: bool = False,
 ) -> None:
     label_common.LabelRunner(
         handler=label_common.MakeLabel(),
@@ -23,4 +24,5 @@ def clean(
         with_ancestors=with_ancestors,
         with_descendants=with_descendants,
         modified_since=modified_since,
+        watch=watch,
     ).run(label)
@@ -23,6 +23,7 @@ def echo(
     with_ancestors: bool,
     with_descendants: bool,
     modified_since: Optional[str] = None,
+    watch: bool = False,
 ) -> None:
     """For debugging what packages would get run by run/test, echo the package:target"""
     handler_cls = EchoHandler
@@ -34,4 +35,5 @@ def echo(
         with_ancestors=with_ancestors,
         with_descendants=with_descendants,
         modified_since=modified_since,
+        watch=watch,
     ).run(label)
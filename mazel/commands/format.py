@@ -15,6 +15,7 @@ def format(
     with_ancestors: bool,
     with_descendants: bool,
     modified_since: Optional[str] = None,
+    watch: bool = False,
 ) -> None:
     label_common.LabelRunner(
         handler=label_common.MakeLabel(),
@@ -22,4 +23,5 @@ def format(
         with_ancestors=with_ancestors,
         with_descendants=with_descendants,
         modified_since=modified_since,
+        watch=watch,
     ).run(label)
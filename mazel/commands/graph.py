@@ -0,0 +1,139 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import click
+
+from mazel.durations import read_durations
+from mazel.exceptions import MazelException
+from mazel.stats import GraphStats, HotSpot, graph_stats
+
+from .utils import current_workspace
+
+
+@click.group()
+def graph() -> None:
+    """Analyze the dependency graph"""
+
+
+@graph.command()
+@click.option(
+    "--top",
+    default=5,
+    show_default=True,
+    help="Number of packages to list with the most dependents / dependencies",
+)
+@click.option(
+    "--durations",
+    "target",
+    default=None,
+    metavar="TARGET",
+    help=(
+        "Weight the packages by the recorded durations of their TARGET (e.g. test), "
+        "to find the critical path"
+    ),
+)
+@click.option(
+    "--output", type=click.Choice(["text", "json"]), default="text", show_default=True
+)
+def stats(top: int, target: Optional[str], output: str) -> None:
+    """
+    The shape of the dependency graph: its depth, the packages per level, the
+    packages with the most dependents (fan-in) or dependencies (fan-out), and the
+    longest chain of dependencies, which serializes running the packages.
+
+    With --durations, the critical path: the chain of dependencies taking the
+    longest, using the durations recorded by the last successful run of each
+    package's target (e.g. mazel test //...).
+    """
+    workspace = current_workspace()
+    durations = None
+    if target is not None:
+        durations = read_durations(workspace.path, target)
+        if not durations:
+            raise click.ClickException(
+                f"No recorded durations for the {target} target, they are recorded "
+                f"when running it, e.g. mazel run //...:{target}"
+            )
+
+    try:
+        result = graph_stats(workspace.graph(), durations, top=top)
+    except MazelException as e:
+        raise click.ClickException(str(e))
+
+    if output == "json":
+        click.echo(json.dumps(stats_json(result), indent=2))
+    else:
+        for line in format_stats(result, target):
+            click.echo(line)
+
+
+def format_stats(stats: GraphStats, target: Optional[str] = None) -> List[str]:
+    lines = [
+        f"Packages: {stats.packages}, dependencies: {stats.dependencies}",
+        f"Depth: {stats.depth} level(s)",
+        "Packages per level:",
+    ]
+    lines.extend(f"  {level}: {width}" for level, width in enumerate(stats.widths))
+
+    for title, spots in [
+        ("Most dependents (fan-in):", stats.fan_in),
+        ("Most dependencies (fan-out):", stats.fan_out),
+    ]:
+        lines.append(title)
+        lines.extend(
+            f"  {spot.package.label_path}: {spot.direct} direct, "
+            f"{spot.transitive} transitive"
+            for spot in spots
+        )
+
+    lines.append(f"Longest chain ({len(stats.longest_chain)} package(s)):")
+    lines.extend(f"  {package.label_path}" for package in stats.longest_chain)
+
+    if target is not None:
+        critical = stats.critical_duration
+        speedup = stats.total_duration / critical if critical else 1.0
+        lines.append(
+            f"Critical path by {target} duration: {critical:.1f}s of "
+            f"{stats.total_duration:.1f}s in total, at most {speedup:.1f}x faster "
+            f"in parallel:"
+        )
+        lines.extend(
+            f"  {package.label_path}: {seconds:.1f}s"
+            for package, seconds in stats.critical_path
+        )
+        if stats.missing_durations:
+            lines.append(
+                f"No recorded {target} duration for {len(stats.missing_durations)} "
+                f"package(s), counted as 0s"
+            )
+    return lines
+
+
+def stats_json(stats: GraphStats) -> Dict[str, Any]:
+    def spots_json(spots: List[HotSpot]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "label": spot.package.label_path,
+                "direct": spot.direct,
+                "transitive": spot.transitive,
+            }
+            for spot in spots
+        ]
+
+    return {
+        "packages": stats.packages,
+        "dependencies": stats.dependencies,
+        "depth": stats.depth,
+        "widths": stats.widths,
+        "fan_in": spots_json(stats.fan_in),
+        "fan_out": spots_json(stats.fan_out),
+        "longest_chain": [package.label_path for package in stats.longest_chain],
+        "critical_path": [
+            {"label": package.label_path, "seconds": seconds}
+            for package, seconds in stats.critical_path
+        ],
+        "total_duration": stats.total_duration,
+        "missing_durations": [
+            package.label_path for package in stats.missing_durations
+        ],
+    }
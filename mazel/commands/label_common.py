@@ -6,14 +6,18 @@ import subprocess
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import click
 
-from mazel.graph import Node, PackageGraph
+from mazel.durations import record_durations
+from mazel.exceptions import MazelException, WatchError
+from mazel.git import git_ignored
+from mazel.graph import PackageGraph
 from mazel.label import Label, Target
 from mazel.package import Package
 from mazel.types import CommitRange
+from mazel.watch import Watcher
 from mazel.workspace import Workspace
 
 from .utils import current_workspace
@@ -36,11 +40,19 @@ def label_command(fn: Callable[..., None]) -> click.Command:
             "defaults to HEAD"
         ),
     )(fn)
+    fn = click.option(
+        "--watch",
+        is_flag=True,
+        default=False,
+        help=(
+            "After running, watch the packages for file changes and re-run for the "
+            "changed packages (and their descendants with --with-descendants)"
+        ),
+    )(fn)
     return fn
 
 
 # TODO Consider generalizing package_order beyond label_common
-# WARN Walk the entire graph multiple times, consider optimizing
 def package_order(
     packages: List[Package],
     workspace: Workspace,
@@ -48,21 +60,26 @@ def package_order(
     with_ancestors: bool = False,
     with_descendants: bool = False,
 ) -> List[Package]:
+    if not (with_ancestors or with_descendants) and (
+        run_order == RunOrder.UNORDERED or len(packages) <= 1
+    ):
+        # Nothing to expand or order, so avoid scanning the whole Workspace to build
+        # the graph
+        return packages
 
     graph = workspace.graph()
     if run_order == run_order.REVERSED:
         graph = graph.invert()
 
-    # Ensure the order the subset in `packages` aligns with the order of the superset
-    # in `expected`, which defines the directed-graph order
-    expected = list(graph.consume_tree())
-
     packages = expand_ancestry(packages, graph, with_ancestors, with_descendants)
 
     if run_order == RunOrder.UNORDERED:
         return packages
 
-    return sorted(packages, key=lambda pkg: expected.index(pkg))
+    # Ensure the order the subset in `packages` aligns with the order of the whole
+    # graph, which defines the directed-graph order
+    position = {node.package: i for i, (node, _) in enumerate(graph.plan())}
+    return sorted(packages, key=position.__getitem__)
 
 
 def expand_ancestry(
@@ -71,40 +88,25 @@ def expand_ancestry(
     with_ancestors: bool = False,
     with_descendants: bool = False,
 ) -> List[Package]:
-    packages: List[Package] = []
-
-    def recurse(node: Node, walking_ancestors: bool = False) -> None:
-        # This node has already been processed, don't need to readd it or
-        # its parents/chilren
-        if node.package in packages:
-            return
-
-        packages.append(node.package)
-
-        if with_ancestors:
-            # Add parents and recursive to grandparents until exhausted
-            for parent in node.parents:
-                recurse(parent, walking_ancestors=True)
-
-        if with_descendants and not walking_ancestors:
-            # Add children and recursive to grandchildren until exhausted,
-            # but do not recurse to nodes that are not direct descendants of the
-            # start node (e.g. siblings or "cousins" of the start node)
-            # related, but n
-            for child in node.children:
-                recurse(child)
-
-    # Find the nodes associated with the input packages (since nodes have
-    # parents/children), then add the package and if requested,
-    # the ancestors and/or descendants
-    for node in graph.nodes():
-        if node.package in initial:
-            recurse(node)
-
-    return packages
+    """
+    The packages, and if requested, their descendants and/or the ancestors of
+    those (but not the descendants of the ancestors, e.g. siblings or "cousins"),
+    in the graph's order. Bitwise ORs of the precomputed closures (see
+    `CompactGraph`).
+    """
+    compact = graph.compact()
+    bits = compact.bits(initial)
+    if with_descendants:
+        bits = compact.with_descendants(bits)
+    if with_ancestors:
+        bits = compact.with_ancestors(bits)
+    return compact.packages_of(bits)
 
 
 class LabelRunner:
+    # Seconds without further changes before re-running in watch mode
+    WATCH_DEBOUNCE = 0.2
+
     def __init__(
         self,
         handler: TargetHandler,
@@ -113,12 +115,14 @@ class LabelRunner:
         with_ancestors: bool = False,
         with_descendants: bool = False,
         modified_since: Optional[str] = None,
+        watch: bool = False,
     ):
         self.handler = handler
         self.default_target = default_target
         self.run_order = run_order
         self.with_ancestors = with_ancestors
         self.with_descendants = with_descendants
+        self.watch = watch
 
         self.modified_range = (
             CommitRange.parse(modified_since) if modified_since else None
@@ -128,48 +132,171 @@ class LabelRunner:
 
     def run(self, label_value: str) -> None:
         label = Label.parse(label_value)
-        resolved = self.workspace.resolve_label(label)
+        try:
+            resolved = self.workspace.resolve_label(label)
+        except MazelException as e:
+            raise click.ClickException(str(e))
         target = resolved.target if resolved.target else self.default_target
 
         assert target is not None, "Must have a label target or a default target"
 
-        self.process_packages(resolved.packages, target)
+        if not self.watch:
+            self.process_packages(resolved.packages, target)
+            return
 
-    def process_packages(self, packages: List[Package], target: Target) -> None:
+        try:
+            self.process_packages(resolved.packages, target)
+        except click.ClickException as e:
+            # Keep watching, the error may get fixed
+            e.show()
+        self.watch_packages(resolved.packages, target)
+
+    def process_packages(
+        self,
+        packages: List[Package],
+        target: Target,
+        with_ancestors: Optional[bool] = None,
+        modified_only: bool = True,
+    ) -> None:
         errors = []
 
-        if self.modified_range is not None:
+        if modified_only and self.modified_range is not None:
             modified_packages = self.workspace.modified_packages(
                 commit_range=self.modified_range
             )
             packages = [pkg for pkg in packages if pkg in modified_packages]
 
-        for pkg in package_order(
-            packages=packages,
-            workspace=self.workspace,
+        ordered = self.package_order(
+            packages,
             run_order=self.run_order,
-            with_ancestors=self.with_ancestors,
+            with_ancestors=(
+                self.with_ancestors if with_ancestors is None else with_ancestors
+            ),
             with_descendants=self.with_descendants,
-        ):
-            # Try to run for packages, storing the errors for later. Could
-            # consider --fail-fast in the future
-            try:
-                self.handler.handle(pkg, target)
-            except click.ClickException as e:
-                errors.append(e)
+        )
+        try:
+            for pkg in ordered:
+                # Try to run for packages, storing the errors for later. Could
+                # consider --fail-fast in the future
+                try:
+                    self.handler.handle(pkg, target)
+                except click.ClickException as e:
+                    errors.append(e)
+        finally:
+            self.handler.finish()
 
         if errors:
             # Show the first error
             raise errors[0]
 
+    def package_order(self, packages: List[Package], **kwargs: Any) -> List[Package]:
+        """`package_order`, with errors (e.g. CyclicDependency) shown to the user"""
+        try:
+            return package_order(packages, self.workspace, **kwargs)
+        except MazelException as e:
+            raise click.ClickException(str(e))
+
+    def watch_packages(self, packages: List[Package], target: Target) -> None:
+        """
+        Watch the packages (and their ancestors with --with-ancestors, since a change
+        in a dependency affects the package), re-running for the packages with
+        changes until interrupted.
+        """
+        watched = self.package_order(packages, with_ancestors=self.with_ancestors)
+        watcher = Watcher(
+            self.workspace.path,
+            [pkg.path for pkg in watched],
+            ignore=self.workspace.ignore_rules(),
+        )
+        try:
+            with watcher:
+                click.secho(
+                    f"Watching {len(watched)} package(s) for changes...", fg="cyan"
+                )
+                for changed in watcher.batches(debounce=self.WATCH_DEBOUNCE):
+                    while changed:
+                        watcher.overflowed = False
+                        self.rerun(changed, packages, watched, target)
+                        changed = self.changed_while_running(watcher)
+        except WatchError as e:
+            raise click.ClickException(str(e))
+        except KeyboardInterrupt:
+            pass
+
+    def changed_while_running(self, watcher: Watcher) -> Set[Path]:
+        """
+        The changes made while re-running (e.g. edits), except for those ignored by
+        git, as made by the target itself (e.g. build output).
+        """
+        changed = watcher.batch(0, debounce=self.WATCH_DEBOUNCE)
+        if watcher.overflowed:
+            # Too many changes to tell which, most likely the target's own output
+            return set()
+        return changed - git_ignored(self.workspace.path, changed)
+
+    def rerun(
+        self,
+        changed: Iterable[Path],
+        packages: List[Package],
+        watched: List[Package],
+        target: Target,
+    ) -> None:
+        """
+        Re-run for the watched packages owning the `changed` paths, and with
+        --with-ancestors, for the requested `packages` depending on those
+        """
+        owners = set()
+        for path in changed:
+            owner = self.workspace.owning_package(path)
+            if owner is not None:
+                owners.add(owner)
+
+        changed_packages = [pkg for pkg in watched if pkg in owners]
+        if not changed_packages:
+            return
+
+        click.secho(
+            f"\u21BB {len(changed_packages)} package(s) changed: "
+            + " ".join(pkg.label_path for pkg in changed_packages),
+            fg="cyan",
+        )
+
+        rerun = changed_packages
+        if self.with_ancestors:
+            compact = self.workspace.graph().compact()
+            dependents = set(
+                compact.packages_of(compact.with_descendants(compact.bits(rerun)))
+            )
+            rerun = [
+                pkg
+                for pkg in watched
+                if pkg in owners or (pkg in dependents and pkg in packages)
+            ]
+
+        try:
+            # The ancestors did not change, only re-run the descendants. The changes
+            # are newer than --modified-since, so run regardless
+            self.process_packages(
+                rerun, target, with_ancestors=False, modified_only=False
+            )
+        except click.ClickException as e:
+            e.show()
+
 
 class TargetHandler(abc.ABC):
     @abc.abstractmethod
     def handle(self, package: Package, target: Target) -> None:
         pass
 
+    def finish(self) -> None:  # noqa: B027
+        """Called after handling a batch of packages"""
+
 
 class MakeLabel(TargetHandler):
+    def __init__(self) -> None:
+        # (Workspace path, target) -> label_path -> seconds, recorded on `finish`
+        self.durations: Dict[Tuple[Path, str], Dict[str, float]] = {}
+
     def handle(self, package: Package, target: Target) -> None:
         if not self.target_exists(package, target):
             return
@@ -185,11 +312,13 @@ class MakeLabel(TargetHandler):
         try:
             self.process(["make", "-s", str(target)], package.path)
 
+            elapsed = datetime.now() - start
+            # For weighting the critical path, see `mazel graph stats`
+            self.durations.setdefault((package.workspace.path, str(target)), {})[
+                package.label_path
+            ] = elapsed.total_seconds()
             # check mark in green
-            click.secho(
-                f"\u2714 {label} (Elapsed time: {datetime.now() - start})",
-                fg="green",
-            )
+            click.secho(f"\u2714 {label} (Elapsed time: {elapsed})", fg="green")
         except subprocess.CalledProcessError as e:
             # X mark in red
             click.secho(
@@ -199,6 +328,12 @@ class MakeLabel(TargetHandler):
             )
             raise click.ClickException(" ".join(e.cmd))
 
+    def finish(self) -> None:
+        # Once per batch, rather than rewriting the file per package
+        for (workspace_path, target), durations in self.durations.items():
+            record_durations(workspace_path, target, durations)
+        self.durations.clear()
+
     def target_exists(self, package: Package, target: Target) -> bool:
         """
         Do a dry-run execution of make to see if the target exists in the Makefile.
@@ -0,0 +1,69 @@
+import json
+from typing import Dict, List, Tuple
+
+import click
+
+from mazel.exceptions import MazelException
+from mazel.package import Package
+from mazel.query import Query
+
+from .utils import current_workspace
+
+
+@click.command()
+@click.argument("expression")
+@click.option(
+    "--output",
+    type=click.Choice(["label", "json", "dot"]),
+    default="label",
+    show_default=True,
+    help=(
+        "label: one label path per line. json: a list of the packages, with their "
+        "dependencies within the result. dot: a Graphviz digraph"
+    ),
+)
+def query(expression: str, output: str) -> None:
+    """
+    Query the dependency graph, like bazel query:
+
+        mazel query 'rdeps(//..., //libs/py/common)'
+
+    deps(x[, depth]), rdeps(universe, x[, depth]), somepath(from, to),
+    allpaths(from, to), set(a b ...), union (+), intersection (^) and
+    difference (-) of package labels.
+    """
+    try:
+        engine = Query(current_workspace())
+        packages = engine.evaluate(expression)
+        edges = engine.edges(packages) if output != "label" else []
+    except MazelException as e:
+        raise click.ClickException(str(e))
+
+    if output == "json":
+        click.echo(format_json(packages, edges))
+    elif output == "dot":
+        click.echo(format_dot(packages, edges))
+    else:
+        for package in packages:
+            click.echo(package.label_path)
+
+
+def format_json(packages: List[Package], edges: List[Tuple[Package, Package]]) -> str:
+    deps: Dict[Package, List[str]] = {package: [] for package in packages}
+    for package, dependency in edges:
+        deps[package].append(dependency.label_path)
+    return json.dumps(
+        [{"label": package.label_path, "deps": deps[package]} for package in packages],
+        indent=2,
+    )
+
+
+def format_dot(packages: List[Package], edges: List[Tuple[Package, Package]]) -> str:
+    lines = ["digraph mazel {"]
+    lines.extend(f"  {json.dumps(package.label_path)}" for package in packages)
+    lines.extend(
+        f"  {json.dumps(package.label_path)} -> {json.dumps(dependency.label_path)}"
+        for package, dependency in edges
+    )
+    lines.append("}")
+    return "\n".join(lines)
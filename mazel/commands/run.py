@@ -10,6 +10,7 @@ def run(
     with_ancestors: bool,
     with_descendants: bool,
     modified_since: Optional[str] = None,
+    watch: bool = False,
 ) -> None:
     """Runs a specific Makefile target.
 
@@ -27,4 +28,5 @@ def run(
         with_ancestors=with_ancestors,
         with_descendants=with_descendants,
         modified_since=modified_since,
+        watch=watch,
     ).run(label)
@@ -0,0 +1,38 @@
+import click
+
+from mazel import client
+from mazel.exceptions import MazelException
+from mazel.server import IDLE_TIMEOUT, Server
+
+from .utils import current_workspace
+
+
+@click.command()
+@click.option(
+    "--idle-timeout",
+    type=float,
+    default=IDLE_TIMEOUT,
+    show_default=True,
+    help="Seconds without any requests before the server exits",
+)
+def server(idle_timeout: float) -> None:
+    """
+    Run the mazel server for the current workspace in the foreground.
+
+    Typically started in the background by setting MAZEL_SERVER=1.
+    """
+    workspace = current_workspace()
+    try:
+        Server(workspace.path, idle_timeout=idle_timeout).serve()
+    except MazelException as e:
+        raise click.ClickException(str(e))
+
+
+@click.command()
+def shutdown() -> None:
+    """Stop the mazel server for the current workspace"""
+    workspace = current_workspace()
+    if client.shutdown(workspace.path):
+        click.echo("Server stopped")
+    else:
+        click.echo("No server running")
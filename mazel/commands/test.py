@@ -23,6 +23,7 @@ def test(
     with_ancestors: bool,
     with_descendants: bool,
     modified_since: Optional[str] = None,
+    watch: bool = False,
 ) -> None:
     handler_cls = (
         label_common.MakeLabelCaptureErrors
@@ -37,4 +38,5 @@ def test(
         with_ancestors=with_ancestors,
         with_descendants=with_descendants,
         modified_since=modified_since,
+        watch=watch,
     ).run(label)
@@ -1,7 +1,13 @@
+from typing import Optional
+
 import click
 
 from mazel.workspace import Workspace
 
+# Set by the mazel server (see mazel.server), so the commands it runs reuse its
+# already scanned Workspace
+preloaded: Optional[Workspace] = None
+
 
 def current_workspace() -> Workspace:
     """Throw exception if not currently in a workspace"""
@@ -10,4 +16,7 @@ def current_workspace() -> Workspace:
     if workspace is None:
         raise click.ClickException("Not in a workspace")
 
+    if preloaded is not None and preloaded == workspace:
+        return preloaded
+
     return workspace
@@ -92,9 +92,9 @@ def make_config(workspace: Workspace) -> str:
 def updates(workspace: Workspace) -> List[Dict[str, Any]]:
     entries = []
     for package in workspace.packages():
-        for runtime in package.runtimes():
+        for runtime_label in package.metadata().runtimes:
 
-            package_ecosystem = PACKAGE_ECOSYSTEM[runtime.runtime_label]
+            package_ecosystem = PACKAGE_ECOSYSTEM[runtime_label]
             if package_ecosystem is None:
                 # Runtime is disabled for dependabot checking
                 continue
@@ -0,0 +1,213 @@
+"""
+Persistent cache of each Package's extracted dependencies, so that unchanged
+BUILD.toml and manifest files (e.g. pyproject.toml) are not re-read and re-parsed
+on every invocation.
+
+Each entry records the (size, mtime_ns) "stamp" of the files consulted: the
+BUILD.toml and the Package's Runtimes' manifests (see `Runtime.manifests`),
+whether or not the file exists. Along with the "probes": the results of the
+lookups of other Packages the Runtimes made (see `Workspace.probe`), e.g. the
+Package owning a path dependency, which change as Packages are added or removed.
+An entry is only used while all the stamps and probes still match.
+"""
+from __future__ import annotations
+
+import os
+import posixpath
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .cache import cache_path, read_cache, write_cache
+from .scan import RACY_WINDOW_NS
+
+# File name -> [size, mtime_ns], or None when the file does not exist
+Stamps = Dict[str, Optional[List[int]]]
+# "<kind>:<argument>" -> the result, see `Workspace.probe`
+Probes = Dict[str, Any]
+
+
+def stamp(path: Union[str, Path]) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+@dataclass
+class Dependencies:
+    """A Package's dependencies as label paths, without resolving the Packages"""
+
+    # The runtime_labels from BUILD.toml's package.runtimes
+    runtimes: List[str]
+    # BUILD.toml's package.depends_on
+    depends_on: List[str]
+    # The Runtimes' workspace_dependencies
+    runtime_deps: List[str]
+
+
+class DependencyCache(object):
+    """Dependencies keyed by the Package's path relative to the Workspace"""
+
+    CACHE_NAME = "dependencies"
+    VERSION = 2
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        # Entries not to persist
+        self.volatile: Set[str] = set()
+        self.changed = False
+        # Path relative to the Workspace -> the entries stamping it from outside of
+        # their Package, built on first use (see `consumers`)
+        self._consumers: Optional[Dict[str, Set[str]]] = None
+
+    @classmethod
+    def load(cls, workspace_path: Path) -> DependencyCache:
+        data = read_cache(cache_path(workspace_path, cls.CACHE_NAME), cls.VERSION)
+        if data is None:
+            return cls()
+        return cls(entries=data["entries"])
+
+    def save(self, workspace_path: Path) -> None:
+        write_cache(
+            cache_path(workspace_path, self.CACHE_NAME),
+            self.VERSION,
+            {
+                "entries": {
+                    relpath: entry
+                    for relpath, entry in self.entries.items()
+                    if relpath not in self.volatile
+                }
+            },
+        )
+        self.changed = False
+
+    @staticmethod
+    def stamps(package_path: Path, names: Iterable[str]) -> Stamps:
+        # os.path, as Path.joinpath costs more than the stat itself
+        base = os.fspath(package_path)
+        return {name: stamp(os.path.join(base, name)) for name in names}
+
+    def lookup(
+        self,
+        relpath: str,
+        package_path: Path,
+        probe: Optional[Callable[[str], Any]] = None,
+    ) -> Optional[Dependencies]:
+        """
+        The cached Dependencies, if the files consulted are unchanged, and the
+        `probe` (e.g. `Workspace.probe`) gives the same results
+        """
+        entry = self.entries.get(relpath)
+        if (
+            entry is None
+            or entry["stamps"] != self.stamps(package_path, entry["stamps"])
+            or not self.probes_match(entry, probe)
+        ):
+            return None
+        return Dependencies(**entry["dependencies"])
+
+    @staticmethod
+    def probes_match(
+        entry: Dict[str, Any], probe: Optional[Callable[[str], Any]]
+    ) -> bool:
+        probes: Probes = entry.get("probes", {})
+        if not probes:
+            return True
+        return probe is not None and all(
+            probe(key) == result for key, result in probes.items()
+        )
+
+    def probed(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """The entries (by Package relpath) with probes"""
+        for relpath, entry in self.entries.items():
+            if entry.get("probes"):
+                yield relpath, entry
+
+    def record(
+        self,
+        relpath: str,
+        stamps: Stamps,
+        dependencies: Dependencies,
+        now_ns: Optional[int] = None,
+        probes: Optional[Probes] = None,
+    ) -> None:
+        """
+        Cache the Dependencies, extracted from the files with the `stamps` (taken
+        before reading the files) and resolved with the `probes`.
+        """
+        self._unindex(relpath)
+        self.entries[relpath] = {
+            "stamps": stamps,
+            "dependencies": asdict(dependencies),
+        }
+        if probes:
+            self.entries[relpath]["probes"] = probes
+        self._index(relpath)
+        self.changed = True
+
+        now_ns = time.time_ns() if now_ns is None else now_ns
+        if any(
+            file_stamp is not None and file_stamp[1] >= now_ns - RACY_WINDOW_NS
+            for file_stamp in stamps.values()
+        ):
+            # Recently modified, so a further modification may not change the mtime
+            # (see `mazel.scan.RACY_WINDOW_NS`): only keep it for this invocation
+            self.volatile.add(relpath)
+        else:
+            self.volatile.discard(relpath)
+
+    def discard(self, relpath: str) -> None:
+        self._unindex(relpath)
+        if self.entries.pop(relpath, None) is not None:
+            self.changed = True
+        self.volatile.discard(relpath)
+
+    def prune(self, relpaths: Iterable[str]) -> None:
+        """Drop the entries of Packages other than `relpaths` (e.g. removed)"""
+        keep = set(relpaths)
+        for relpath in [relpath for relpath in self.entries if relpath not in keep]:
+            self.discard(relpath)
+
+    def consumers(self, path: str) -> List[str]:
+        """
+        The entries (Package relpaths) whose stamps include the file outside of
+        their own Package (e.g. a go.work), by its "/" separated path relative to
+        the Workspace. For updating the dependents of a changed file.
+        """
+        if self._consumers is None:
+            self._consumers = {}
+            for relpath in self.entries:
+                self._index(relpath)
+        return sorted(self._consumers.get(path, ()))
+
+    def _external(self, relpath: str) -> List[str]:
+        entry = self.entries.get(relpath)
+        return [
+            posixpath.normpath(posixpath.join(relpath, name))
+            for name in (entry["stamps"] if entry is not None else ())
+            if name.startswith("..")
+        ]
+
+    def _index(self, relpath: str) -> None:
+        if self._consumers is not None:
+            for path in self._external(relpath):
+                self._consumers.setdefault(path, set()).add(relpath)
+
+    def _unindex(self, relpath: str) -> None:
+        if self._consumers is not None:
+            for path in self._external(relpath):
+                self._consumers.get(path, set()).discard(relpath)
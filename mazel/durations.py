@@ -0,0 +1,56 @@
+"""
+The durations of the last successful run of each Package's targets via the label
+commands (e.g. ``mazel test``), stored in ``.mazel/cache/durations.json``, for
+weighting the critical path of the dependency graph (see `mazel.stats`).
+"""
+from pathlib import Path
+from typing import IO, Dict, cast
+
+from .cache import cache_enabled, cache_path, read_cache, write_cache
+
+CACHE_NAME = "durations"
+VERSION = 1
+
+
+def read_durations(workspace_path: Path, target: str) -> Dict[str, float]:
+    """The seconds the target took, by the Package's label_path"""
+    data = read_cache(cache_path(workspace_path, CACHE_NAME), VERSION) or {}
+    durations = data.get("targets", {}).get(target, {})
+    return cast(Dict[str, float], durations if isinstance(durations, dict) else {})
+
+
+def record_durations(
+    workspace_path: Path, target: str, durations: Dict[str, float]
+) -> None:
+    """
+    Merge the target's durations (by label_path) into the file. Under an exclusive
+    lock, so concurrent runs (e.g. parallel invocations, or the commands forked by
+    the server) do not lose each other's updates.
+    """
+    if not durations or not cache_enabled():
+        return
+    path = cache_path(workspace_path, CACHE_NAME)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock = open(path.with_suffix(".lock"), "w")
+    except OSError:
+        # Caching is best effort
+        return
+
+    with lock:
+        _lock(lock)
+        targets = (read_cache(path, VERSION) or {}).get("targets", {})
+        targets.setdefault(target, {}).update(
+            (label_path, round(seconds, 3)) for label_path, seconds in durations.items()
+        )
+        write_cache(path, VERSION, {"targets": targets})
+
+
+def _lock(lock: IO[str]) -> None:
+    """Take an exclusive lock on the file, released when it is closed"""
+    try:
+        import fcntl
+    except ImportError:
+        # Not on POSIX (i.e. Windows), so concurrent updates may be lost
+        return
+    fcntl.flock(lock, fcntl.LOCK_EX)
@@ -22,5 +22,21 @@ class InvalidBuildToml(MazelException):
     pass
 
 
+class InvalidWorkspaceToml(MazelException):
+    pass
+
+
 class InvalidPackage(MazelException):
     pass
+
+
+class WatchError(MazelException):
+    pass
+
+
+class CyclicDependency(MazelException):
+    pass
+
+
+class InvalidQuery(MazelException):
+    pass
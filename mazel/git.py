@@ -1,5 +1,8 @@
+import os
+import re
 import subprocess
 from pathlib import Path
+from typing import Iterable, Set
 
 from .fs import cd
 from .types import CommitRange
@@ -19,3 +22,60 @@ def git_modified_files(repo_dir: Path, commit_range: CommitRange) -> list[Path]:
         )
 
     return [Path(fn) for fn in cmd.stdout.strip().split("\n")]
+
+
+def escape_pathspec(path: str) -> str:
+    """Escape the glob characters, so the path only matches itself in a pathspec"""
+    return re.sub(r"([\\*?\[])", r"\\\1", path)
+
+
+def git_ls_files(
+    repo_dir: Path, pathspecs: list[str], untracked: bool = False
+) -> list[Path]:
+    """
+    Files in the git index matching the `pathspecs`, relative to `repo_dir`.
+
+    With `untracked`, also includes files that are not yet tracked, but are not
+    excluded by .gitignore.
+    """
+    args = ["git", "ls-files", "-z", "--cached"]
+    if untracked:
+        args.extend(["--others", "--exclude-standard"])
+
+    with cd(repo_dir):
+        cmd = subprocess.run(
+            args + ["--"] + pathspecs,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    # NUL separated, so paths with special characters are not quoted
+    return [Path(fn) for fn in cmd.stdout.split("\0") if fn]
+
+
+def git_ignored(repo_dir: Path, paths: Iterable[Path]) -> Set[Path]:
+    """
+    Which of the `paths` are excluded by .gitignore, none if `repo_dir` is not inside
+    a git repository.
+    """
+    paths = list(paths)
+    if not paths:
+        return set()
+
+    try:
+        with cd(repo_dir):
+            cmd = subprocess.run(
+                ["git", "check-ignore", "-z", "--stdin"],
+                input="\0".join(os.fspath(path) for path in paths),
+                capture_output=True,
+                text=True,
+            )
+    except OSError:
+        # git is not installed
+        return set()
+
+    # Exits with 1 when none are ignored, 128 when not in a git repository
+    if cmd.returncode != 0:
+        return set()
+    return {Path(fn) for fn in cmd.stdout.split("\0") if fn}
@@ -1,5 +1,10 @@
-from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from array import array
+from functools import reduce
+from itertools import compress, count
+from operator import or_
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from .exceptions import CyclicDependency
 from .package import Package
 
 NodeApply = Callable[["Node", int], Any]  # Tried to use TypeVar instead of Any
@@ -65,11 +70,15 @@ class Node(object):
 class PackageGraph(object):
     """Directed Graph for representing dependencies between Packages"""
 
-    def __init__(self, nodes: Dict[Package, Node]):
+    def __init__(self, nodes: Dict[Package, Node], condense_cycles: bool = False):
         self._nodes = nodes
+        # Whether each cycle is planned as a unit, instead of raising
+        self.condense_cycles = condense_cycles
 
     @classmethod
-    def from_packages(cls, packages: List[Package]) -> "PackageGraph":
+    def from_packages(
+        cls, packages: List[Package], condense_cycles: bool = False
+    ) -> "PackageGraph":
         # Compute the graph by scanning thru the packages 3 times:
 
         # Scan 1) Generate Nodes from the packages
@@ -86,20 +95,72 @@ class PackageGraph(object):
             for parent in node.parents:
                 parent.children.append(node)
 
-        # TODO validate that there are no circular references
-
-        return cls(nodes)
+        graph = cls(nodes, condense_cycles)
+        if not condense_cycles:
+            graph.validate()
+        return graph
 
     def invert(self) -> "PackageGraph":
-        nodes = {
-            package: Node(node.package, parents=node.children, children=node.parents)
-            for package, node in self._nodes.items()
-        }
-        return PackageGraph(nodes)
+        nodes = {package: Node(package) for package in self._nodes}
+        # Linking the new Nodes, so walking the inverted graph stays inverted
+        for package, node in self._nodes.items():
+            inverted = nodes[package]
+            inverted.parents = [nodes[child.package] for child in node.children]
+            inverted.children = [nodes[parent.package] for parent in node.parents]
+        graph = PackageGraph(nodes, self.condense_cycles)
+        if hasattr(self, "_compact"):
+            graph._compact = self._compact.inverted()
+        return graph
 
     def nodes(self) -> List[Node]:
         return list(self._nodes.values())
 
+    # Incremental updates, patching the edges in place instead of rebuilding the
+    # graph (see `Workspace.refresh`). Each costs O(edges of the package).
+
+    def add(self, package: Package) -> Node:
+        """Add the package, without any edges (see `set_parents`)"""
+        node = self._nodes.get(package)
+        if node is None:
+            node = self._nodes[package] = Node(package)
+            self._forget_compact()
+        return node
+
+    def remove(self, package: Package) -> List[Package]:
+        """
+        Remove the package and its edges, returning the packages that depended upon
+        it (whose dependencies then need recomputing).
+        """
+        node = self._nodes.pop(package, None)
+        if node is None:
+            return []
+        self._forget_compact()
+        for parent in node.parents:
+            parent.children.remove(node)
+        for child in node.children:
+            child.parents.remove(node)
+        return [child.package for child in node.children]
+
+    def set_parents(self, package: Package, parents: Iterable[Package]) -> None:
+        """Replace the package's dependencies"""
+        node = self.add(package)
+        for parent in node.parents:
+            parent.children.remove(node)
+        node.parents = [self._nodes[dep] for dep in parents]
+        for parent in node.parents:
+            parent.children.append(node)
+        self._forget_compact()
+
+    def compact(self) -> "CompactGraph":
+        """The CompactGraph of the current graph, for ancestry queries"""
+        if not hasattr(self, "_compact"):
+            self._compact = CompactGraph.from_graph(self)
+        return self._compact
+
+    def _forget_compact(self) -> None:
+        if hasattr(self, "_compact"):
+            del self._compact
+
     # def walk(
     #     self, apply_fn: NodeApply = identity, breadth_first: bool = True,
     # ) -> Iterable[Any]:
@@ -109,36 +170,371 @@ class PackageGraph(object):
     #     roots = [node for node in self.nodes() if not node.parents]
     #     return (node for node in recurse_fn(roots, apply_fn))
 
+    def components(self) -> List[List[Node]]:
+        """
+        The strongly connected components: the packages in a cycle form one
+        component, every other package is a component by itself. Each component's
+        nodes are sorted by label_path, the components are in reverse dependency
+        order (children before parents).
+
+        Tarjan's algorithm, iterative so long chains do not hit the recursion
+        limit: O(V + E).
+        """
+        index: Dict[Node, int] = {}
+        lowlink: Dict[Node, int] = {}
+        stack: List[Node] = []
+        on_stack: Set[Node] = set()
+        components: List[List[Node]] = []
+
+        def visit(node: Node) -> Iterator[Node]:
+            index[node] = lowlink[node] = len(index)
+            stack.append(node)
+            on_stack.add(node)
+            return iter(node.children)
+
+        for root in self._nodes.values():
+            if root in index:
+                continue
+            work = [(root, visit(root))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        work.append((child, visit(child)))
+                        break
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        components.append(_pop_component(stack, on_stack, node))
+        return components
+
+    def cycles(self) -> List[List[Node]]:
+        """
+        A dependency cycle through each component of more than one node (or of a
+        node depending upon itself), as the path from the component's first node
+        by label_path back to itself, e.g. [//b, //c, //b] when //b depends upon
+        //c, which depends upon //b.
+        """
+        return _cycles(self.components())
+
+    def validate(self) -> None:
+        """Raise CyclicDependency, with the cycles' paths, if there are any"""
+        _check_cycles(self.components())
+
+    def plan(self) -> List[Tuple[Node, int]]:
+        """
+        The nodes in dependency order, parents before their children, with their
+        level: 0 for the nodes without parents, otherwise one more than their
+        deepest parent. Each level is sorted by label_path, so the order is
+        reproducible.
+
+        A cycle raises CyclicDependency, unless `condense_cycles`, in which case
+        the cycle's nodes are planned as a unit: together, at the same level,
+        sorted by label_path.
+
+        Kahn's algorithm, a level at a time: O(V log V + E). Over the strongly
+        connected components (see `components`) only when there is a cycle.
+        """
+        plan = _kahn([[node] for node in self._nodes.values()])
+        if len(plan) < len(self._nodes):
+            # The remaining nodes are in (or depend upon) a cycle
+            components = self.components()
+            if not self.condense_cycles:
+                _check_cycles(components)
+            plan = _kahn(components)
+        return plan
+
     def consume_tree(self, apply_fn: NodeApply = identity) -> Iterable[Any]:
         """
         Walk the graph, running apply_fn to each node, such that are parents are
-        consumed before their children.
+        consumed before their children (see `plan`).
         """
-        # WARNING: Inefficient: we are looping multiple times over all remaining Nodes
-        #   - Can we use the BFS or DFS approaches to more intelligently walk the tree?
-        #   - Alternatively could try to sort more intelligently, e.g libs before tools,
-        #     though that is specific to our repo layout.
-        #   - Could also look for roots for the first round.
-        # WARNING: Non-deterministic ordering with Set looping & casting to list.
-        #   Will result in differing execution times.
-
-        consumed: Set[Node] = set()
-        remaining: Set[Node] = set(self.nodes())
-        level = -1
-        while len(remaining) > 0:
-            level += 1
-            # cast to a list since we are going to modify the set in place (instead
-            # of creating a new set, copying, and reassigning).
-            for node in list(remaining):
-                if len(set(node.parents) - consumed) == 0:
-                    consumed.add(node)
-                    remaining.remove(node)
-                    result = apply_fn(node, level)
-
-                    # Allow apply_func to return an iterable result that we will unroll
-                    # via the `yield from`. But if not iterable, just return the single
-                    # value
-                    try:
-                        yield from result
-                    except TypeError:
-                        yield result
+        for node, level in self.plan():
+            result = apply_fn(node, level)
+
+            # Allow apply_func to return an iterable result that we will unroll
+            # via the `yield from`. But if not iterable, just return the single
+            # value
+            try:
+                yield from result
+            except TypeError:
+                yield result
+
+
+class CompactGraph(object):
+    """
+    An integer-indexed copy of a PackageGraph, for ancestry queries in
+    microseconds (e.g. `expand_ancestry`). The packages are numbered 0..N-1, in the
+    graph's order, with the edges in CSR (compressed sparse row) arrays: the
+    parents of package i are
+    ``parent_indices[parent_offsets[i]:parent_offsets[i + 1]]``.
+
+    A set of packages is an int used as a bitset, with bit i for package i. Each
+    package's transitive closure (itself and its ancestors, or itself and its
+    descendants) is computed on first use, so expanding a set is an OR per package
+    in the set.
+    """
+
+    def __init__(
+        self,
+        packages: List[Package],
+        parent_offsets: "array[int]",
+        parent_indices: "array[int]",
+        child_offsets: "array[int]",
+        child_indices: "array[int]",
+    ):
+        self.packages = packages
+        self.index = {package: i for i, package in enumerate(packages)}
+        self.parent_offsets = parent_offsets
+        self.parent_indices = parent_indices
+        self.child_offsets = child_offsets
+        self.child_indices = child_indices
+
+    @classmethod
+    def from_graph(cls, graph: PackageGraph) -> "CompactGraph":
+        nodes = graph.nodes()
+        index = {node.package: i for i, node in enumerate(nodes)}
+        parent_offsets, parent_indices = _csr(
+            [index[parent.package] for parent in node.parents] for node in nodes
+        )
+        child_offsets, child_indices = _csr(
+            [index[child.package] for child in node.children] for node in nodes
+        )
+        return cls(
+            [node.package for node in nodes],
+            parent_offsets,
+            parent_indices,
+            child_offsets,
+            child_indices,
+        )
+
+    def inverted(self) -> "CompactGraph":
+        """The graph with the edges reversed, keeping any computed closures"""
+        inverted = CompactGraph(
+            self.packages,
+            self.child_offsets,
+            self.child_indices,
+            self.parent_offsets,
+            self.parent_indices,
+        )
+        if hasattr(self, "_ancestors"):
+            inverted._descendants = self._ancestors
+        if hasattr(self, "_descendants"):
+            inverted._ancestors = self._descendants
+        return inverted
+
+    def parents(self, i: int) -> "array[int]":
+        return _row(self.parent_offsets, self.parent_indices, i)
+
+    def children(self, i: int) -> "array[int]":
+        return _row(self.child_offsets, self.child_indices, i)
+
+    def bits(self, packages: Iterable[Package]) -> int:
+        """The bitset of the packages, ignoring any not in the graph"""
+        indices = (self.index.get(package) for package in packages)
+        return bits_of(i for i in indices if i is not None)
+
+    def packages_of(self, bits: int) -> List[Package]:
+        """The packages in the bitset, in the graph's order"""
+        return list(compress(self.packages, _bit_flags(bits)))
+
+    def with_ancestors(self, bits: int) -> int:
+        """The packages and all their ancestors"""
+        if not hasattr(self, "_ancestors"):
+            self._ancestors = _closures(
+                len(self.packages),
+                (self.parent_offsets, self.parent_indices),
+                (self.child_offsets, self.child_indices),
+            )
+        return _union(self._ancestors, bits)
+
+    def with_descendants(self, bits: int) -> int:
+        """The packages and all their descendants"""
+        if not hasattr(self, "_descendants"):
+            self._descendants = _closures(
+                len(self.packages),
+                (self.child_offsets, self.child_indices),
+                (self.parent_offsets, self.parent_indices),
+            )
+        return _union(self._descendants, bits)
+
+
+CSR = Tuple["array[int]", "array[int]"]
+
+
+def bit_indices(bits: int) -> List[int]:
+    """The indices of the set bits, ascending"""
+    return list(compress(count(), _bit_flags(bits)))
+
+
+def bits_of(indices: Iterable[int]) -> int:
+    """The bitset of the indices"""
+    digits = bytearray()
+    for i in indices:
+        if i >= len(digits):
+            digits.extend(b"0" * (i + 1 - len(digits)))
+        digits[i] = ord("1")
+    # Most significant digit first
+    return int(digits[::-1] or b"0", 2)
+
+
+def _bit_flags(bits: int) -> bytes:
+    # Least significant digit first, dropping the "0b", as 0/1 bytes, so
+    # `compress` selects the set bits in C, rather than a Python step per bit
+    return bin(bits)[:1:-1].encode().translate(_DIGIT_FLAGS)
+
+
+_DIGIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _csr(rows: Iterable[List[int]]) -> CSR:
+    offsets = array("i", [0])
+    indices = array("i")
+    for row in rows:
+        indices.extend(row)
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def _row(offsets: "array[int]", indices: "array[int]", i: int) -> "array[int]":
+    start, end = offsets[i], offsets[i + 1]
+    return indices[start:end]
+
+
+def _union(closures: List[int], bits: int) -> int:
+    return reduce(or_, compress(closures, _bit_flags(bits)), 0)
+
+
+def _closures(n: int, incoming: CSR, outgoing: CSR) -> List[int]:
+    """
+    Each node's bitset of itself and every node reaching it thru the incoming
+    edges, e.g. the ancestors via the parents. In topological order (Kahn's
+    algorithm), so each node's closure is the union of its incoming nodes'. The
+    nodes in (or after) a cycle have no such order, and are iterated until their
+    closures stop changing.
+    """
+    in_offsets, in_indices = incoming
+    in_degree = [in_offsets[i + 1] - in_offsets[i] for i in range(n)]
+    order = [i for i in range(n) if in_degree[i] == 0]
+    for i in order:
+        for j in _row(*outgoing, i):
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                order.append(j)
+
+    closures = [1 << i for i in range(n)]
+    for i in order:
+        closures[i] = _union_row(closures, _row(*incoming, i), closures[i])
+
+    remaining = [i for i in range(n) if in_degree[i] > 0]
+    changed = True
+    while remaining and changed:
+        changed = False
+        for i in remaining:
+            bits = _union_row(closures, _row(*incoming, i), closures[i])
+            if bits != closures[i]:
+                closures[i] = bits
+                changed = True
+    return closures
+
+
+def _union_row(closures: List[int], row: "array[int]", bits: int) -> int:
+    for j in row:
+        bits |= closures[j]
+    return bits
+
+
+def _label_path(node: Node) -> str:
+    return node.package.label_path
+
+
+def _kahn(components: List[List[Node]]) -> List[Tuple[Node, int]]:
+    """Plan the components (see `PackageGraph.plan`), skipping any in a cycle"""
+    unit = {node: i for i, component in enumerate(components) for node in component}
+    # Counting only the edges between components
+    in_degree = [0] * len(components)
+    for node, i in unit.items():
+        in_degree[i] += sum(1 for parent in node.parents if unit[parent] != i)
+    labels = [component[0].package.label_path for component in components]
+
+    current = [i for i, degree in enumerate(in_degree) if degree == 0]
+    plan: List[Tuple[Node, int]] = []
+    level = 0
+    while current:
+        current.sort(key=labels.__getitem__)
+        following = []
+        for i in current:
+            plan.extend((node, level) for node in components[i])
+            for node in components[i]:
+                for child in node.children:
+                    j = unit[child]
+                    if j == i:
+                        continue
+                    in_degree[j] -= 1
+                    if in_degree[j] == 0:
+                        following.append(j)
+        current = following
+        level += 1
+    return plan
+
+
+def _cycles(components: List[List[Node]]) -> List[List[Node]]:
+    cycles = [
+        _cycle_path(component)
+        for component in components
+        if len(component) > 1 or component[0] in component[0].parents
+    ]
+    return sorted(cycles, key=lambda cycle: cycle[0].package.label_path)
+
+
+def _check_cycles(components: List[List[Node]]) -> None:
+    cycles = _cycles(components)
+    if cycles:
+        paths = [
+            " -> ".join(node.package.label_path for node in cycle) for cycle in cycles
+        ]
+        raise CyclicDependency(f"Circular dependencies: {'; '.join(paths)}")
+
+
+def _pop_component(stack: List[Node], on_stack: Set[Node], root: Node) -> List[Node]:
+    """Pop the Tarjan stack down to the component's root"""
+    component = []
+    while True:
+        node = stack.pop()
+        on_stack.discard(node)
+        component.append(node)
+        if node is root:
+            return sorted(component, key=_label_path)
+
+
+def _cycle_path(component: List[Node]) -> List[Node]:
+    """
+    The shortest path from the component's first node back to itself, breadth
+    first thru the dependencies (parents), so each node depends upon the next
+    """
+    start = component[0]
+    members = set(component)
+    previous: Dict[Node, Optional[Node]] = {start: None}
+    queue = [start]
+    for node in queue:
+        for parent in sorted(node.parents, key=_label_path):
+            if parent is start:
+                return _path_to(previous, node) + [start]
+            elif parent in members and parent not in previous:
+                previous[parent] = node
+                queue.append(parent)
+    raise AssertionError(f"No cycle thru {start}")  # pragma: no cover
+
+
+def _path_to(previous: Dict[Node, Optional[Node]], node: Node) -> List[Node]:
+    path = []
+    current: Optional[Node] = node
+    while current is not None:
+        path.append(current)
+        current = previous[current]
+    return path[::-1]
@@ -0,0 +1,134 @@
+"""
+gitignore-style exclusion patterns for the package scan.
+
+Supports the commonly used subset of the gitignore syntax [1]:
+
+- Blank lines and lines starting with ``#`` are skipped
+- ``!`` negates a pattern, re-including a directory excluded by an earlier pattern
+- A trailing ``/`` is accepted (only directories are matched anyway)
+- A pattern with a ``/`` at the start or in the middle is relative to the
+  Workspace root, otherwise it matches the directory name at any depth
+- ``*``, ``?`` and ``[...]`` match within a single path component, ``**`` matches
+  across components
+
+[1]: https://git-scm.com/docs/gitignore#_pattern_format
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def translate(pattern: str) -> str:
+    """Translate a single gitignore glob into a regular expression"""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    i, n = 0, len(pattern)
+    regex = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            # Zero or more leading directories
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        elif c == "*":
+            regex.append("[^/]*")
+        elif c == "?":
+            regex.append("[^/]")
+        elif c == "[":
+            start = i + 1
+            end = pattern.find(
+                "]", start + 1 if pattern.startswith("!", start) else start
+            )
+            if end == -1:
+                regex.append(re.escape(c))
+            else:
+                body = pattern[start:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(c))
+        i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(regex)
+
+
+def parse_line(line: str) -> Optional[Tuple[bool, str]]:
+    """Returns (negated, regex) for the line, or None if the line is not a pattern"""
+    line = line.rstrip("\n")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        # Escaped leading "!" or "#"
+        line = line[1:]
+
+    # Only directories are matched, so the directory-only marker is implied
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    return negated, translate(line)
+
+
+class IgnoreRules(object):
+    """
+    Ordered exclusion patterns. As with gitignore, the last matching pattern decides
+    whether a path is excluded.
+    """
+
+    def __init__(self, lines: Iterable[str] = ()):
+        self.patterns: List[str] = []
+        # Consecutive patterns with the same polarity are combined into a single
+        # regex, so the common case (no negations) is one match per path.
+        self._groups: List[Tuple[bool, Pattern[str]]] = []
+
+        group: List[str] = []
+        group_negated = False
+        for line in lines:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            negated, regex = parsed
+            self.patterns.append(line.strip())
+
+            if group and negated != group_negated:
+                self._add_group(group_negated, group)
+                group = []
+            group_negated = negated
+            group.append(regex)
+
+        if group:
+            self._add_group(group_negated, group)
+
+    def _add_group(self, negated: bool, regexes: List[str]) -> None:
+        combined = "|".join(f"(?:{regex})" for regex in regexes)
+        self._groups.append((negated, re.compile(f"(?:{combined})$")))
+
+    def __bool__(self) -> bool:
+        return bool(self._groups)
+
+    def is_ignored(self, relpath: str) -> bool:
+        """Whether the directory, a "/" separated path relative to the root, is
+        excluded"""
+        for negated, regex in reversed(self._groups):
+            if regex.match(relpath):
+                return not negated
+        return False
@@ -39,6 +39,17 @@ class Info(object):
     def fact_packages(self) -> List[str]:
         return [str(pkg.label_path) for pkg in self.workspace.packages()]
 
+    def fact_scanned_dirs(self) -> Optional[str]:
+        self.workspace.packages()
+        stats = self.workspace.scan_stats
+        return str(stats.visited) if stats else None
+
+    def fact_pruned_dirs(self) -> Optional[str]:
+        """Directories skipped by the Workspace's exclusion patterns"""
+        self.workspace.packages()
+        stats = self.workspace.scan_stats
+        return str(stats.pruned) if stats else None
+
     def fact_py_project_poetry_name(self) -> Optional[str]:
         package = self.workspace.active_package()
         if not package or not package.path_exists("pyproject.toml"):
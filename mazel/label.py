@@ -16,6 +16,7 @@ class Label(object):
         //apps/pkg:target
         //apps/pkg
         //apps             # May not be valid bazel
+        //apps/...:target  # All packages at or below apps
         pkg:target
         :target
         target
@@ -24,6 +25,9 @@ class Label(object):
     [1]: https://docs.bazel.build/versions/2.0.0/build-ref.html#labels
     """
 
+    # Suffix of a package_path matching all packages below the path
+    RECURSIVE = "..."
+
     def __init__(self, package_path: Optional[str], target_name: Optional[str]):
         # TODO Enforce package_path and target_name  validity?
         self.package_path = package_path
@@ -37,7 +41,7 @@ class Label(object):
         components = value.split(":")
         if len(components) == 1:
             item = components[0]
-            if cls.is_absolute(item):
+            if cls.is_absolute(item) or item.endswith(cls.RECURSIVE):
                 package_path, target_name = item, None
             else:
                 # Lacking a path specifier, assume the single component
@@ -53,6 +57,28 @@ class Label(object):
 
         return cls(package_path, target_name)
 
+    @property
+    def recursive(self) -> bool:
+        """Whether the package_path ends with `/...`"""
+        return self.package_path is not None and (
+            self.package_path == self.RECURSIVE
+            or self.package_path.endswith("/" + self.RECURSIVE)
+        )
+
+    @property
+    def base_path(self) -> Optional[str]:
+        """The package_path, without the recursive `/...` suffix"""
+        if self.package_path is None or not self.recursive:
+            return self.package_path
+
+        base = self.package_path[: -len(self.RECURSIVE)]
+        if base == "":
+            # Relative to the current directory
+            return "."
+        elif base == "//":
+            return base
+        return base.rstrip("/")
+
     @staticmethod
     def is_absolute(package_path: Optional[str]) -> bool:
         return package_path is not None and package_path.startswith("//")
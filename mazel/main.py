@@ -4,8 +4,11 @@ from .commands.clean import clean
 from .commands.contrib import contrib
 from .commands.echo import echo
 from .commands.format import format
+from .commands.graph import graph
 from .commands.info import info
+from .commands.query import query
 from .commands.run import run
+from .commands.server import server, shutdown
 from .commands.test import test
 
 
@@ -18,6 +21,10 @@ cli.add_command(test)
 cli.add_command(run)
 cli.add_command(info)
 cli.add_command(echo)
+cli.add_command(query)
+cli.add_command(graph)
+cli.add_command(server)
+cli.add_command(shutdown)
 # TODO cli.add_command(build)
 
 # Plugins that may not be generalizable
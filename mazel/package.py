@@ -1,12 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from functools import cached_property
 from pathlib import Path
-from typing import TYPE_CHECKING, List
-
-import tomlkit
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, cast
 
 from .base import PathableConcept
+from .depcache import Dependencies, DependencyCache, Probes, Stamps
 from .exceptions import InvalidBuildToml
 from .runtimes import Runtime
 
@@ -15,6 +15,22 @@ if TYPE_CHECKING:
     from .workspace import Workspace  # pragma: no cover
 
 
+@dataclass(frozen=True, slots=True)
+class PackageMetadata:
+    """
+    What the rest of mazel needs to know about a Package, without holding onto the
+    parsed BUILD.toml and manifests.
+    """
+
+    label_path: str
+    # The runtime_labels from BUILD.toml's package.runtimes
+    runtimes: Tuple[str, ...]
+    # BUILD.toml's package.depends_on label paths
+    depends_on: Tuple[str, ...]
+    # The explicit and the Runtimes' dependencies, deduplicated
+    dependencies: Tuple[Package, ...]
+
+
 class Package(PathableConcept):
     # We could alternatively attempt to discover the package via hints like
     # a Makefile, pyproject.toml, or package.json in the directory, but instead
@@ -27,16 +43,28 @@ class Package(PathableConcept):
         self.workspace = workspace
 
     @cached_property
-    def build_toml(self) -> tomlkit.toml_document.TOMLDocument:
+    def build_toml(self) -> Dict[str, Any]:
         return self.read_toml(self.BUILD_TOML)
 
+    def invalidate(self) -> None:
+        """Forget the parsed BUILD.toml, metadata and Runtimes, so they are re-read"""
+        self.__dict__.pop("build_toml", None)
+        self.__dict__.pop("_metadata", None)
+        self.__dict__.pop("_runtimes", None)
+        self.workspace.dependency_cache().discard(self.relpath)
+
     @property
-    def _build_toml_package(self) -> tomlkit.toml_document.TOMLDocument:
+    def _build_toml_package(self) -> Dict[str, Any]:
         try:
-            return self.build_toml["package"]
+            return cast(Dict[str, Any], self.build_toml["package"])
         except KeyError:
             raise InvalidBuildToml(f"No [package] section in {self.path}/BUILD.toml")
 
+    @cached_property
+    def relpath(self) -> str:
+        """The path relative to the Workspace, "/" separated"""
+        return self.path.relative_to(self.workspace.path).as_posix()
+
     @cached_property
     def label_path(self) -> str:
         # The Package.path is a subdir of Workspace.path, so we
@@ -50,8 +78,69 @@ class Package(PathableConcept):
         path = self.path.joinpath(relative_path).resolve()
         return self.workspace.get_package(path)
 
+    def metadata(self) -> PackageMetadata:
+        """
+        The Package's metadata, computed once (until `invalidate()`). Afterwards,
+        the parsed BUILD.toml is no longer kept around.
+        """
+        if not hasattr(self, "_metadata"):
+            dependencies = self.dependencies()
+            label_paths = dependencies.depends_on + dependencies.runtime_deps
+            self._metadata = PackageMetadata(
+                label_path=self.label_path,
+                runtimes=tuple(dependencies.runtimes),
+                depends_on=tuple(dependencies.depends_on),
+                # Deduplicate dependencies, keeping the order
+                # TODO warn on duplicates
+                dependencies=tuple(
+                    dict.fromkeys(
+                        self.workspace.resolve_label_path(label_path)
+                        for label_path in label_paths
+                    )
+                ),
+            )
+            self.__dict__.pop("build_toml", None)
+        return self._metadata
+
     def runtimes(self) -> List[Runtime]:
-        """Return list of Runtimes as defined by package.runtimes in BUILD.toml"""
+        """
+        Return list of Runtimes as defined by package.runtimes in BUILD.toml,
+        created once (until `invalidate()`)
+        """
+        if not hasattr(self, "_runtimes"):
+            self._runtimes = [
+                Runtime.resolve(label, self) for label in self.metadata().runtimes
+            ]
+        return list(self._runtimes)
+
+    def depends_on(self) -> List["Package"]:
+        """
+        Provides the explicit (BUILD.toml's package.depends_on) and
+        implicit (pyproject.toml/package.json) intra-workspace dependencies.
+        """
+        return list(self.metadata().dependencies)
+
+    def dependencies(self) -> Dependencies:
+        """
+        The label paths of the dependencies. Taken from the Workspace's
+        DependencyCache, unless BUILD.toml or a manifest changed since.
+        """
+        cache = self.workspace.dependency_cache()
+        dependencies = cache.lookup(self.relpath, self.path, self.workspace.probe)
+        if dependencies is None:
+            stamps, dependencies, probes = self.extract_dependencies()
+            cache.record(self.relpath, stamps, dependencies, probes=probes)
+        return dependencies
+
+    def manifests(self) -> List[str]:
+        """Names of the files the Package's Runtimes read for its dependencies"""
+        return [
+            name
+            for label in self.dependencies().runtimes
+            for name in Runtime.implementation(label).manifests
+        ]
+
+    def _declared_runtimes(self) -> List[Runtime]:
         labels = self._build_toml_package.get("runtimes")
 
         if labels is None:
@@ -61,24 +150,39 @@ class Package(PathableConcept):
 
         return [Runtime.resolve(label, self) for label in labels]
 
-    def depends_on(self) -> List["Package"]:
+    def extract_dependencies(self) -> Tuple[Stamps, Dependencies, Probes]:
         """
-        Provides the explicit (BUILD.toml's package.depends_on) and
-        implicit (pyproject.toml/package.json) intra-workspace dependencies.
+        Read the dependencies from BUILD.toml and the manifests, uncached. Along
+        with the stamps of the files read, each taken before reading the file, so a
+        concurrent modification invalidates the cached dependencies, and the
+        Runtimes' lookups of other Packages (see `Workspace.probe`).
         """
-        deps = []
+        stamps = DependencyCache.stamps(self.path, [self.BUILD_TOML])
 
         # Dependencies via BUILD.toml package.depends_on
-        explicit = self._build_toml_package.get("depends_on")
-        if explicit is not None:
-            for label_path in explicit:
-                deps.append(self.workspace.resolve_label_path(label_path))
+        explicit = self._build_toml_package.get("depends_on", [])
+        if not all(isinstance(label_path, str) for label_path in explicit):
+            raise InvalidBuildToml(
+                f"package.depends_on must be a list of labels in {self.path}/BUILD.toml"
+            )
 
         # Dependencies via the Runtime's computed dependencies
-        for runtime in self.runtimes():
-            for pkg in runtime.workspace_dependencies():
-                deps.append(pkg)
-
-        # Deduplicate dependencies.
-        # TODO warn on duplicates
-        return list(set(deps))
+        runtimes = self._declared_runtimes()
+        manifests = [name for runtime in runtimes for name in runtime.manifests]
+        stamps.update(DependencyCache.stamps(self.path, manifests))
+        runtime_deps = [
+            pkg.label_path
+            for runtime in runtimes
+            for pkg in runtime.workspace_dependencies()
+        ]
+        probes: Probes = {}
+        for runtime in runtimes:
+            stamps.update(runtime.consulted)
+            probes.update(runtime.probes)
+
+        dependencies = Dependencies(
+            runtimes=[runtime.runtime_label for runtime in runtimes],
+            depends_on=list(explicit),
+            runtime_deps=runtime_deps,
+        )
+        return stamps, dependencies, probes
@@ -0,0 +1,244 @@
+"""
+Queries of the dependency graph, in the spirit of bazel query [1]::
+
+    deps(//services/api)                   # itself and its (transitive) dependencies
+    deps(//services/api, 1)                # ... only its direct dependencies
+    rdeps(//..., //libs/py/common)         # the packages depending upon it
+    rdeps(//services/..., //libs/py/common, 2)
+    somepath(//services/api, //libs/py/common)
+    allpaths(//services/api, //libs/py/common)
+    //libs/... - //libs/legacy/...
+    set(//libs/a //libs/b)
+
+Expressions evaluate to a set of Packages. The words are package labels (e.g.
+``//libs/py/common``, ``//libs/...``, ``./common``), resolved like the label
+commands' labels, and combined by the operators, evaluated left to right:
+union (``+`` or ``union``), intersection (``^`` or ``intersect``) and difference
+(``-`` or ``except``). Use parentheses to group.
+
+The sets are bitsets of the `CompactGraph`, so the operators are bitwise
+operations, and ``deps``/``rdeps`` are unions of the precomputed closures.
+
+[1]: https://bazel.build/query/language
+"""
+import re
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, NoReturn, Optional, Tuple, cast
+
+from .exceptions import InvalidQuery
+from .graph import CompactGraph, bit_indices, bits_of
+from .label import Label
+from .package import Package
+from .workspace import Workspace
+
+# A quoted word, punctuation (including a "-" that does not start a word, e.g.
+# `//a -//b`, while `//my-lib` is one word), or an unquoted word
+_TOKEN = re.compile(r"\s*(?:\"([^\"]*)\"|'([^']*)'|([(),+^]|-(?!\w))|([^\s(),+^\"']+))")
+
+OPERATORS: Dict[str, Callable[[int, int], int]] = {
+    "+": int.__or__,
+    "union": int.__or__,
+    "^": int.__and__,
+    "intersect": int.__and__,
+    "-": lambda left, right: left & ~right,
+    "except": lambda left, right: left & ~right,
+}
+
+# Each function's arguments: an expression, or an optional depth (a last argument)
+FUNCTIONS: Dict[str, Tuple[str, ...]] = {
+    "deps": ("expression", "depth"),
+    "rdeps": ("expression", "expression", "depth"),
+    "somepath": ("expression", "expression"),
+    "allpaths": ("expression", "expression"),
+}
+
+Token = Tuple[str, str]  # (kind, value): "word", "quoted" or "punctuation"
+
+
+def tokenize(expression: str) -> List[Token]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise InvalidQuery(
+                f"Unexpected {expression[position:]!r} in query {expression!r}"
+            )
+        double, single, punctuation, word = match.groups()
+        if punctuation is not None:
+            tokens.append(("punctuation", punctuation))
+        elif word is not None:
+            tokens.append(("word", word))
+        else:
+            tokens.append(("quoted", double if double is not None else single))
+        position = match.end()
+    return tokens
+
+
+class Query(object):
+    """Evaluates query expressions over the Workspace's dependency graph"""
+
+    def __init__(self, workspace: Workspace, cwd: Optional[Path] = None):
+        self.workspace = workspace
+        self.cwd = cwd
+        self.graph: CompactGraph = workspace.graph().compact()
+
+    def evaluate(self, expression: str) -> List[Package]:
+        """The packages of the expression, in the graph's order"""
+        return self.graph.packages_of(self.evaluate_bits(expression))
+
+    def evaluate_bits(self, expression: str) -> int:
+        self._expression = expression
+        self._tokens = tokenize(expression)
+        self._position = 0
+        bits = self._union()
+        if self._position < len(self._tokens):
+            self._fail(f"unexpected {self._tokens[self._position][1]!r}")
+        return bits
+
+    def edges(self, packages: List[Package]) -> List[Tuple[Package, Package]]:
+        """The (package, dependency) edges between the packages"""
+        bits = self.graph.bits(packages)
+        members = set(bit_indices(bits))
+        return [
+            (self.graph.packages[i], self.graph.packages[j])
+            for i in sorted(members)
+            for j in self.graph.parents(i)
+            if j in members
+        ]
+
+    # Recursive descent parsing, evaluating as it goes
+
+    def _union(self) -> int:
+        bits = self._primary()
+        while self._peek() in OPERATORS:
+            operator = OPERATORS[self._take()[1]]
+            bits = operator(bits, self._primary())
+        return bits
+
+    def _primary(self) -> int:
+        kind, value = self._take()
+        if (kind, value) == ("punctuation", "("):
+            bits = self._union()
+            self._expect(")")
+            return bits
+        elif kind == "punctuation":
+            self._fail(f"unexpected {value!r}")
+        elif kind == "word" and self._peek() == "(":
+            return self._function(value)
+        return self._label(value)
+
+    def _function(self, name: str) -> int:
+        self._expect("(")
+        if name == "set":
+            return self._set()
+        elif name not in FUNCTIONS:
+            self._fail(
+                f"unknown function {name}, expected one of {[*FUNCTIONS, 'set']}"
+            )
+
+        arguments: List[int] = []
+        for i, argument in enumerate(FUNCTIONS[name]):
+            if argument == "depth" and self._peek() == ")":
+                # Optional
+                break
+            elif i > 0:
+                self._expect(",")
+            arguments.append(self._depth() if argument == "depth" else self._union())
+        self._expect(")")
+        return cast(int, getattr(self, f"_{name}")(*arguments))
+
+    def _set(self) -> int:
+        bits = 0
+        while self._peek() != ")":
+            bits |= self._label(self._take()[1])
+        self._expect(")")
+        return bits
+
+    def _depth(self) -> int:
+        value = self._take()[1]
+        if not value.isdigit():
+            self._fail(f"expected a depth, not {value!r}")
+        return int(value)
+
+    def _label(self, word: str) -> int:
+        if ":" in word:
+            self._fail(f"expected a package label, not the target {word!r}")
+        resolved = self.workspace.resolve_label(Label(word, None), cwd=self.cwd)
+        return self.graph.bits(resolved.packages)
+
+    def _peek(self) -> Optional[str]:
+        if self._position < len(self._tokens):
+            kind, value = self._tokens[self._position]
+            # Quoted words are never operators
+            return value if kind != "quoted" else None
+        return None
+
+    def _take(self) -> Token:
+        if self._position >= len(self._tokens):
+            self._fail("unexpected end")
+        token = self._tokens[self._position]
+        self._position += 1
+        return token
+
+    def _expect(self, value: str) -> None:
+        kind, actual = self._take()
+        if (kind, actual) != ("punctuation", value):
+            self._fail(f"expected {value!r}, not {actual!r}")
+
+    def _fail(self, message: str) -> NoReturn:
+        raise InvalidQuery(f"Invalid query {self._expression!r}: {message}")
+
+    # The functions
+
+    def _deps(self, bits: int, depth: Optional[int] = None) -> int:
+        if depth is None:
+            return self.graph.with_ancestors(bits)
+        return self._within(bits, depth, self.graph.parents)
+
+    def _rdeps(self, universe: int, bits: int, depth: Optional[int] = None) -> int:
+        if depth is None:
+            return universe & self.graph.with_descendants(bits)
+        return universe & self._within(bits, depth, self.graph.children)
+
+    def _somepath(self, sources: int, targets: int) -> int:
+        """A shortest path of dependencies, from one of the sources to a target"""
+        wanted = set(bit_indices(targets))
+        previous: Dict[int, Optional[int]] = dict.fromkeys(bit_indices(sources))
+        queue = list(previous)
+        for i in queue:
+            if i in wanted:
+                path: List[int] = []
+                current: Optional[int] = i
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return bits_of(path)
+            for j in self.graph.parents(i):
+                if j not in previous:
+                    previous[j] = i
+                    queue.append(j)
+        return 0
+
+    def _allpaths(self, sources: int, targets: int) -> int:
+        """The packages on any path of dependencies from the sources to the targets"""
+        descendants = self.graph.with_descendants(targets)
+        return self.graph.with_ancestors(sources) & descendants
+
+    def _within(
+        self, bits: int, depth: int, neighbours: Callable[[int], "array[int]"]
+    ) -> int:
+        """The packages within `depth` edges, breadth first"""
+        seen = set(bit_indices(bits))
+        frontier = list(seen)
+        for _ in range(depth):
+            following = []
+            for i in frontier:
+                for j in neighbours(i):
+                    if j not in seen:
+                        seen.add(j)
+                        following.append(j)
+            frontier = following
+        return bits_of(seen)
@@ -1,15 +1,37 @@
-from .base import Runtime
-from .docker import DockerRuntime
-from .go import GoRuntime
-from .javascript import JavascriptRuntime
-from .meteor import MeteorRuntime
-from .python import PythonRuntime
+"""
+The Runtime implementations are imported lazily (see `Runtime.implementation`), so
+only the Runtimes a Workspace uses are ever imported.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+from .base import BUILTIN_RUNTIMES, Runtime
+
+if TYPE_CHECKING:
+    from .cargo import CargoRuntime  # noqa: F401  # pragma: no cover
+    from .docker import DockerRuntime  # noqa: F401  # pragma: no cover
+    from .go import GoRuntime  # noqa: F401  # pragma: no cover
+    from .javascript import JavascriptRuntime  # noqa: F401  # pragma: no cover
+    from .meteor import MeteorRuntime  # noqa: F401  # pragma: no cover
+    from .python import PythonRuntime  # noqa: F401  # pragma: no cover
 
 __all__ = [
     "Runtime",
+    "CargoRuntime",
     "DockerRuntime",
     "GoRuntime",
     "JavascriptRuntime",
     "MeteorRuntime",
     "PythonRuntime",
 ]
+
+_EXPORTS = {target.partition(":")[2]: target for target in BUILTIN_RUNTIMES.values()}
+
+
+def __getattr__(name: str) -> Any:
+    # PEP 562, for `from mazel.runtimes import PythonRuntime`
+    target = _EXPORTS.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, _, attr = target.partition(":")
+    return getattr(import_module(module_name), attr)
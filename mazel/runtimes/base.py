@@ -1,32 +1,166 @@
 import abc
+import functools
+import importlib
+import os
 from collections import Counter
-from typing import TYPE_CHECKING, Iterable, List, Type
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Type
 
-from mazel.exceptions import DuplicateDependency, RuntimeNotFound
+from mazel.depcache import Probes, Stamps, stamp
+from mazel.exceptions import DuplicateDependency, PackageNotFound, RuntimeNotFound
 
 if TYPE_CHECKING:
     # Avoid circular import for type declarations
     from mazel.package import Package  # pragma: no cover
 
+# Runtimes outside of mazel register themselves under this entry point group, e.g.
+# in their pyproject.toml:
+#
+#   [project.entry-points."mazel.runtimes"]
+#   rust = "mycompany.mazel_rust:RustRuntime"
+ENTRY_POINT_GROUP = "mazel.runtimes"
+
+# "module:attribute" of mazel's own Runtimes, by runtime_label. Only imported once a
+# Package uses them. These take precedence over any plugin with the same label.
+BUILTIN_RUNTIMES = {
+    "cargo": "mazel.runtimes.cargo:CargoRuntime",
+    "docker": "mazel.runtimes.docker:DockerRuntime",
+    "go": "mazel.runtimes.go:GoRuntime",
+    "javascript": "mazel.runtimes.javascript:JavascriptRuntime",
+    "meteor": "mazel.runtimes.meteor:MeteorRuntime",
+    "python": "mazel.runtimes.python:PythonRuntime",
+}
+
+# The imported implementations, by runtime_label
+_loaded: Dict[str, Type["Runtime"]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def plugin_runtimes() -> Dict[str, str]:
+    """The Runtimes registered via entry points, by runtime_label"""
+    from importlib.metadata import entry_points
+
+    return {ep.name: ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def load_runtime(runtime_label: str, target: str) -> Type["Runtime"]:
+    module_name, _, attr = target.partition(":")
+    try:
+        obj: Any = importlib.import_module(module_name)
+        for name in attr.split(".") if attr else []:
+            obj = getattr(obj, name)
+    except (ImportError, AttributeError) as e:
+        raise RuntimeNotFound(
+            f"Unable to load the Runtime for label={runtime_label} from {target}: {e}"
+        )
+
+    if not (isinstance(obj, type) and issubclass(obj, Runtime)):
+        raise RuntimeNotFound(f"{target} (label={runtime_label}) is not a Runtime")
+    return obj
+
 
 class Runtime(metaclass=abc.ABCMeta):
+    # Names of the files (or directories) in the Package that workspace_dependencies
+    # reads, so cached dependencies are invalidated when they change
+    manifests: Tuple[str, ...] = ()
+
     def __init__(self, package: "Package"):
         self.package = package
+        # Stamps of any other files read by workspace_dependencies, keyed by their
+        # path relative to the Package, each taken before reading the file
+        self.consulted: Stamps = {}
+        # Results of the lookups of other Packages made by workspace_dependencies,
+        # see `Workspace.probe`
+        self.probes: Probes = {}
+
+    def consult(self, path: Path) -> Optional[List[int]]:
+        """
+        Record the file (e.g. outside of the Package) as read by
+        workspace_dependencies, returning its stamp (None if missing). Call before
+        reading the file.
+        """
+        file_stamp = stamp(path)
+        self.consulted[os.path.relpath(path, self.package.path)] = file_stamp
+        return file_stamp
+
+    def consult_under(self, directory: Path, name: str) -> None:
+        """
+        Record the file in every Package at or below `directory` as read by
+        workspace_dependencies (e.g. to index the Packages by name). Call before
+        reading the files.
+        """
+        self._probe("stamps", directory / name)
+
+    # The lookups of other Packages, for use in workspace_dependencies, so the
+    # cached dependencies are re-extracted when they would find other Packages (e.g.
+    # a Package added below the path)
+
+    def owning_package(self, path: Path) -> Optional["Package"]:
+        """The Package containing the `path`, if any"""
+        return self._probe_package("owner", path)
+
+    def package_at(self, path: Path) -> Optional["Package"]:
+        """The Package at exactly `path`, if any"""
+        return self._probe_package("at", path)
+
+    def packages_under(self, path: Path) -> List["Package"]:
+        """The Packages at or below `path`"""
+        workspace = self.package.workspace
+        return [
+            workspace.get_package(workspace.path.joinpath(relpath))
+            for relpath in self._probe("under", path) or []
+        ]
+
+    def relative_package(self, relative_path: Path) -> "Package":
+        """The Package at the path relative to this Package"""
+        path = self.package.path.joinpath(relative_path).resolve()
+        package = self.package_at(path)
+        if package is None:
+            raise PackageNotFound(f"No package found for {path}")
+        return package
+
+    def _probe_package(self, kind: str, path: Path) -> Optional["Package"]:
+        relpath = self._probe(kind, path)
+        if relpath is None:
+            return None
+        workspace = self.package.workspace
+        return workspace.get_package(workspace.path.joinpath(relpath))
+
+    def _probe(self, kind: str, path: Path) -> Any:
+        workspace = self.package.workspace
+        relpath = os.path.relpath(path, workspace.path)
+        if relpath == ".." or relpath.startswith(".." + os.sep):
+            # Outside of the Workspace, never a Package
+            return None
+        key = f"{kind}:{Path(relpath).as_posix()}"
+        result = self.probes[key] = workspace.probe(key)
+        return result
+
+    @classmethod
+    def implementation(cls, runtime_label: str) -> Type["Runtime"]:
+        """Lookup the Runtime implementation by the runtime_label, importing it"""
+        runtime_cls = _loaded.get(runtime_label)
+        if runtime_cls is None:
+            target = BUILTIN_RUNTIMES.get(runtime_label)
+            if target is None:
+                # Only look for plugins when needed, since it scans every
+                # installed distribution's metadata
+                target = plugin_runtimes().get(runtime_label)
+            if target is None:
+                raise RuntimeNotFound(f"No Runtime defined for label={runtime_label}")
+            runtime_cls = _loaded[runtime_label] = load_runtime(runtime_label, target)
+        return runtime_cls
 
     @classmethod
     def implementations(cls) -> List[Type["Runtime"]]:
-        # Use __subclasses__ as a cheap registry (requires the implementation to
-        # be imported in mazel.runtimes.__init__)
-        return cls.__subclasses__()
+        """All the known Runtime implementations, importing every one of them"""
+        labels = dict.fromkeys([*BUILTIN_RUNTIMES, *plugin_runtimes()])
+        return [cls.implementation(label) for label in labels]
 
     @classmethod
     def resolve(cls, runtime_label: str, package: "Package") -> "Runtime":
-        """Lookup the Runtime implementation by the runtime_label"""
-        for runtime_cls in cls.implementations():
-            if runtime_cls.runtime_label == runtime_label:
-                return runtime_cls(package)
-
-        raise RuntimeNotFound(f"No Runtime defined for label={runtime_label}")
+        """The Runtime for the Package, by the runtime_label"""
+        return cls.implementation(runtime_label)(package)
 
     @abc.abstractmethod
     def workspace_dependencies(self) -> Iterable["Package"]:
@@ -0,0 +1,139 @@
+"""
+Rust crates [1]. A crate's workspace dependencies are its path dependencies, in
+[dependencies], [dev-dependencies] and [build-dependencies], including the
+target-specific tables (e.g. [target.'cfg(unix)'.dependencies]). Dependencies
+inherited from the Cargo workspace (``{ workspace = true }``) use the root
+Cargo.toml's [workspace.dependencies]. A Cargo workspace's root also depends on its
+[workspace] members.
+
+[1]: https://doc.rust-lang.org/cargo/reference/specifying-dependencies.html
+"""
+import re
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from mazel.exceptions import PackageNotFound
+
+from .base import Runtime
+
+if TYPE_CHECKING:
+    # Avoid circular import for type declarations
+    from mazel.package import Package  # noqa  # pragma: no cover
+
+CARGO_TOML = "Cargo.toml"
+DEPENDENCY_TABLES = ("dependencies", "dev-dependencies", "build-dependencies")
+
+_GLOB = re.compile(r"[*?\[]")
+
+
+class CargoRuntime(Runtime):
+    runtime_label = "cargo"
+    manifests = (CARGO_TOML,)
+
+    @cached_property
+    def cargo_toml(self) -> Dict[str, Any]:
+        return self.package.read_toml(CARGO_TOML)
+
+    def dependency_tables(self) -> List[Dict[str, Any]]:
+        """The dependency tables, then the target-specific ones"""
+        manifests = [self.cargo_toml, *self.cargo_toml.get("target", {}).values()]
+        return [
+            manifest.get(table, {})
+            for manifest in manifests
+            for table in DEPENDENCY_TABLES
+        ]
+
+    def workspace_dependencies(self) -> Iterable["Package"]:
+        paths: List[Path] = []
+        for table in self.dependency_tables():
+            for name, dependency in table.items():
+                if not isinstance(dependency, dict):
+                    # A version requirement
+                    continue
+                elif "path" in dependency:
+                    paths.append(self.package.path.joinpath(dependency["path"]))
+                elif dependency.get("workspace") is True:
+                    paths.extend(self._inherited_path(name))
+        paths.extend(self._member_paths())
+
+        packages = dict.fromkeys(self._path_package(path) for path in paths)
+        return [package for package in packages if package != self.package]
+
+    def _inherited_path(self, name: str) -> List[Path]:
+        root = self._workspace_root()
+        if root is None:
+            return []
+        directory, workspace = root
+        dependency = workspace.get("dependencies", {}).get(name)
+        if isinstance(dependency, dict) and "path" in dependency:
+            return [directory.joinpath(dependency["path"])]
+        return []
+
+    def _workspace_root(self) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        The Cargo workspace's directory and [workspace] table: package.workspace,
+        or else the nearest Cargo.toml upwards with a [workspace], like cargo.
+        """
+        if not hasattr(self, "_root"):
+            self._root = self._find_workspace_root()
+        return self._root
+
+    def _find_workspace_root(self) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        if "workspace" in self.cargo_toml:
+            return self.package.path, self.cargo_toml["workspace"]
+
+        explicit = self.cargo_toml.get("package", {}).get("workspace")
+        if explicit is not None:
+            # Resolved, so `..` cannot step outside of the Workspace unnoticed
+            directories = [self.package.path.joinpath(explicit).resolve()]
+        else:
+            directories = list(self.package.path.parents)
+
+        workspace_path = self.package.workspace.path
+        for directory in directories:
+            if not directory.is_relative_to(workspace_path):
+                break
+            elif self.consult(directory / CARGO_TOML) is not None:
+                cargo_toml = self.package.read_toml(directory / CARGO_TOML)
+                if "workspace" in cargo_toml:
+                    return directory, cargo_toml["workspace"]
+        return None
+
+    def _member_paths(self) -> List[Path]:
+        """The directories of this Cargo workspace's members, when it is the root"""
+        workspace = self.cargo_toml.get("workspace", {})
+        excluded = {
+            self.package.path.joinpath(path) for path in workspace.get("exclude", [])
+        }
+        paths: List[Path] = []
+        for pattern in workspace.get("members", []):
+            if _GLOB.search(pattern):
+                # A new member changes the directory's mtime
+                self.consult(self.package.path.joinpath(_glob_base(pattern)))
+                matches = sorted(self.package.path.glob(pattern))
+            else:
+                matches = [self.package.path.joinpath(pattern)]
+            # Recorded even if missing, so the crate being created later is noticed
+            paths.extend(
+                path
+                for path in matches
+                if path not in excluded
+                and self.consult(path.joinpath(CARGO_TOML)) is not None
+            )
+        return paths
+
+    def _path_package(self, path: Path) -> "Package":
+        """The Package containing the crate"""
+        path = path.resolve()
+        package = self.owning_package(path)
+        if package is None:
+            raise PackageNotFound(
+                f"No package found for {path}, from {self.package.path}/{CARGO_TOML}"
+            )
+        return package
+
+
+def _glob_base(pattern: str) -> str:
+    """The directory before the first glob pattern, e.g. crates/* -> crates"""
+    return _GLOB.split(pattern, 1)[0].rpartition("/")[0] or "."
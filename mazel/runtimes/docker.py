@@ -1,4 +1,19 @@
-from typing import TYPE_CHECKING, Iterable
+"""
+Docker images [1]. An image's workspace dependencies are:
+
+- The base images (``FROM``) built by other Packages, via the image name to label
+  mapping in BUILD.toml's ``[docker] images``.
+- The Packages the ``COPY`` and ``ADD`` sources are in, relative to the build
+  context (BUILD.toml's ``[docker] context``, by default the Package).
+
+[1]: https://docs.docker.com/reference/dockerfile/
+"""
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, cast
+
+from mazel.exceptions import InvalidBuildToml
 
 from .base import Runtime
 
@@ -6,11 +21,145 @@ if TYPE_CHECKING:
     # Avoid circular import for type declarations
     from mazel.package import Package  # noqa  # pragma: no cover
 
+DOCKERFILE = "Dockerfile"
+
+# Where the glob patterns in a COPY source start
+_GLOB = re.compile(r"[*?\[]")
+
+# A here-document, e.g. <<EOF, <<-EOF or <<"EOF"
+_HEREDOC = re.compile(r"""<<(-?)(["']?)(\w+)\2""")
+HEREDOC_INSTRUCTIONS = ("RUN", "COPY", "ADD")
+
+
+def instructions(text: str) -> Iterable[Tuple[str, str]]:
+    """
+    The (upper-cased instruction, arguments) of the Dockerfile, skipping the bodies
+    of here-documents
+    """
+    line = ""
+    # The delimiters of the instruction's here-documents still to skip, and
+    # whether leading tabs are stripped (<<-)
+    heredocs: List[Tuple[str, bool]] = []
+    for raw in text.splitlines():
+        if heredocs:
+            delimiter, strip_tabs = heredocs[0]
+            if (raw.lstrip("\t") if strip_tabs else raw) == delimiter:
+                heredocs.pop(0)
+            continue
+
+        stripped = raw.strip()
+        if not line and (not stripped or stripped.startswith("#")):
+            continue
+        elif stripped.startswith("#"):
+            # Comments within a continued instruction are dropped
+            continue
+        elif stripped.endswith("\\"):
+            line += stripped[:-1] + " "
+            continue
+
+        instruction, _, args = (line + stripped).partition(" ")
+        line = ""
+        instruction = instruction.upper()
+        if instruction in HEREDOC_INSTRUCTIONS:
+            heredocs = [
+                (match.group(3), bool(match.group(1)))
+                for match in _HEREDOC.finditer(args)
+            ]
+        yield instruction, args.strip()
+
+
+def _split_args(args: str) -> Tuple[Dict[str, str], List[str]]:
+    """The --flag=value options, and the remaining arguments (shell or JSON form)"""
+    flags = {}
+    words = args.split()
+    while words and words[0].startswith("--"):
+        name, _, value = words.pop(0)[2:].partition("=")
+        flags[name] = value
+    rest = " ".join(words)
+    if rest.startswith("["):
+        try:
+            return flags, [str(word) for word in json.loads(rest)]
+        except ValueError:
+            pass
+    return flags, words
+
+
+def image_name(reference: str) -> str:
+    """The image without its tag or digest, e.g. registry:5000/base:1.0 -> .../base"""
+    name = reference.partition("@")[0]
+    repository, colon, tag = name.rpartition(":")
+    if colon and "/" not in tag:
+        return repository
+    return name
+
 
 class DockerRuntime(Runtime):
     runtime_label = "docker"
+    manifests = (DOCKERFILE,)
+
+    def _config(self) -> Dict[str, Any]:
+        config = self.package.build_toml.get("docker", {})
+        if not isinstance(config, dict) or not isinstance(
+            config.get("images", {}), dict
+        ):
+            raise InvalidBuildToml(
+                f"docker.images must be a table of image names to labels in "
+                f"{self.package.path}/BUILD.toml"
+            )
+        return cast(Dict[str, Any], config)
 
     def workspace_dependencies(self) -> Iterable["Package"]:
-        # TODO Support relative dependencies parsed from the Dockerfile, for now we
-        # require they are all specified in BUILD.toml's depends_on
-        return iter([])
+        if not self.package.path_exists(DOCKERFILE):
+            return []
+
+        config = self._config()
+        images: Dict[str, str] = config.get("images", {})
+        context = self.package.path.joinpath(config.get("context", ".")).resolve()
+
+        packages: List["Package"] = []
+        stages: Set[str] = set()
+        for instruction, args in instructions(self.package.read_path(DOCKERFILE)):
+            flags, words = _split_args(args)
+            if instruction == "FROM" and words:
+                # FROM [--platform=...] image [AS name]
+                package = self._base_image(words[0], images, stages)
+                if package is not None:
+                    packages.append(package)
+                if len(words) >= 3 and words[1].lower() == "as":
+                    stages.add(words[2].lower())
+            elif instruction in ("COPY", "ADD") and "from" not in flags:
+                # The last argument is the destination, here-documents are inline
+                for source in words[:-1]:
+                    if not source.startswith("<<"):
+                        packages.extend(self._source_packages(context, source))
+
+        # Deduplicated, keeping the order
+        return [
+            package for package in dict.fromkeys(packages) if package != self.package
+        ]
+
+    def _base_image(
+        self, reference: str, images: Dict[str, str], stages: Iterable[str]
+    ) -> Optional["Package"]:
+        if reference.lower() in stages:
+            # An earlier build stage, not an image
+            return None
+        label_path = images.get(reference, images.get(image_name(reference)))
+        if label_path is None:
+            return None
+        return self.package.workspace.resolve_label_path(label_path)
+
+    def _source_packages(self, context: Path, source: str) -> List["Package"]:
+        if "://" in source or "$" in source or source.startswith("<<"):
+            # A URL (ADD), a build argument that cannot be resolved statically, or
+            # a here-document
+            return []
+        match = _GLOB.search(source)
+        if match is not None:
+            # The directory before the glob pattern
+            source = source[: match.start()].rpartition("/")[0]
+        path = context.joinpath(source.lstrip("/")).resolve()
+
+        owner = self.owning_package(path)
+        # A directory may contain Packages too, e.g. COPY libs/ /app/libs/
+        return ([owner] if owner is not None else []) + self.packages_under(path)
@@ -1,4 +1,21 @@
-from typing import TYPE_CHECKING, Iterable
+"""
+Go modules [1]. A module's workspace dependencies are the local directories that
+its go.mod replaces modules with, e.g.::
+
+    replace example.com/common => ../common
+
+and, when the module is part of a go.work [2], the modules it requires that the
+go.work uses (or replaces with a local directory).
+
+[1]: https://go.dev/ref/mod#go-mod-file
+[2]: https://go.dev/ref/mod#go-work-file
+"""
+import functools
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .base import Runtime
 
@@ -6,10 +23,176 @@ if TYPE_CHECKING:
     # Avoid circular import for type declarations
     from mazel.package import Package  # noqa  # pragma: no cover
 
+GO_MOD = "go.mod"
+GO_WORK = "go.work"
+
+# A comment, an interpreted or raw string, or a bare token
+_TOKEN = re.compile(r'//.*|"(?:[^"\\]|\\.)*"|`[^`]*`|\S+')
+
+
+@dataclass
+class GoModFile:
+    """The directives of a go.mod (or go.work) that relate modules to each other"""
+
+    module: Optional[str] = None
+    requires: List[str] = field(default_factory=list)
+    # Module path -> the replacement, a local directory or another module path
+    replaces: Dict[str, str] = field(default_factory=dict)
+    # go.work's module directories
+    uses: List[str] = field(default_factory=list)
+
+
+def _tokens(line: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(line):
+        if token.startswith("//"):
+            break
+        elif token[0] in '"`':
+            token = token[1:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _directive(parsed: GoModFile, verb: str, args: List[str]) -> None:
+    if not args:
+        return
+    elif verb == "module":
+        parsed.module = args[0]
+    elif verb == "require":
+        parsed.requires.append(args[0])
+    elif verb == "use":
+        parsed.uses.append(args[0])
+    elif verb == "replace" and "=>" in args:
+        # module [version] => replacement [version]
+        arrow = args.index("=>")
+        if 0 < arrow < len(args) - 1:
+            parsed.replaces[args[0]] = args[arrow + 1]
+
+
+def parse_go_mod(text: str) -> GoModFile:
+    """Parse a go.mod or go.work, both sharing the same syntax"""
+    parsed = GoModFile()
+    block: Optional[str] = None
+    for line in text.splitlines():
+        tokens = _tokens(line)
+        if not tokens:
+            continue
+        elif block is not None:
+            if tokens == [")"]:
+                block = None
+            else:
+                _directive(parsed, block, tokens)
+        elif tokens[1:] == ["("]:
+            # e.g. `require (`, followed by a directive per line until `)`
+            block = tokens[0]
+        else:
+            _directive(parsed, tokens[0], tokens[1:])
+    return parsed
+
+
+def is_local_path(replacement: str) -> bool:
+    """Whether the replacement is a directory, rather than a module path"""
+    return replacement.startswith(("./", "../")) or os.path.isabs(replacement)
+
+
+# Keyed by the file's stamp, so each version of a file is only parsed once per
+# process, however many modules read it (e.g. a shared go.work)
+@functools.lru_cache(maxsize=1024)
+def _parse_file(path: str, file_stamp: Tuple[int, ...]) -> GoModFile:
+    with open(path) as f:
+        return parse_go_mod(f.read())
+
+
+# A go.mod's path and stamp (None if missing)
+GoModStamp = Tuple[str, Optional[Tuple[int, ...]]]
+
+
+@functools.lru_cache(maxsize=16)
+def _used_modules(go_mods: Tuple[GoModStamp, ...]) -> Dict[str, Path]:
+    """
+    The directories of the go.work's modules, by module path. Computed once per
+    version of the modules' go.mod files, rather than reading every module's go.mod
+    for each module in the go.work.
+    """
+    modules = {}
+    for go_mod, file_stamp in go_mods:
+        if file_stamp is not None:
+            module = _parse_file(go_mod, file_stamp).module
+            if module is not None:
+                modules[module] = Path(go_mod).parent
+    return modules
+
 
 class GoRuntime(Runtime):
     runtime_label = "go"
+    manifests = (GO_MOD,)
+
+    def _read(self, path: Path) -> Optional[GoModFile]:
+        """The parsed file (None if missing), recording it as consulted"""
+        file_stamp = self.consult(path)
+        if file_stamp is None:
+            return None
+        return _parse_file(os.fspath(path), tuple(file_stamp))
+
+    def _go_work(self) -> Optional[Tuple[Path, GoModFile]]:
+        """
+        The go.work and its directory, looking upwards from the Package to the
+        Workspace's root, like the go command does.
+        """
+        root = self.package.workspace.path
+        for directory in [self.package.path, *self.package.path.parents]:
+            parsed = self._read(directory / GO_WORK)
+            if parsed is not None:
+                return directory, parsed
+            elif directory == root:
+                break
+        return None
 
     def workspace_dependencies(self) -> Iterable["Package"]:
-        # TODO Add support
-        return iter([])
+        go_mod = self._read(self.package.path / GO_MOD)
+        if go_mod is None:
+            return []
+
+        go_work = self._go_work()
+        # go.work's replace directives take precedence over go.mod's
+        work_replaces = go_work[1].replaces if go_work is not None else {}
+        packages = [
+            self._module_package(self.package.path.joinpath(replacement).resolve())
+            for module, replacement in go_mod.replaces.items()
+            if module not in work_replaces and is_local_path(replacement)
+        ]
+        if go_work is not None:
+            packages.extend(self._work_dependencies(go_mod, *go_work))
+        return [
+            package
+            for package in packages
+            if package is not None and package != self.package
+        ]
+
+    def _work_dependencies(
+        self, go_mod: GoModFile, directory: Path, go_work: GoModFile
+    ) -> Iterator[Optional["Package"]]:
+        """The required modules that the go.work provides locally"""
+        # Changing the module path in any of them can change the dependencies
+        go_mods = []
+        for use in go_work.uses:
+            path = directory.joinpath(use).resolve() / GO_MOD
+            file_stamp = self.consult(path)
+            go_mods.append(
+                (os.fspath(path), None if file_stamp is None else tuple(file_stamp))
+            )
+        modules = _used_modules(tuple(go_mods))
+
+        for module in go_mod.requires:
+            if module in modules:
+                module_dir = modules[module]
+            elif is_local_path(go_work.replaces.get(module, "")):
+                module_dir = directory.joinpath(go_work.replaces[module]).resolve()
+            else:
+                continue
+
+            yield self._module_package(module_dir)
+
+    def _module_package(self, module_dir: Path) -> Optional["Package"]:
+        """The Package of the local module, if any: not every module is a Package"""
+        return self.package_at(module_dir)
@@ -1,41 +1,108 @@
+import fnmatch
 import json
+import logging
 from functools import cached_property
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, cast
 
 from .base import Runtime
 
 if TYPE_CHECKING:
     # Avoid circular import for type declarations
     from mazel.package import Package  # noqa  # pragma: no cover
+    from mazel.workspace import Workspace  # noqa  # pragma: no cover
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_JSON = "package.json"
+PNPM_WORKSPACE_YAML = "pnpm-workspace.yaml"
+
+# Prefix of the name indexes' keys in `Workspace.runtime_cache()`
+NAMES_CACHE_KEY = "javascript.names"
+
+
+def read_package_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path.joinpath(PACKAGE_JSON)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def package_names(workspace: "Workspace", directory: Path) -> Dict[str, "Package"]:
+    """
+    The Packages at or below `directory` by their package.json's name, read once
+    while the Workspace's Packages are loaded. The first Package (by path) wins.
+    """
+    cache = workspace.runtime_cache()
+    key = f"{NAMES_CACHE_KEY}:{directory}"
+    if key not in cache:
+        names: Dict[str, "Package"] = {}
+        for package in workspace.packages_under(directory):
+            name = (read_package_json(package.path) or {}).get("name")
+            if isinstance(name, str):
+                names.setdefault(name, package)
+        cache[key] = names
+    return cast(Dict[str, "Package"], cache[key])
+
+
+def workspaces_patterns(package_json: Dict[str, Any]) -> List[str]:
+    """npm/yarn workspaces globs, either a list or yarn's {"packages": [...]}"""
+    workspaces = package_json.get("workspaces", [])
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages", [])
+    return [pattern for pattern in workspaces if isinstance(pattern, str)]
+
+
+def matches_workspaces(patterns: List[str], relpath: str) -> bool:
+    """Whether the directory, relative to the workspaces root, is a member"""
+    matched = False
+    for pattern in patterns:
+        negated = pattern.startswith("!")
+        pattern = pattern.lstrip("!").removeprefix("./").rstrip("/")
+        if fnmatch.fnmatchcase(relpath, pattern):
+            matched = not negated
+    return matched
 
 
 class JavascriptRuntime(Runtime):
     runtime_label = "javascript"
+    manifests = (PACKAGE_JSON,)
+
+    # Dependency sections, in increasing precedence for duplicate names
+    SECTIONS = (
+        "peerDependencies",
+        "optionalDependencies",
+        "dependencies",
+        "devDependencies",
+    )
 
     @cached_property
     def package_json(self) -> Dict[str, Any]:
-        return cast(Dict[str, Any], json.loads(self.package.read_path("package.json")))
+        return cast(Dict[str, Any], json.loads(self.package.read_path(PACKAGE_JSON)))
 
     def workspace_dependencies(self) -> Iterable["Package"]:
         """
-        Supports package.json local paths
+        Supports package.json local paths (``file:`` and ``link:``), pnpm's
+        ``workspace:`` protocol, and the members of npm/yarn workspaces, the latter
+        two resolved by the package name: among the workspaces' Packages, or else
+        those below the pnpm-workspace.yaml (or the whole Workspace).
 
         https://docs.npmjs.com/files/package.json#local-paths
+        https://pnpm.io/workspaces#workspace-protocol-workspace
+        https://docs.npmjs.com/cli/using-npm/workspaces
         """
 
         # NOTE: copied from mazel.runtimes.python -- perhaps we should refactor, but
         # the dependencies/devDependencies pattern does not seem universal
-        deps = self.dependencies()
-        dev_deps = self.dev_dependencies()
-
-        combined = {}
-        combined.update(deps)
-        combined.update(dev_deps)
+        combined: Dict[str, str] = {}
+        for section_label in self.SECTIONS:
+            combined.update(self._retrieve_dependencies(section_label))
 
         for dep in combined.items():
             pkg = self._as_relative_package(dep)
-            if pkg is not None:
+            if pkg is not None and pkg != self.package:
                 yield pkg
 
     def dependencies(self) -> Dict[str, str]:
@@ -44,12 +111,104 @@ class JavascriptRuntime(Runtime):
     def dev_dependencies(self) -> Dict[str, str]:
         return self._retrieve_dependencies("devDependencies")
 
+    def peer_dependencies(self) -> Dict[str, str]:
+        return self._retrieve_dependencies("peerDependencies")
+
+    def optional_dependencies(self) -> Dict[str, str]:
+        return self._retrieve_dependencies("optionalDependencies")
+
     def _retrieve_dependencies(self, section_label: str) -> Dict[str, str]:
         return cast(Dict[str, str], self.package_json.get(section_label, {}))
 
     def _as_relative_package(self, dependency: Tuple[str, str]) -> Optional["Package"]:
         name, version = dependency
-        if version.startswith("file:"):
-            # Chop off the leading "file:"
-            return self.package.relative_package(Path(version[5:]))
+        if not isinstance(version, str):
+            return None
+        elif version.startswith(("file:", "link:")):
+            # Chop off the leading "file:" or "link:"
+            return self.relative_package(Path(version[5:]))
+        elif version.startswith("workspace:"):
+            return self._workspace_protocol(name, version[10:])
+        elif name in self._workspaces_members:
+            return self._workspaces_members[name]
+        return None
+
+    def _workspace_protocol(self, name: str, spec: str) -> Optional["Package"]:
+        # e.g. workspace:*, workspace:^1.0.0, workspace:../path or an alias,
+        # workspace:other-name@*
+        if spec.startswith((".", "/")):
+            return self.relative_package(Path(spec))
+        alias, at, _ = spec.rpartition("@")
+        target = alias if at and alias else name
+        package = self._package_names(self._names_root()).get(target)
+        if package is None:
+            # Like any other unresolved name, e.g. not a Package of the Workspace
+            logger.warning(
+                "No package named %s for %s@workspace:%s in %s/%s, skipping",
+                target,
+                name,
+                spec,
+                self.package.path,
+                PACKAGE_JSON,
+            )
+        return package
+
+    def _package_names(self, directory: Path) -> Dict[str, "Package"]:
+        # Renaming a package below, or adding one with the name, changes the
+        # dependency
+        self.consult_under(directory, PACKAGE_JSON)
+        return package_names(self.package.workspace, directory)
+
+    def _names_root(self) -> Path:
+        """
+        The directory whose Packages ``workspace:`` names refer to: the npm/yarn
+        workspaces root, or else the nearest directory upwards with a
+        pnpm-workspace.yaml, or else the whole Workspace.
+        """
+        root = self._workspaces_root()
+        if root is not None:
+            return root[0]
+
+        workspace_path = self.package.workspace.path
+        for directory in [self.package.path, *self.package.path.parents]:
+            if self.consult(directory / PNPM_WORKSPACE_YAML) is not None:
+                return directory
+            elif directory == workspace_path:
+                break
+        return workspace_path
+
+    @cached_property
+    def _workspaces_members(self) -> Dict[str, "Package"]:
+        """
+        The Packages in the same npm/yarn workspaces as this one, by name: members
+        of the nearest package.json upwards with workspaces (or this one's own).
+        """
+        root = self._workspaces_root()
+        if root is None:
+            return {}
+        directory, patterns = root
+        return {
+            name: package
+            for name, package in self._package_names(directory).items()
+            if package.path.is_relative_to(directory)
+            and matches_workspaces(
+                patterns, package.path.relative_to(directory).as_posix()
+            )
+        }
+
+    def _workspaces_root(self) -> Optional[Tuple[Path, List[str]]]:
+        workspace_path = self.package.workspace.path
+        for directory in [self.package.path, *self.package.path.parents]:
+            if directory == self.package.path:
+                package_json: Optional[Dict[str, Any]] = self.package_json
+            elif self.consult(directory / PACKAGE_JSON) is not None:
+                package_json = read_package_json(directory)
+            else:
+                package_json = None
+
+            patterns = workspaces_patterns(package_json or {})
+            if patterns:
+                return directory, patterns
+            elif directory == workspace_path:
+                break
         return None
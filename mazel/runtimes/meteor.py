@@ -17,6 +17,7 @@ class MeteorRuntime(Runtime):
     """
 
     runtime_label = "meteor"
+    manifests = ("package.json", "packages")
 
     def __init__(self, package: "Package"):
         super().__init__(package)
@@ -24,6 +25,8 @@ class MeteorRuntime(Runtime):
         # Avoid packages that use the meteor runtime from also needing to declare
         # it uses the javascript runtime
         self.javascript_runtime = JavascriptRuntime(package)
+        self.javascript_runtime.consulted = self.consulted
+        self.javascript_runtime.probes = self.probes
 
     def workspace_dependencies(self) -> Iterable["Package"]:
         deps = list(self.javascript_runtime.workspace_dependencies()) + list(
@@ -40,4 +43,4 @@ class MeteorRuntime(Runtime):
 
         for path in pkgs_dir.iterdir():
             if path.is_symlink():
-                yield self.package.relative_package(path)
+                yield self.relative_package(path)
@@ -1,8 +1,9 @@
+import re
 from functools import cached_property
-from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, cast
+from urllib.parse import unquote, urlsplit
 
-import tomlkit
+from mazel.exceptions import PackageNotFound
 
 from .base import Runtime
 
@@ -10,26 +11,41 @@ if TYPE_CHECKING:
     # Avoid circular import for type declarations
     from mazel.package import Package  # noqa  # pragma: no cover
 
+# PEP 508 direct reference, e.g. `common[extra] @ file:///path/to/common ; markers`
+_DIRECT_REFERENCE = re.compile(
+    r"^\s*[A-Za-z0-9][A-Za-z0-9._-]*\s*(?:\[[^\]]*\])?\s*@\s*([^\s;]+)"
+)
+
+
+def file_url_path(url: str) -> Optional[str]:
+    """The path of a file: URL, None for other URLs"""
+    parts = urlsplit(url)
+    if parts.scheme != "file" or parts.netloc not in ("", "localhost"):
+        return None
+    return unquote(parts.path)
+
 
 class PythonRuntime(Runtime):
+    """
+    Path dependencies from the pyproject.toml, either Poetry's [tool.poetry] or
+    PEP 621's [project] with [tool.uv.sources].
+    """
+
     runtime_label = "python"
+    manifests = ("pyproject.toml",)
 
     @cached_property
-    def pyproject_toml(self) -> tomlkit.toml_document.TOMLDocument:
+    def pyproject_toml(self) -> Dict[str, Any]:
         return self.package.read_toml("pyproject.toml")
 
     def workspace_dependencies(self) -> Iterable["Package"]:
-        deps = self.dependencies()
-        dev_deps = self.dev_dependencies()
-
-        # Update to copy into a new dict, since self.pyproject_toml caches the toml
-        combined = {}
-        combined.update(deps)
-        combined.update(dev_deps)
-
-        for dep in combined.items():
-            pkg = self._as_relative_package(dep)
-            if pkg is not None:
+        # dict, to deduplicate while keeping the order
+        paths = dict.fromkeys(
+            [*self._poetry_paths(), *self._direct_reference_paths(), *self._uv_paths()]
+        )
+        for path in paths:
+            pkg = self._path_package(path)
+            if pkg is not None and pkg != self.package:
                 yield pkg
 
     def dependencies(self) -> Dict[str, Any]:
@@ -38,6 +54,27 @@ class PythonRuntime(Runtime):
     def dev_dependencies(self) -> Dict[str, Any]:
         return self._retrieve_dependencies("dev-dependencies")
 
+    def group_dependencies(self) -> Dict[str, Any]:
+        """The dependencies of all of Poetry's (1.2+) dependency groups"""
+        combined = {}
+        for group in self._poetry_sections().get("group", {}).values():
+            combined.update(group.get("dependencies", {}))
+        return combined
+
+    def project_dependencies(self) -> List[str]:
+        """
+        PEP 508 requirements from PEP 621's [project] dependencies and
+        optional-dependencies, and PEP 735's [dependency-groups]
+        """
+        project = self.pyproject_toml.get("project", {})
+        requirements = list(project.get("dependencies", []))
+        for extra in project.get("optional-dependencies", {}).values():
+            requirements.extend(extra)
+        for group in self.pyproject_toml.get("dependency-groups", {}).values():
+            # Skipping {include-group = "..."}, its requirements are listed anyway
+            requirements.extend(req for req in group if isinstance(req, str))
+        return requirements
+
     def _poetry_sections(self) -> Dict[str, Any]:
         return cast(
             Dict[str, Any], self.pyproject_toml.get("tool", {}).get("poetry", {})
@@ -46,14 +83,47 @@ class PythonRuntime(Runtime):
     def _retrieve_dependencies(self, section_label: str) -> Dict[str, Any]:
         return self._poetry_sections().get(section_label, {})
 
-    def _as_relative_package(self, dependency: Tuple[str, Any]) -> Optional["Package"]:
-        name, version = dependency
-        if (
-            isinstance(version, dict)
-            and "path" in version
-            # Assume a relative path is another package in the workspace
-            and version["path"].startswith("..")
-        ):
-            return self.package.relative_package(Path(version["path"]))
+    def _poetry_paths(self) -> Iterable[str]:
+        # Update to copy into a new dict, since self.pyproject_toml caches the toml
+        combined = {}
+        combined.update(self.dependencies())
+        combined.update(self.dev_dependencies())
+        combined.update(self.group_dependencies())
+
+        for version in combined.values():
+            # A list for multiple constraints, e.g. per python version
+            for constraint in version if isinstance(version, list) else [version]:
+                if isinstance(constraint, dict) and "path" in constraint:
+                    yield constraint["path"]
 
-        return None
+    def _direct_reference_paths(self) -> Iterable[str]:
+        for requirement in self.project_dependencies():
+            match = _DIRECT_REFERENCE.match(requirement)
+            path = file_url_path(match.group(1)) if match is not None else None
+            if path is not None:
+                yield path
+
+    def _uv_paths(self) -> Iterable[str]:
+        sources = self.pyproject_toml.get("tool", {}).get("uv", {}).get("sources", {})
+        for source in sources.values():
+            # A list for multiple sources, e.g. per platform
+            for entry in source if isinstance(source, list) else [source]:
+                if isinstance(entry, dict) and "path" in entry:
+                    yield entry["path"]
+
+    def _path_package(self, path: str) -> Optional["Package"]:
+        """
+        The Package containing the path, relative to this Package (e.g. ../common,
+        libs/common or a wheel inside another Package). Paths outside of the
+        Workspace (e.g. /opt/wheels) are not Packages.
+        """
+        workspace = self.package.workspace
+        # Resolved, so a path via a symlink finds the Package it points into
+        resolved = self.package.path.joinpath(path).resolve()
+        if not resolved.is_relative_to(workspace.path):
+            return None
+
+        package = self.owning_package(resolved)
+        if package is None:
+            raise PackageNotFound(f"No package found for {resolved}")
+        return package
@@ -0,0 +1,346 @@
+"""
+Filesystem discovery of package directories (those containing a BUILD.toml).
+
+The scan is a Breadth-First Search, so each level of the tree (the "frontier")
+can be fanned out across a thread pool. ``os.scandir`` releases the GIL while in
+the underlying syscalls and its ``DirEntry`` caches the file type from the
+directory listing, so we avoid the extra ``stat()`` per entry that
+``Path.is_file()`` / ``Path.is_dir()`` incur.
+
+Every directory visited is recorded in a :class:`ScanIndex`, which can be
+persisted between invocations. A later scan then only re-lists the directories
+whose mtime changed.
+
+Directories matching the Workspace's exclusion patterns (see `mazel.ignore`) are
+pruned before they are visited.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import cache_path, read_cache, write_cache
+from .ignore import IgnoreRules
+
+BUILD_TOML = "BUILD.toml"
+WORKSPACE_TOML = "WORKSPACE.toml"
+
+# Below this many directories in a single BFS level, we scan serially, since the
+# thread pool's overhead outweighs any gain (and most small workspaces never need
+# to start the pool).
+PARALLEL_THRESHOLD = 64
+
+# Each BFS level is split into this many chunks per worker thread. Submitting one
+# task per directory costs more in futures bookkeeping than the scandir itself.
+CHUNKS_PER_WORKER = 4
+
+# Directory mtimes this close to the time of the previous scan are not trusted: the
+# filesystem's timestamp granularity means a modification made just after we listed
+# the directory can leave its mtime unchanged (the "racy git" problem).
+RACY_WINDOW_NS = 2_000_000_000
+
+# (mtime_ns, is_package, subdirectory names) of a directory
+DirRecord = Tuple[int, bool, List[str]]
+
+
+def scan_dir(path: str, nested: bool = True) -> Tuple[bool, List[str]]:
+    """
+    List a single directory, returning whether it contains a BUILD.toml and the
+    names of the subdirectories to descend into.
+
+    A `nested` directory with a WORKSPACE.toml is the root of another Workspace, so
+    neither it nor anything below it belongs to this Workspace.
+    """
+    is_package = False
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name == BUILD_TOML and entry.is_file():
+                is_package = True
+            elif entry.name == WORKSPACE_TOML and nested and entry.is_file():
+                return False, []
+            elif (
+                # Ignore hidden directories (i.e. .git .venv)
+                not entry.name.startswith(".")
+                # Symlinked directories would be discovered twice (or endlessly)
+                and entry.is_dir(follow_symlinks=False)
+            ):
+                subdirs.append(entry.name)
+    return is_package, subdirs
+
+
+def sort_key(relpath: str) -> List[str]:
+    """Sort "/" separated paths by their components, like sorting the Paths"""
+    return [] if relpath == "." else relpath.split("/")
+
+
+def chunk(paths: List[str], count: int) -> List[List[str]]:
+    """Split `paths` into at most `count` contiguous, similarly sized chunks"""
+    size = -(-len(paths) // count)  # ceiling division
+    bounds = range(0, len(paths) + size, size)
+    return [paths[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+
+class ScanIndex(object):
+    """
+    Every directory visited by a scan, keyed by the path relative to the scan's
+    root, along with the directory's mtime and what it contained.
+
+    Adding or removing an entry (e.g. a BUILD.toml or a subdirectory) updates the
+    mtime of the containing directory, so a directory whose mtime is unchanged does
+    not need to be listed again.
+    """
+
+    CACHE_NAME = "packages"
+    VERSION = 2
+
+    def __init__(
+        self, dirs: Optional[Dict[str, DirRecord]] = None, scanned_ns: int = 0
+    ):
+        self.dirs: Dict[str, DirRecord] = dirs or {}
+        self.scanned_ns = scanned_ns
+
+    @classmethod
+    def load(cls, workspace_path: Path) -> ScanIndex:
+        data = read_cache(cache_path(workspace_path, cls.CACHE_NAME), cls.VERSION)
+        if data is None:
+            return cls()
+        return cls(dirs=data["dirs"], scanned_ns=data["scanned_ns"])
+
+    def save(self, workspace_path: Path) -> None:
+        write_cache(
+            cache_path(workspace_path, self.CACHE_NAME),
+            self.VERSION,
+            {"dirs": self.dirs, "scanned_ns": self.scanned_ns},
+        )
+
+    def subtree(self, start: str) -> Dict[str, DirRecord]:
+        """The records of `start` and every directory below it"""
+        if start == ".":
+            return self.dirs
+        prefix = start + "/"
+        return {
+            relpath: record
+            for relpath, record in self.dirs.items()
+            if relpath == start or relpath.startswith(prefix)
+        }
+
+    def lookup(self, relpath: str, mtime_ns: int) -> Optional[DirRecord]:
+        """The previous record of the directory, if it is still valid"""
+        record = self.dirs.get(relpath)
+        if (
+            record is not None
+            and record[0] == mtime_ns
+            and mtime_ns < self.scanned_ns - RACY_WINDOW_NS
+        ):
+            return record
+        return None
+
+
+@dataclass
+class ScanStats:
+    """
+    Counters from a scan, for diagnostics. For discovery via the git index,
+    `visited` counts the BUILD.toml files listed by git instead.
+    """
+
+    visited: int = 0  # Directories visited, including packages
+    listed: int = 0  # Directories that had to be listed (not reused from the index)
+    pruned: int = 0  # Directories skipped by the exclusion patterns
+
+
+class PackageScanner(object):
+    """
+    Find all directories with a BUILD.toml, including packages nested inside other
+    packages. Nested Workspaces (directories with a WORKSPACE.toml) are not
+    descended into.
+
+    Pass the `index` of a previous scan to skip listing unchanged directories. After
+    `scan()`, `index` holds the record of this scan and `changed` whether it differs
+    from the previous one (i.e. needs to be saved). When only a subtree is scanned,
+    the records outside of the subtree are carried over from the previous index.
+
+    Subdirectories matching the `ignore` rules are not descended into. The index
+    records the unfiltered directory listing, so remains valid if the rules change.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index: Optional[ScanIndex] = None,
+        ignore: Optional[IgnoreRules] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.root = root
+        self.ignore = ignore
+        self.stats = ScanStats()
+        self._prefix = os.path.join(root, "")  # with trailing separator
+        self.previous = index if index is not None else ScanIndex()
+        self.index = ScanIndex()
+        self.changed = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if max_workers is None:
+            # Same default as ThreadPoolExecutor, the work is I/O bound
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.max_workers = max_workers
+
+    def visit(self, relpath: str) -> Optional[DirRecord]:
+        # Plain string concatenation, os.path.join is noticeable at this volume
+        path = self._prefix + relpath
+        try:
+            # stat before listing, so a concurrent modification leaves us with an
+            # outdated mtime, which gets listed again next time.
+            mtime_ns = os.stat(path).st_mtime_ns
+            record = self.previous.lookup(relpath, mtime_ns)
+            if record is None:
+                is_package, subdirs = scan_dir(path, nested=relpath != ".")
+                record = (mtime_ns, is_package, subdirs)
+        except FileNotFoundError:
+            # Removed since its parent was listed
+            return None
+        return record
+
+    def visit_all(self, relpaths: List[str]) -> List[Optional[DirRecord]]:
+        return [self.visit(relpath) for relpath in relpaths]
+
+    def visit_level(self, frontier: List[str]) -> Iterable[Optional[DirRecord]]:
+        if len(frontier) < PARALLEL_THRESHOLD:
+            return map(self.visit, frontier)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        chunks = chunk(frontier, self.max_workers * CHUNKS_PER_WORKER)
+        # Executor.map yields in the order of the input, not of completion
+        return chain.from_iterable(self._executor.map(self.visit_all, chunks))
+
+    def subpaths(self, relpath: str, subdirs: List[str]) -> List[str]:
+        """The paths of the subdirectories to descend into"""
+        if relpath == ".":
+            paths = list(subdirs)
+        else:
+            paths = [f"{relpath}/{name}" for name in subdirs]
+
+        if self.ignore:
+            kept = [path for path in paths if not self.ignore.is_ignored(path)]
+            self.stats.pruned += len(paths) - len(kept)
+            paths = kept
+        return paths
+
+    def scan(self, start: str = ".") -> List[Path]:
+        """
+        Returns the package directories at or below `start` (a "/" separated path
+        relative to the root), sorted by path.
+        """
+        visited = ScanIndex(scanned_ns=time.time_ns())
+        self.stats = ScanStats()
+        self.changed = False
+        found: List[str] = []
+        frontier = [start]
+
+        try:
+            while frontier:
+                next_frontier: List[str] = []
+                for relpath, record in zip(frontier, self.visit_level(frontier)):
+                    if record is None:
+                        continue
+
+                    visited.dirs[relpath] = record
+                    self.stats.visited += 1
+                    if record is not self.previous.dirs.get(relpath):
+                        self.changed = True
+                        self.stats.listed += 1
+
+                    _, is_package, subdirs = record
+                    if is_package:
+                        found.append(relpath)
+                    next_frontier.extend(self.subpaths(relpath, subdirs))
+                frontier = next_frontier
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        self.index = self.merge(start, visited)
+
+        found.sort(key=sort_key)
+        return [self.root.joinpath(relpath) for relpath in found]
+
+    def merge(self, start: str, visited: ScanIndex) -> ScanIndex:
+        """Combine the directories `visited` below `start` with the previous index"""
+        previous = self.previous.subtree(start)
+        if len(visited.dirs) != len(previous):
+            # Directories were removed
+            self.changed = True
+
+        if start == "." or not self.previous.dirs:
+            return visited
+
+        dirs = {
+            relpath: record
+            for relpath, record in self.previous.dirs.items()
+            if relpath not in previous
+        }
+        dirs.update(visited.dirs)
+        # Keep the earlier scan time, the carried over records must not become
+        # trusted sooner than they would have been.
+        return ScanIndex(dirs, scanned_ns=self.previous.scanned_ns)
+
+
+def package_dirs_from_files(
+    build_files: Iterable[str],
+    ignore: Optional[IgnoreRules] = None,
+    workspace_files: Iterable[str] = (),
+) -> Tuple[List[str], int]:
+    """
+    Given the "/" separated paths of BUILD.toml files relative to the root (e.g.
+    from the git index rather than a filesystem scan), apply the same rules as
+    `PackageScanner`: skip hidden and excluded directories, and anything inside a
+    nested Workspace (per the paths of the `workspace_files`, i.e. WORKSPACE.toml).
+
+    Returns the sorted package directories and the number of pruned directories.
+    """
+    dirs = {os.path.dirname(build_file) or "." for build_file in build_files}
+    workspaces = {os.path.dirname(path) for path in workspace_files} - {""}
+
+    found: List[str] = []
+    pruned = set()
+    ignored: Dict[str, bool] = {}  # memoized, since packages share parent dirs
+
+    def is_ignored(prefix: str) -> bool:
+        if prefix not in ignored:
+            ignored[prefix] = ignore is not None and ignore.is_ignored(prefix)
+        return ignored[prefix]
+
+    for relpath in sorted(dirs, key=sort_key):
+        if relpath == ".":
+            found.append(relpath)
+            continue
+
+        parts = relpath.split("/")
+        prefixes = ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+        if any(part.startswith(".") for part in parts):
+            continue
+        elif any(prefix in workspaces for prefix in prefixes):
+            continue
+
+        excluded = next((prefix for prefix in prefixes if is_ignored(prefix)), None)
+        if excluded is not None:
+            pruned.add(excluded)
+        else:
+            found.append(relpath)
+
+    return found, len(pruned)
+
+
+def scan_packages(
+    root: Path, ignore: Optional[IgnoreRules] = None, max_workers: Optional[int] = None
+) -> List[Path]:
+    """Find all package directories under `root`, without a persisted index"""
+    return PackageScanner(root, ignore=ignore, max_workers=max_workers).scan()
@@ -0,0 +1,275 @@
+"""
+Long-lived mazel server, holding a Workspace's packages and dependency graph in
+memory, in the spirit of bazel's server [1].
+
+The server listens on a Unix domain socket (see `mazel.client.socket_path`). For
+each request, it forks: the child takes over the client's stdin/stdout/stderr
+(passed over the socket), working directory and environment, and runs the command
+line with the already loaded modules and Workspace. Forking keeps each command
+isolated, while the copy-on-write memory means nothing is re-imported, re-scanned
+or re-parsed.
+
+The Workspace is watched (see `mazel.watch`), and when a BUILD.toml or a Runtime's
+manifest (e.g. pyproject.toml) changes, only the affected packages are updated
+(see `Workspace.refresh`). A change to WORKSPACE.toml or .mazelignore reloads
+everything. The server exits after being idle for `idle_timeout` seconds, or when
+asked to via `mazel shutdown`.
+
+[1]: https://bazel.build/run/client-server
+"""
+from __future__ import annotations
+
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+from .client import MAX_MESSAGE, MessageReader, is_private, send_message, socket_path
+from .commands import utils
+from .exceptions import MazelException
+from .watch import Watcher, check_supported
+from .workspace import Workspace
+
+# Same as bazel's default --max_idle_secs
+IDLE_TIMEOUT = 3 * 60 * 60
+
+
+class ServerError(MazelException):
+    pass
+
+
+def run_command(argv: List[str]) -> int:
+    """Run the mazel command line, returning the exit code"""
+    from .main import cli
+
+    try:
+        cli.main(args=argv, prog_name="mazel")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+class Server(object):
+    def __init__(self, workspace_path: Path, idle_timeout: float = IDLE_TIMEOUT):
+        self.path = workspace_path
+        self.idle_timeout = idle_timeout
+        self.socket_path = socket_path(workspace_path)
+        self.workspace: Optional[Workspace] = None
+        self.watcher: Optional[Watcher] = None
+        self.running = False
+
+    def log(self, message: str) -> None:
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+
+    def load(self) -> None:
+        """Load the Workspace, along with its packages and graph"""
+        if self.workspace is not None and self.workspace.is_loaded():
+            return
+
+        start = time.monotonic()
+        workspace = self.workspace or Workspace(self.path)
+        try:
+            workspace.graph()
+        except Exception as e:
+            # Leave it to the command to report the error
+            self.log(f"Unable to load the workspace: {e!r}")
+            self.workspace = utils.preloaded = None
+            return
+
+        self.workspace = utils.preloaded = workspace
+        self.log(
+            f"Loaded {len(workspace.packages())} packages in "
+            f"{time.monotonic() - start:.3f}s"
+        )
+
+    def watch(self) -> None:
+        if self.watcher is not None:
+            self.watcher.close()
+
+        # With the current exclusion patterns
+        ignore = Workspace(self.path).ignore_rules()
+        self.watcher = Watcher(
+            self.path, [self.path], ignore=ignore, hidden=[Workspace.MAZELIGNORE]
+        )
+        self.watcher.start()
+        self.log(f"Watching {self.watcher.watch_count} directories")
+
+    def invalidate(self, changed: List[Path]) -> None:
+        if self.workspace is not None:
+            try:
+                if self.workspace.refresh(changed):
+                    self.log(
+                        f"Refreshed, changed: {', '.join(str(p) for p in changed[:5])}"
+                    )
+            except Exception as e:
+                # Leave it to the next load to report the error
+                self.log(f"Unable to refresh the workspace: {e!r}")
+        if any(
+            path.name in (Workspace.WORKSPACE_TOML, Workspace.MAZELIGNORE)
+            and path.parent == self.path
+            for path in changed
+        ):
+            # The exclusion patterns may have changed
+            self.watch()
+
+    def poll(self) -> None:
+        """Process the pending changes"""
+        assert self.watcher is not None
+        changed = self.watcher.read(0)
+        while changed is not None:
+            self.invalidate(changed)
+            changed = self.watcher.read(0)
+
+    def bind(self) -> socket.socket:
+        directory = self.socket_path.parent
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not is_private(directory):
+            raise ServerError(
+                f"{directory} must be a directory owned by the current user, with "
+                "0700 permissions"
+            )
+
+        if os.path.lexists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            with probe:
+                if is_private(self.socket_path) and (
+                    probe.connect_ex(str(self.socket_path)) == 0
+                ):
+                    raise ServerError(f"A server is already running for {self.path}")
+            # Left over from a server that did not exit cleanly
+            self.socket_path.unlink()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        listener.bind(str(self.socket_path))
+        listener.listen(16)
+        return listener
+
+    def serve(self) -> None:
+        # Fail before listening, rather than leaving clients to wait for the server
+        check_supported()
+        listener = self.bind()
+        self.log(f"Listening on {self.socket_path} for {self.path}")
+
+        # Reap the forked children automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        try:
+            self.watch()
+            self.load()
+            self.loop(listener)
+        finally:
+            listener.close()
+            self.socket_path.unlink(missing_ok=True)
+            if self.watcher is not None:
+                self.watcher.close()
+            self.log("Stopped")
+
+    def _stop(self, signum: int, frame: Optional[FrameType]) -> None:
+        # Unwind through serve(), which cleans up the socket
+        raise SystemExit(0)
+
+    def loop(self, listener: socket.socket) -> None:
+        assert self.watcher is not None
+        last_active = time.monotonic()
+        self.running = True
+
+        while self.running:
+            remaining = last_active + self.idle_timeout - time.monotonic()
+            if remaining <= 0:
+                self.log("Idle timeout")
+                break
+
+            try:
+                ready, _, _ = select.select([listener, self.watcher], [], [], remaining)
+            except InterruptedError:
+                continue
+
+            # Before handling a request, take into account any changes made before it
+            self.poll()
+            if listener in ready:
+                conn, _ = listener.accept()
+                with conn:
+                    self.handle(conn, listener)
+                last_active = time.monotonic()
+
+    def handle(self, conn: socket.socket, listener: socket.socket) -> None:
+        message, fds, _, _ = socket.recv_fds(conn, MAX_MESSAGE, 3)
+        try:
+            line = MessageReader(conn, message).read()
+            request: Dict[str, Any] = line or {}
+            if request.get("command") == "shutdown":
+                self.log("Shutdown requested")
+                self.running = False
+                send_message(conn, {"exit": 0})
+            elif len(fds) == 3 and "argv" in request:
+                self.load()
+                self.fork(conn, listener, request, fds)
+            else:
+                send_message(conn, {"exit": 2})
+        except (OSError, ValueError) as e:
+            self.log(f"Invalid request: {e!r}")
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def fork(
+        self,
+        conn: socket.socket,
+        listener: socket.socket,
+        request: Dict[str, Any],
+        fds: List[int],
+    ) -> None:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if os.fork() != 0:
+            return
+
+        # In the child, never return into the server's loop
+        code = 1
+        try:
+            listener.close()
+            code = self.child(conn, request, fds)
+        finally:
+            try:
+                send_message(conn, {"exit": code})
+            finally:
+                os._exit(0)
+
+    def child(
+        self, conn: socket.socket, request: Dict[str, Any], fds: List[int]
+    ) -> int:
+        for signum in [signal.SIGCHLD, signal.SIGTERM]:
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        # Take over the client's stdin/stdout/stderr
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+        os.environ.clear()
+        os.environ.update(request.get("env", {}))
+        os.chdir(request["cwd"])
+
+        send_message(conn, {"pid": os.getpid()})
+        try:
+            return run_command(list(request["argv"]))
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
@@ -0,0 +1,143 @@
+"""
+The shape of the dependency graph, for finding what serializes the packages'
+builds: the levels of `PackageGraph.plan` (packages in a level can run in
+parallel, after the previous levels), the packages with the most dependents or
+dependencies, and the longest chain of dependencies. Weighted by the recorded
+target durations (see `mazel.durations`), the heaviest chain is the critical path:
+even with unlimited parallelism, running the packages takes at least as long.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .graph import Node, PackageGraph
+from .package import Package
+
+
+@dataclass
+class HotSpot:
+    package: Package
+    # Dependents for fan-in, dependencies for fan-out
+    direct: int
+    transitive: int
+
+
+@dataclass
+class GraphStats:
+    packages: int
+    dependencies: int  # Edges
+    widths: List[int]  # Packages per level
+    fan_in: List[HotSpot]
+    fan_out: List[HotSpot]
+    longest_chain: List[Package]
+    # With durations: the heaviest chain, with each package's seconds
+    critical_path: List[Tuple[Package, float]] = field(default_factory=list)
+    total_duration: float = 0.0
+    missing_durations: List[Package] = field(default_factory=list)
+
+    @property
+    def depth(self) -> int:
+        return len(self.widths)
+
+    @property
+    def critical_duration(self) -> float:
+        return sum(seconds for _, seconds in self.critical_path)
+
+
+def graph_stats(
+    graph: PackageGraph, durations: Optional[Dict[str, float]] = None, top: int = 5
+) -> GraphStats:
+    """
+    The stats of the graph, with the `top` hot spots, and if the durations (by
+    label_path) are given, the critical path. Packages without a duration weigh
+    nothing.
+    """
+    plan = graph.plan()
+    widths = [0] * (plan[-1][1] + 1 if plan else 0)
+    for _, level in plan:
+        widths[level] += 1
+
+    stats = GraphStats(
+        packages=len(plan),
+        dependencies=sum(len(node.parents) for node, _ in plan),
+        widths=widths,
+        fan_in=_hot_spots(graph, top, dependents=True),
+        fan_out=_hot_spots(graph, top, dependents=False),
+        longest_chain=[node.package for node in _heaviest_chain(plan, _one)],
+    )
+
+    if durations is not None:
+        _weigh(stats, plan, durations)
+    return stats
+
+
+def _weigh(
+    stats: GraphStats, plan: List[Tuple[Node, int]], durations: Dict[str, float]
+) -> None:
+    def duration(node: Node) -> float:
+        return float(durations.get(node.package.label_path, 0.0))
+
+    stats.critical_path = [
+        (node.package, duration(node)) for node in _heaviest_chain(plan, duration)
+    ]
+    stats.total_duration = sum(duration(node) for node, _ in plan)
+    stats.missing_durations = [
+        node.package for node, _ in plan if node.package.label_path not in durations
+    ]
+
+
+def _one(node: Node) -> float:
+    return 1.0
+
+
+def _heaviest_chain(
+    plan: List[Tuple[Node, int]], weight: Callable[[Node], float]
+) -> List[Node]:
+    """
+    The chain of dependencies with the largest total weight, dependencies first,
+    and ending with the deepest package for equal weights. Dynamic programming in
+    the plan's order, so each package's parents are done. A parent in the same
+    level, i.e. in a condensed cycle, is not, so its own parents are used instead.
+    """
+    levels = {node: level for node, level in plan}
+    totals: Dict[Node, float] = {}
+    previous: Dict[Node, Optional[Node]] = {}
+    for node, level in plan:
+        parents: List[Node] = []
+        for parent in node.parents:
+            if levels[parent] < level:
+                parents.append(parent)
+            else:
+                parents.extend(p for p in parent.parents if levels[p] < level)
+        heaviest = max(parents, key=totals.__getitem__, default=None)
+        previous[node] = heaviest
+        totals[node] = weight(node) + (
+            totals[heaviest] if heaviest is not None else 0.0
+        )
+
+    chain: List[Node] = []
+    current = max(totals, key=lambda node: (totals[node], levels[node]), default=None)
+    while current is not None:
+        chain.append(current)
+        current = previous[current]
+    return chain[::-1]
+
+
+def _hot_spots(graph: PackageGraph, top: int, dependents: bool) -> List[HotSpot]:
+    """
+    The packages with the most direct dependents (or dependencies), then the most
+    transitive ones, then by label_path
+    """
+    compact = graph.compact()
+    if dependents:
+        closure, edges = compact.with_descendants, compact.children
+    else:
+        closure, edges = compact.with_ancestors, compact.parents
+
+    spots = [
+        HotSpot(package, len(edges(i)), closure(1 << i).bit_count() - 1)
+        for i, package in enumerate(compact.packages)
+    ]
+    spots.sort(
+        key=lambda spot: (-spot.direct, -spot.transitive, spot.package.label_path)
+    )
+    return [spot for spot in spots[:top] if spot.direct > 0]
@@ -0,0 +1,115 @@
+"""
+Index of values (e.g. Packages) by path, keyed on the path's components.
+
+Answers "which value owns this path" (the value at the longest matching prefix)
+and "which values live under this prefix" in time proportional to the path's
+depth, rather than the number of values.
+"""
+from __future__ import annotations
+
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+PathParts = Tuple[str, ...]
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "value", "has_value")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node[T]] = {}
+        self.value: Optional[T] = None
+        self.has_value = False
+
+
+class PathTrie(Generic[T]):
+    """
+    Maps paths, as tuples of components (e.g. `Path.parts`), to values. The empty
+    tuple is the root.
+    """
+
+    def __init__(self, items: Iterable[Tuple[PathParts, T]] = ()):
+        self._root: _Node[T] = _Node()
+        self._len = 0
+        for parts, value in items:
+            self.insert(parts, value)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def insert(self, parts: PathParts, value: T) -> None:
+        node = self._root
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node()
+            node = child
+        if not node.has_value:
+            self._len += 1
+        node.value, node.has_value = value, True
+
+    def remove(self, parts: PathParts) -> Optional[T]:
+        """Remove and return the value at exactly `parts`, pruning empty branches"""
+        path = [self._root]
+        for part in parts:
+            child = path[-1].children.get(part)
+            if child is None:
+                return None
+            path.append(child)
+
+        node = path[-1]
+        if not node.has_value:
+            return None
+        value = node.value
+        node.value, node.has_value = None, False
+        self._len -= 1
+
+        for i in range(len(parts), 0, -1):
+            node = path[i]
+            if node.has_value or node.children:
+                break
+            del path[i - 1].children[parts[i - 1]]
+        return value
+
+    def _find(self, parts: PathParts) -> Optional[_Node[T]]:
+        node: Optional[_Node[T]] = self._root
+        for part in parts:
+            assert node is not None
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def get(self, parts: PathParts) -> Optional[T]:
+        """The value at exactly `parts`"""
+        node = self._find(parts)
+        return node.value if node is not None and node.has_value else None
+
+    def owner(self, parts: PathParts) -> Optional[T]:
+        """The value at the longest prefix of `parts` (including `parts` itself)"""
+        node = self._root
+        owner = node.value if node.has_value else None
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                break
+            node = child
+            if node.has_value:
+                owner = node.value
+        return owner
+
+    def under(self, parts: PathParts) -> List[T]:
+        """The values at or below `parts`, sorted by path"""
+        node = self._find(parts)
+        return list(self._values(node)) if node is not None else []
+
+    def _values(self, node: _Node[T]) -> Iterator[T]:
+        # Iterative, so deeply nested trees cannot hit the recursion limit
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.has_value:
+                yield node.value  # type: ignore[misc]
+            # Reversed, so the smallest child is popped first
+            stack.extend(node.children[name] for name in sorted(node.children)[::-1])
@@ -0,0 +1,274 @@
+"""
+Watch directory trees for file changes, via Linux's inotify [1].
+
+inotify watches are not recursive, so every directory below the watched paths
+gets its own watch (skipping hidden and excluded directories, as the package scan
+does), and directories created later are added as they appear.
+
+Changes are debounced and coalesced: after the first change, we keep collecting
+until the tree has been quiet for the debounce interval, so e.g. a `git checkout`
+touching thousands of files yields a single batch.
+
+[1]: https://man7.org/linux/man-pages/man7/inotify.7.html
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+from .exceptions import WatchError
+from .ignore import IgnoreRules
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_ONLYDIR
+    | IN_EXCL_UNLINK
+)
+
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; ...}
+EVENT_HEADER = struct.Struct("iIII")
+
+READ_SIZE = 64 * 1024
+
+# (watch descriptor, mask, name)
+Event = Tuple[int, int, str]
+
+
+def parse_events(buffer: bytes) -> List[Event]:
+    """Split the buffer read from the inotify file descriptor into events"""
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(buffer):
+        wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+        start = offset + EVENT_HEADER.size
+        offset = start + length
+        # The name is NUL padded
+        name = buffer[start:offset].rstrip(b"\0")
+        events.append((wd, mask, os.fsdecode(name)))
+    return events
+
+
+def _libc() -> ctypes.CDLL:
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise AttributeError("inotify_init1")
+    except (OSError, AttributeError):
+        raise WatchError("Watching for changes requires Linux's inotify")
+    return libc
+
+
+def check_supported() -> None:
+    """Raise a WatchError when watching is not supported on this platform"""
+    _libc()
+
+
+class Watcher(object):
+    """
+    Watch the `paths` (directories below `root`) and everything below them. Use as
+    a context manager, then iterate over `batches()`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        paths: Iterable[Path],
+        ignore: Optional[IgnoreRules] = None,
+        hidden: Iterable[str] = (),
+    ):
+        self.root = root
+        self.paths = list(paths)
+        self.ignore = ignore
+        # Names of hidden files to report changes for anyway
+        self.hidden = frozenset(hidden)
+        # Whether the kernel dropped events (so reported every path as changed)
+        self.overflowed = False
+        self._fd = -1
+        self._wds: Dict[int, Path] = {}
+        self._libc: Optional[ctypes.CDLL] = None
+
+    def __enter__(self) -> Watcher:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self._libc = _libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise WatchError(os.strerror(ctypes.get_errno()))
+        for path in self.paths:
+            self.add_tree(path)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            # Closing removes all the watches
+            os.close(self._fd)
+            self._fd = -1
+            self._wds.clear()
+
+    @property
+    def watch_count(self) -> int:
+        return len(self._wds)
+
+    def fileno(self) -> int:
+        """The inotify file descriptor, e.g. for `select()`"""
+        return self._fd
+
+    def _excluded(self, path: Path) -> bool:
+        if path.name.startswith(".") and path.name not in self.hidden:
+            # Hidden, and editors' swap & backup files
+            return True
+        if self.ignore:
+            try:
+                relpath = path.relative_to(self.root).as_posix()
+            except ValueError:
+                return False
+            return self.ignore.is_ignored(relpath)
+        return False
+
+    def add_tree(self, path: Path) -> List[Path]:
+        """
+        Watch the directory and all its subdirectories, returning the files found
+        (which for a newly created directory, were created before it was watched).
+        """
+        files = []
+        frontier = [path]
+        while frontier:
+            directory = frontier.pop()
+            if not self.add_watch(directory):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        child = directory / entry.name
+                        if self._excluded(child):
+                            continue
+                        elif entry.is_dir(follow_symlinks=False):
+                            frontier.append(child)
+                        else:
+                            files.append(child)
+            except (FileNotFoundError, NotADirectoryError):
+                # Removed since
+                continue
+        return files
+
+    def add_watch(self, path: Path) -> bool:
+        assert self._libc is not None, "Watcher not started"
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            elif err == errno.ENOSPC:
+                raise WatchError(
+                    "Too many directories to watch, increase the limit via the "
+                    "fs.inotify.max_user_watches sysctl, or exclude directories in "
+                    "WORKSPACE.toml"
+                )
+            raise WatchError(f"Unable to watch {path}: {os.strerror(err)}")
+        self._wds[wd] = path
+        return True
+
+    def read(self, timeout: Optional[float]) -> Optional[List[Path]]:
+        """
+        Wait up to `timeout` seconds (forever if None) for changes, returning the
+        paths changed, or None if nothing happened.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return None
+        try:
+            buffer = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return None
+        return self._changed(parse_events(buffer))
+
+    def _changed(self, events: List[Event]) -> List[Path]:
+        changed = []
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events, so consider everything changed
+                self.overflowed = True
+                changed.extend(self.paths)
+                continue
+
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # The watched directory was removed
+                del self._wds[wd]
+                continue
+
+            path = directory / name if name else directory
+            if name and self._excluded(path):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Including any files created before the watch was added
+                changed.extend(self.add_tree(path))
+            changed.append(path)
+        return changed
+
+    def batch(
+        self, timeout: Optional[float], debounce: float, max_delay: float = 2.0
+    ) -> Set[Path]:
+        """
+        The set of changed paths, waiting up to `timeout` seconds (forever if None)
+        for the first change, then until no more changes have occurred for
+        `debounce` seconds (or at most `max_delay` seconds after the first change, so
+        constant changes cannot starve us). Empty if nothing changed.
+        """
+        changed: Set[Path] = set(self.read(timeout) or [])
+        if changed:
+            deadline = time.monotonic() + max_delay
+            while time.monotonic() < deadline:
+                more = self.read(debounce)
+                if more is None:
+                    break
+                changed.update(more)
+        return changed
+
+    def batches(self, debounce: float, max_delay: float = 2.0) -> Iterator[Set[Path]]:
+        """Yield each `batch()` of changes, as they occur"""
+        while True:
+            changed = self.batch(None, debounce, max_delay)
+            if changed:
+                yield changed
@@ -1,62 +1,162 @@
 from __future__ import annotations
 
-from functools import partial
-from pathlib import Path
-from typing import Callable, List, Optional, Union, overload
+import bisect
+import hashlib
+import json
+import os
+import subprocess
+from functools import cached_property, partial
+from pathlib import Path, PurePosixPath
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
 
 from .base import PathableConcept
-from .exceptions import PackageNotFound
-from .git import git_modified_files
+from .depcache import Dependencies, DependencyCache, Probes, Stamps, stamp
+from .exceptions import InvalidWorkspaceToml, PackageNotFound
+from .git import escape_pathspec, git_ls_files, git_modified_files
 from .graph import PackageGraph
+from .ignore import IgnoreRules
 from .info import Info
 from .label import Label, ResolvedLabel, Target
 from .package import Package
+from .scan import (
+    CHUNKS_PER_WORKER,
+    PackageScanner,
+    ScanIndex,
+    ScanStats,
+    package_dirs_from_files,
+)
+from .trie import PathParts, PathTrie
 from .types import CommitRange
 
+# Below this many Packages missing from the DependencyCache, their dependencies are
+# extracted serially, as starting the worker processes costs more than it gains
+EXTRACT_PARALLEL_THRESHOLD = 256
+
 
 def package_scan(workspace: Workspace, path: Path) -> List[Package]:
     """
-    Breadth-First Search to find all BUILD.toml files, stopping in each
-    sub path once the BUILD.toml is found.  BFS instead of DFS, because we
-    are likely to have multiple subdirectories below each BUILD.toml and
-    os.scandir doesn't guarantee scan order.
+    Breadth-First Search to find all BUILD.toml files. BFS instead of DFS, because
+    each level of the search can be scanned in parallel (see `mazel.scan`).
+
+    As with bazel, packages may be nested inside other packages; each file belongs
+    to the package with the longest matching path. Nested Workspaces (directories
+    with their own WORKSPACE.toml) are not scanned.
 
-    Unlike bazel, we do not presently support nested BUILD files. For us,
-    the BUILD represents the top-level
+    Directories matching the Workspace's exclusion patterns (WORKSPACE.toml's
+    `workspace.exclude` and `.mazelignore`) are not descended into.
+
+    Packages are returned sorted by path. The directories visited are persisted
+    in the Workspace's `.mazel/cache/`, so the next scan only needs to list the
+    directories that have changed since.
 
     Alternative implementations:
-    - Use `glob( "**/BUILD.toml", recursive=True)` -- would descend past
-      the BUILD.toml
-    - Use `os.walk()`, depth-first approach that would likely go deeper
-      than needed
-    - Use os.scandir() instead of Path.iterdir() (original implementation)
+    - Use `glob( "**/BUILD.toml", recursive=True)` -- would descend into
+      nested Workspaces and excluded directories
+    - Use `os.walk()`, depth-first approach that cannot prune nested
+      Workspaces without listing them
+    - Use Path.iterdir() recursively (original implementation), which needs
+      an extra stat() call per entry and is single threaded
     """
-    queued_dirs = []
-    for entry in path.iterdir():
-        if entry.is_file() and entry.name == Package.BUILD_TOML:
-            # Found the BUILD.toml, we can stop descending.
-            return [Package(entry.parent, workspace=workspace)]
-
-        # TODO Handle nested Workspaces. Do not scan the nested Workspace.
-        #   Would need to delay the prior BUILD.toml return, since it would
-        #   belong to this nested WORKSPACE.  Below is an insufficient
-        #   implementations
-        # elif entry.is_file() and entry.name == WORKSPACE_TOML:
-        #    # Found a nested workspace, so stop
-        #    return []
-
-        elif (
-            entry.is_dir()
-            # Ignore hidden directories (i.e. .git .venv)
-            and not entry.name.startswith(".")
-        ):
-            queued_dirs.append(entry)
+    start = path.relative_to(workspace.path).as_posix()
+    scanner = PackageScanner(
+        workspace.path,
+        index=ScanIndex.load(workspace.path),
+        ignore=workspace.ignore_rules(),
+    )
+    package_paths = scanner.scan(start)
+    if scanner.changed:
+        scanner.index.save(workspace.path)
+
+    # Kept for diagnostics, see `mazel info`
+    workspace.scan_stats = scanner.stats
+
+    return [
+        Package(package_path, workspace=workspace) for package_path in package_paths
+    ]
+
 
-    results = []
-    for queued_dir in queued_dirs:
-        # recursive scan
-        results.extend(package_scan(workspace, queued_dir))
-    return results
+def git_package_scan(workspace: Workspace, path: Path) -> List[Package]:
+    """
+    Find all BUILD.toml files via the git index, instead of scanning the filesystem.
+    Ignored directories (e.g. build output containing copies of BUILD.toml) are
+    never considered.
+
+    Otherwise follows the same rules as `package_scan`, which is used as a fallback
+    when `path` is not inside a git repository.
+    """
+    untracked = bool(workspace._workspace_toml_workspace.get("include_untracked", True))
+
+    # Paths relative to the Workspace, so the exclusion patterns apply as-is
+    start = path.relative_to(workspace.path).as_posix()
+    # Directory names may contain glob characters, e.g. [id]
+    prefix = "" if start == "." else f"{escape_pathspec(start)}/"
+    try:
+        files = git_ls_files(
+            repo_dir=workspace.path,
+            pathspecs=[
+                f"{pattern}{name}"
+                for name in [Package.BUILD_TOML, Workspace.WORKSPACE_TOML]
+                for pattern in [prefix, f"{prefix}*/"]
+            ],
+            untracked=untracked,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        # Not a git repository (or git is not installed)
+        return package_scan(workspace, path)
+
+    build_files = [f.as_posix() for f in files if f.name == Package.BUILD_TOML]
+    relpaths, pruned = package_dirs_from_files(
+        build_files,
+        ignore=workspace.ignore_rules(),
+        workspace_files=(
+            f.as_posix() for f in files if f.name == Workspace.WORKSPACE_TOML
+        ),
+    )
+    workspace.scan_stats = ScanStats(visited=len(build_files), pruned=pruned)
+
+    return [
+        Package(workspace.path.joinpath(relpath), workspace=workspace)
+        for relpath in relpaths
+        # Deleted, but the deletion is not yet staged
+        if workspace.path.joinpath(relpath, Package.BUILD_TOML).is_file()
+    ]
+
+
+# The Workspace of an `extract_dependencies` worker process
+_worker_workspace: Optional[Workspace] = None
+
+
+def _init_extract_worker(workspace_path: Path, relpaths: List[str]) -> None:
+    global _worker_workspace
+    # Use the parent's Packages, rather than discovering them again
+    workspace = Workspace(workspace_path)
+    workspace._set_packages(
+        [Package(workspace_path.joinpath(relpath), workspace) for relpath in relpaths]
+    )
+    _worker_workspace = workspace
+
+
+def _extract_in_worker(relpath: str) -> Tuple[Stamps, Dependencies, Probes]:
+    """
+    Only label paths are returned to the parent process, which resolves them to
+    its own Packages
+    """
+    assert _worker_workspace is not None
+    return _worker_workspace.get_package(
+        _worker_workspace.path.joinpath(relpath)
+    ).extract_dependencies()
 
 
 @overload
@@ -109,6 +209,16 @@ def locate_upwards(
 
 class Workspace(PathableConcept):
     WORKSPACE_TOML = "WORKSPACE.toml"
+    MAZELIGNORE = ".mazelignore"
+
+    # WORKSPACE.toml's workspace.discovery options for finding the Packages
+    DISCOVERY = {
+        "scan": package_scan,
+        "git": git_package_scan,
+    }
+
+    # Counters from the last package scan
+    scan_stats: Optional[ScanStats] = None
 
     @classmethod
     def find(cls, cwd: Optional[Path] = None) -> Optional[Workspace]:
@@ -118,6 +228,33 @@ class Workspace(PathableConcept):
         """
         return locate_upwards(locate=cls.WORKSPACE_TOML, fn=cls, cwd=cwd)
 
+    @cached_property
+    def workspace_toml(self) -> Dict[str, Any]:
+        return self.read_toml(self.WORKSPACE_TOML)
+
+    @property
+    def _workspace_toml_workspace(self) -> Mapping[str, Any]:
+        # WORKSPACE.toml may be empty, unlike BUILD.toml's [package], so the
+        # [workspace] section is optional
+        return cast(Mapping[str, Any], self.workspace_toml.get("workspace", {}))
+
+    def ignore_rules(self) -> IgnoreRules:
+        """
+        Exclusion patterns for the package scan, from WORKSPACE.toml's
+        workspace.exclude followed by the .mazelignore file
+        """
+        exclude = self._workspace_toml_workspace.get("exclude", [])
+        if not isinstance(exclude, list) or not all(
+            isinstance(pattern, str) for pattern in exclude
+        ):
+            raise InvalidWorkspaceToml(
+                f"workspace.exclude must be a list of patterns, not {exclude!r}"
+            )
+        lines = list(exclude)
+        if self.path_exists(self.MAZELIGNORE):
+            lines.extend(self.read_path(self.MAZELIGNORE).splitlines())
+        return IgnoreRules(lines)
+
     def active_package(self, cwd: Optional[Path] = None) -> Optional[Package]:
         """Current working directory's Package"""
         return locate_upwards(
@@ -130,14 +267,409 @@ class Workspace(PathableConcept):
     def info(self) -> Info:
         return Info(self)
 
+    def discover(self, path: Path) -> List[Package]:
+        """Find the Packages under `path`, per WORKSPACE.toml's workspace.discovery"""
+        discovery = self._workspace_toml_workspace.get("discovery", "scan")
+        try:
+            discover_fn = self.DISCOVERY[discovery]
+        except KeyError:
+            raise InvalidWorkspaceToml(
+                f"workspace.discovery must be one of {list(self.DISCOVERY)}, "
+                f"not {discovery!r}"
+            )
+        return discover_fn(self, path)
+
+    def _condense_cycles(self) -> bool:
+        """Whether WORKSPACE.toml's workspace.cycles plans each cycle as a unit"""
+        cycles: str = self._workspace_toml_workspace.get("cycles", "error")
+        if cycles not in ("error", "condense"):
+            raise InvalidWorkspaceToml(
+                f"workspace.cycles must be one of ['error', 'condense'], "
+                f"not {cycles!r}"
+            )
+        return cycles == "condense"
+
     def packages(self) -> List[Package]:
         """Scans for all Packages inside the Workspace"""
         if not hasattr(self, "_packages"):
-            self._packages = package_scan(self, self.path)
+            self._set_packages(self.discover(self.path))
         return self._packages
 
+    def _set_packages(self, packages: List[Package]) -> None:
+        self._packages = packages
+        self._package_index = PathTrie(
+            (self._parts(package.path), package) for package in packages
+        )
+
+    def package_index(self) -> PathTrie[Package]:
+        """All the Packages, indexed by their path relative to the Workspace"""
+        self.packages()
+        return self._package_index
+
+    def _parts(self, path: Path) -> PathParts:
+        """The components of `path` relative to the Workspace"""
+        return path.relative_to(self.path).parts
+
+    def packages_under(self, path: Path) -> List[Package]:
+        """
+        Packages at or below `path`. Unless the whole Workspace was already scanned,
+        only scans the subtree, so the cost is independent of the Workspace's size.
+        """
+        if hasattr(self, "_packages"):
+            try:
+                return self._package_index.under(self._parts(path))
+            except ValueError:
+                # Outside of the Workspace
+                return []
+
+        if not self._reachable(path):
+            return []
+        return self.discover(path)
+
+    def _reachable(self, path: Path) -> bool:
+        """
+        Whether a full scan would reach the `path` directory: it is inside the
+        Workspace, not hidden or excluded, and not inside a nested Workspace.
+        """
+        try:
+            parts = self._parts(path)
+        except ValueError:
+            return False
+
+        if not path.is_dir() or any(part.startswith(".") for part in parts):
+            return False
+
+        ignore = self.ignore_rules()
+        for i in range(1, len(parts) + 1):
+            if ignore.is_ignored("/".join(parts[:i])):
+                return False
+            if self.path.joinpath(*parts[:i], self.WORKSPACE_TOML).is_file():
+                return False
+        return True
+
+    def _package_at(self, path: Path) -> Optional[Package]:
+        """The Package at exactly `path`, without scanning the whole Workspace"""
+        if hasattr(self, "_packages"):
+            try:
+                return self._package_index.get(self._parts(path))
+            except ValueError:
+                return None
+
+        if path.joinpath(Package.BUILD_TOML).is_file() and self._reachable(path):
+            return Package(path, workspace=self)
+        return None
+
+    def dependency_cache(self) -> DependencyCache:
+        """The Packages' dependencies, persisted between invocations"""
+        if not hasattr(self, "_dependency_cache"):
+            self._dependency_cache = DependencyCache.load(self.path)
+        return self._dependency_cache
+
+    def runtime_cache(self) -> Dict[str, Any]:
+        """
+        State shared by the Packages' Runtimes (e.g. an index of the package.json
+        names), kept while the Packages are loaded, and cleared as they change.
+        """
+        if not hasattr(self, "_runtime_cache"):
+            self._runtime_cache: Dict[str, Any] = {}
+        return self._runtime_cache
+
+    def probe(self, key: str) -> Any:
+        """
+        The current result of a lookup of Packages made by a Runtime (see
+        `Runtime.owning_package` and co.), keyed "<kind>:<path>", with the path
+        relative to the Workspace:
+
+        - "owner": the relpath of the Package containing the path, or None
+        - "at": the relpath of the Package at exactly the path, or None
+        - "under": the relpaths of the Packages at or below the path
+        - "stamps": a digest of the stamps of the file (by name) in every Package at
+          or below its directory
+
+        Cached dependencies are only used while their probes give the same results.
+        """
+        kind, _, argument = key.partition(":")
+        path = self.path.joinpath(argument)
+        if kind == "owner":
+            package = self.owning_package(path)
+        elif kind == "at":
+            package = self.package_index().get(self._parts(path))
+        elif kind == "under":
+            return [package.relpath for package in self.packages_under(path)]
+        elif kind == "stamps":
+            cache = self.runtime_cache()
+            if key not in cache:
+                digest = hashlib.sha1()
+                for package in self.packages_under(path.parent):
+                    digest.update(
+                        json.dumps(
+                            [package.relpath, stamp(package.path / path.name)]
+                        ).encode()
+                    )
+                cache[key] = digest.hexdigest()
+            return cache[key]
+        else:
+            raise ValueError(f"Unknown probe {key}")
+        return package.relpath if package is not None else None
+
     def graph(self) -> PackageGraph:
-        return PackageGraph.from_packages(self.packages())
+        if not hasattr(self, "_graph"):
+            packages = self.packages()
+            self.extract_dependencies(packages)
+            self._graph = PackageGraph.from_packages(
+                packages, condense_cycles=self._condense_cycles()
+            )
+
+            cache = self.dependency_cache()
+            cache.prune(package.relpath for package in packages)
+            if cache.changed:
+                cache.save(self.path)
+        return self._graph
+
+    def extract_dependencies(
+        self, packages: List[Package], workers: Optional[int] = None
+    ) -> None:
+        """
+        Fill the DependencyCache for the `packages` missing from it. Parsing the
+        manifests is CPU bound, so with enough of them (e.g. on a cold cache), the
+        parsing is fanned out across `workers` processes (default: the CPU count).
+        """
+        cache = self.dependency_cache()
+        missing = [
+            package
+            for package in packages
+            if cache.lookup(package.relpath, package.path, self.probe) is None
+        ]
+
+        workers = workers or os.cpu_count() or 1
+        if len(missing) < EXTRACT_PARALLEL_THRESHOLD or workers < 2:
+            # Left to Package.dependencies(), as they are needed
+            return
+
+        relpaths = [package.relpath for package in missing]
+        # Only imported when needed, as it is slow to import
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_extract_worker,
+            initargs=(self.path, [package.relpath for package in self.packages()]),
+        ) as executor:
+            results = executor.map(
+                _extract_in_worker,
+                relpaths,
+                chunksize=-(-len(relpaths) // (workers * CHUNKS_PER_WORKER)),
+            )
+            for relpath, (stamps, dependencies, probes) in zip(relpaths, results):
+                cache.record(relpath, stamps, dependencies, probes=probes)
+
+    def is_loaded(self) -> bool:
+        """Whether the Packages and their graph have been loaded"""
+        return hasattr(self, "_graph")
+
+    def reset(self) -> None:
+        """Forget the loaded Packages and graph, so they are rediscovered on next use"""
+        for attr in [
+            "_packages",
+            "_package_index",
+            "_graph",
+            "_runtime_cache",
+            "workspace_toml",
+        ]:
+            self.__dict__.pop(attr, None)
+
+    def refresh(self, changed_paths: Iterable[Path]) -> bool:
+        """
+        Update the loaded Packages and graph for files changed on disk (e.g. as
+        reported by `mazel.watch`), in time proportional to the changes rather than
+        to the Workspace's size. For long-running processes, like `mazel server`.
+
+        - A created or deleted BUILD.toml adds or removes the Package. The Packages
+          that depended upon a removed Package have their dependencies recomputed.
+        - A modified BUILD.toml or Runtime manifest (e.g. pyproject.toml) only
+          recomputes the dependencies of the Package it belongs to.
+        - A changed WORKSPACE.toml or .mazelignore may change which directories are
+          part of the Workspace, so everything is reset, to be rediscovered on next
+          use. As are new Packages when using git discovery.
+        - Any other file a Runtime read from outside of the Package (e.g. a
+          go.work) recomputes the dependencies of the Packages that read it.
+        - Adding or removing Packages recomputes the dependencies that would now
+          resolve to other Packages (see `probe`), e.g. a path dependency on a
+          directory that became a Package of its own.
+
+        Returns whether anything loaded was affected. If a Package's dependencies
+        can no longer be resolved, everything is reset before raising the error.
+        """
+        if not hasattr(self, "_packages"):
+            return False
+
+        changed_paths = list(changed_paths)
+        changes = self._changes(changed_paths)
+        if changes is None:
+            self.reset()
+            return True
+        added, removed, dirty = changes
+        recheck = bool(added or removed) or self._probed_file_changed(changed_paths)
+        if not (added or removed or dirty or recheck):
+            return False
+
+        discovery = self._workspace_toml_workspace.get("discovery", "scan")
+        if added and discovery != "scan":
+            # Whether git lists the BUILD.toml depends on e.g. .gitignore
+            self.reset()
+            return True
+
+        try:
+            self._apply_changes(added, removed, dirty, recheck)
+        except Exception:
+            self.reset()
+            raise
+        return True
+
+    def _changes(
+        self, changed_paths: Iterable[Path]
+    ) -> Optional[Tuple[List[Path], List[Package], Dict[Package, None]]]:
+        """
+        The directories with new Packages, the removed Packages, and the Packages
+        whose dependencies may have changed. None if everything needs resetting.
+        """
+        # dicts, to deduplicate while keeping the order
+        added: Dict[Path, None] = {}
+        removed: Dict[Package, None] = {}
+        dirty: Dict[Package, None] = {}
+
+        for path in changed_paths:
+            try:
+                parts = self._parts(path)
+            except ValueError:
+                # Outside of the Workspace
+                continue
+
+            if path.name == self.WORKSPACE_TOML or parts == (self.MAZELIGNORE,):
+                return None
+            elif path.name == Package.BUILD_TOML:
+                self._build_toml_changed(path.parent, added, removed, dirty)
+                continue
+
+            package = self._manifest_package(parts)
+            if package is not None:
+                dirty[package] = None
+            dirty.update(dict.fromkeys(self._consumers(parts)))
+            if not path.exists():
+                # A directory moved away or deleted, without its contents reported
+                removed.update(dict.fromkeys(self._package_index.under(parts)))
+
+        return list(added), list(removed), dirty
+
+    def _manifest_package(self, parts: PathParts) -> Optional[Package]:
+        """The Package, if the path is one of its Runtimes' manifests (or inside it)"""
+        package = self._package_index.owner(parts)
+        if package is None:
+            return None
+        depth = len(self._parts(package.path))
+        if len(parts) > depth and parts[depth] in package.manifests():
+            return package
+        return None
+
+    def _consumers(self, parts: PathParts) -> List[Package]:
+        """The Packages whose Runtimes read the file from outside of the Package"""
+        consumers = []
+        for relpath in self.dependency_cache().consumers("/".join(parts)):
+            package = self._package_index.get(PurePosixPath(relpath).parts)
+            if package is not None:
+                consumers.append(package)
+        return consumers
+
+    def _probed_file_changed(self, changed_paths: List[Path]) -> bool:
+        """
+        Whether any Runtime read a changed file's name in every Package below a
+        directory including it
+        """
+        probed = {
+            self.path.joinpath(key.partition(":")[2])
+            for _, entry in self.dependency_cache().probed()
+            for key in entry["probes"]
+            if key.startswith("stamps:")
+        }
+        return any(
+            path.name == file.name and path.is_relative_to(file.parent)
+            for path in changed_paths
+            for file in probed
+        )
+
+    def _stale(self) -> List[Package]:
+        """The Packages whose cached dependencies would now resolve differently"""
+        stale = []
+        for relpath, entry in list(self.dependency_cache().probed()):
+            if not DependencyCache.probes_match(entry, self.probe):
+                package = self._package_index.get(PurePosixPath(relpath).parts)
+                if package is not None:
+                    stale.append(package)
+        return stale
+
+    def _build_toml_changed(
+        self,
+        directory: Path,
+        added: Dict[Path, None],
+        removed: Dict[Package, None],
+        dirty: Dict[Package, None],
+    ) -> None:
+        package = self._package_index.get(self._parts(directory))
+        exists = directory.joinpath(Package.BUILD_TOML).is_file()
+        if package is None:
+            if exists and self._reachable(directory):
+                added[directory] = None
+        elif exists:
+            dirty[package] = None
+        else:
+            removed[package] = None
+
+    def _apply_changes(
+        self,
+        added: List[Path],
+        removed: List[Package],
+        dirty: Dict[Package, None],
+        recheck: bool = False,
+    ) -> None:
+        graph = self._graph if hasattr(self, "_graph") else None
+        self.__dict__.pop("_runtime_cache", None)
+
+        for package in removed:
+            dirty.pop(package, None)
+            self._remove_package(package)
+            if graph is not None:
+                dirty.update(dict.fromkeys(graph.remove(package)))
+
+        for directory in added:
+            package = Package(directory, workspace=self)
+            self._insert_package(package)
+            dirty[package] = None
+
+        if recheck:
+            dirty.update(dict.fromkeys(self._stale()))
+
+        # Once all the Packages exist, so the dependencies can be resolved
+        for package in dirty:
+            package.invalidate()
+            if graph is not None:
+                graph.set_parents(package, package.depends_on())
+
+    def _package_key(self, package: Package) -> PathParts:
+        return self._parts(package.path)
+
+    def _insert_package(self, package: Package) -> None:
+        # Keeping the Packages sorted by path, as discovered
+        bisect.insort(self._packages, package, key=self._package_key)
+        self._package_index.insert(self._parts(package.path), package)
+        if hasattr(self, "_graph"):
+            self._graph.add(package)
+
+    def _remove_package(self, package: Package) -> None:
+        parts = self._parts(package.path)
+        i = bisect.bisect_left(self._packages, parts, key=self._package_key)
+        if i < len(self._packages) and self._packages[i] == package:
+            del self._packages[i]
+        self._package_index.remove(parts)
 
     def _abspath(self, package_path: Optional[str]) -> Optional[Path]:
         if package_path is None:
@@ -150,11 +682,24 @@ class Workspace(PathableConcept):
             return Path.cwd().joinpath(package_path)
 
     def get_package(self, path: Optional[Path]) -> Package:
+        package = None
         if path is not None:
-            for package in self.packages():
-                if package.path == path:
-                    return package
-        raise PackageNotFound(f"No package found for {path}")
+            try:
+                package = self.package_index().get(self._parts(path))
+            except ValueError:
+                # Outside of the Workspace
+                pass
+        if package is None:
+            raise PackageNotFound(f"No package found for {path}")
+        return package
+
+    def owning_package(self, path: Path) -> Optional[Package]:
+        """The Package containing the `path`, if any"""
+        try:
+            return self.package_index().owner(self._parts(path))
+        except ValueError:
+            # Outside of the Workspace
+            return None
 
     def resolve_label_path(self, package_path: str) -> Package:
         """Resolve a package_path to a Package"""
@@ -166,7 +711,7 @@ class Workspace(PathableConcept):
         active = self.active_package(cwd=cwd)
         matched_packages: List[Package] = []
 
-        requested_path = self._abspath(label.package_path)
+        requested_path = self._abspath(label.base_path)
         if requested_path is None:
             if active is None:
                 raise PackageNotFound(
@@ -174,12 +719,13 @@ class Workspace(PathableConcept):
                 )
             matched_packages.append(active)
         else:
-            for package in self.packages():
-                if (
-                    package.path == requested_path
-                    or requested_path in package.path.parents
-                ):
-                    matched_packages.append(package)
+            # //dir means the package at dir, or if there is none, all the packages
+            # below dir. //dir/... always means all the packages at or below dir.
+            package = None if label.recursive else self._package_at(requested_path)
+            if package is not None:
+                matched_packages.append(package)
+            else:
+                matched_packages.extend(self.packages_under(requested_path))
 
             if not matched_packages:
                 raise PackageNotFound(f"No package found for {label}")
@@ -211,13 +757,11 @@ class Workspace(PathableConcept):
         # set of directories to compare against the packages' directories
         modified_dirs = sorted(list(set([path.parent for path in modified_files])))
 
-        # Naive O(N^2) algorithm, lot's of options to improve
-        modified_packages = []
+        # dict, to deduplicate while keeping the order
+        modified_packages: dict[Package, None] = {}
         for path in modified_dirs:
-            # Include this path, since we've already done .parent to uniquify the list
-            parents = list(path.parents) + [path]
-            for package in self.packages():
-                if package.path in parents and package not in modified_packages:
-                    modified_packages.append(package)
+            package = self.owning_package(path)
+            if package is not None:
+                modified_packages[package] = None
 
-        return modified_packages
+        return list(modified_packages)
@@ -0,0 +1,4 @@
+import os
+
+# Keep the tests from writing caches into tests/examples, see `utils.with_cache`
+os.environ["MAZEL_CACHE"] = "0"
@@ -0,0 +1,54 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mazel.cache import cache_path, read_cache, write_cache
+
+from .utils import with_cache
+
+
+@with_cache
+class CacheTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        self.path = cache_path(self.root, "example")
+
+    def test_cache_path(self):
+        self.assertEqual(self.path, self.root / ".mazel/cache/example.json")
+
+    def test_roundtrip(self):
+        write_cache(self.path, 2, {"key": [1, "a"]})
+
+        self.assertEqual(read_cache(self.path, 2), {"version": 2, "key": [1, "a"]})
+        # No leftover temporary files
+        self.assertEqual(list(self.path.parent.iterdir()), [self.path])
+
+    def test_missing(self):
+        self.assertIsNone(read_cache(self.path, 1))
+
+    def test_version_mismatch(self):
+        write_cache(self.path, 1, {"key": "value"})
+        self.assertIsNone(read_cache(self.path, 2))
+
+    def test_corrupt(self):
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text("{not json")
+        self.assertIsNone(read_cache(self.path, 1))
+
+    def test_unwritable(self):
+        # .mazel is a file, so the cache directory can not be created
+        self.root.joinpath(".mazel").touch()
+        write_cache(self.path, 1, {"key": "value"})
+        self.assertIsNone(read_cache(self.path, 1))
+
+    def test_disabled(self):
+        with mock.patch.dict("os.environ", {"MAZEL_CACHE": "0"}):
+            write_cache(self.path, 1, {"key": "value"})
+
+            self.assertFalse(self.path.exists())
+
+        write_cache(self.path, 1, {"key": "value"})
+        with mock.patch.dict("os.environ", {"MAZEL_CACHE": "0"}):
+            self.assertIsNone(read_cache(self.path, 1))
@@ -0,0 +1,169 @@
+import os
+import socket
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mazel import client
+
+from .utils import abspath
+
+
+class FindWorkspaceTest(TestCase):
+    def test_find(self):
+        path = abspath("examples/simple_workspace")
+
+        self.assertEqual(client.find_workspace(path / "nested/package_c"), path)
+        self.assertEqual(client.find_workspace(path), path)
+
+    def test_not_found(self):
+        with TemporaryDirectory() as tmpdir:
+            self.assertIsNone(client.find_workspace(Path(tmpdir)))
+
+
+class SocketPathTest(TestCase):
+    def test_per_workspace(self):
+        a = client.socket_path(Path("/a"))
+
+        self.assertEqual(a, client.socket_path(Path("/a")))
+        self.assertNotEqual(a, client.socket_path(Path("/b")))
+        self.assertEqual(a.parent.name, f"mazel-{os.getuid()}")
+        # Unix domain socket paths are limited to ~100 characters
+        self.assertLess(len(str(client.socket_path(Path("/x" * 200)))), 100)
+
+
+class IsPrivateTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name)
+
+    def test_directory(self):
+        path = self.path / "mazel"
+        path.mkdir(mode=0o700)
+        self.assertTrue(client.is_private(path))
+
+        path.chmod(0o755)
+        self.assertFalse(client.is_private(path))
+
+    def test_symlink(self):
+        path = self.path / "mazel"
+        path.mkdir(mode=0o700)
+        self.path.joinpath("link").symlink_to(path)
+
+        self.assertFalse(client.is_private(self.path / "link"))
+
+    def test_socket(self):
+        path = self.path / "server.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(path))
+
+            self.assertTrue(client.is_private(path))
+
+    def test_not_socket(self):
+        path = self.path / "server.sock"
+        path.touch()
+
+        self.assertFalse(client.is_private(path))
+
+    def test_missing(self):
+        self.assertFalse(client.is_private(self.path / "missing"))
+
+    @mock.patch("os.getuid", return_value=os.getuid() + 1)
+    def test_other_user(self, getuid):
+        path = self.path / "mazel"
+        path.mkdir(mode=0o700)
+
+        self.assertFalse(client.is_private(path))
+
+
+class ServerEnvTest(TestCase):
+    def test_env(self):
+        env = {
+            "PATH": "/bin",
+            "LC_ALL": "C",
+            "MAZEL_SERVER": "1",
+            "AWS_SECRET_ACCESS_KEY": "secret",
+            "GITHUB_TOKEN": "token",
+        }
+
+        self.assertEqual(
+            client.server_env(env),
+            {"PATH": "/bin", "LC_ALL": "C", "MAZEL_SERVER": "1"},
+        )
+
+    def test_extra(self):
+        env = {"PATH": "/bin", "AWS_PROFILE": "dev", "MAZEL_SERVER_ENV": "AWS_PROFILE"}
+
+        self.assertEqual(client.server_env(env), env)
+
+
+class MessageReaderTest(TestCase):
+    def test_read(self):
+        a, b = socket.socketpair()
+        with a, b:
+            client.send_message(a, {"pid": 1})
+            a.sendall(b'{"exit"')
+            a.sendall(b": 2}\n")
+            a.close()
+
+            reader = client.MessageReader(b)
+            self.assertEqual(reader.read(), {"pid": 1})
+            self.assertEqual(reader.read(), {"exit": 2})
+            self.assertIsNone(reader.read())
+
+
+class MainTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch("mazel.main.cli", autospec=True)
+        self.cli = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch.object(client, "connect", side_effect=client.ServerUnavailable)
+    def test_no_server(self, connect):
+        with mock.patch.dict(os.environ, {"MAZEL_SERVER": ""}):
+            client.main(["test", "//..."])
+
+        connect.assert_called_once_with(Path.cwd())
+        self.cli.main.assert_called_once_with(args=["test", "//..."], prog_name="mazel")
+
+    @mock.patch.object(client, "connect")
+    def test_disabled(self, connect):
+        with mock.patch.dict(os.environ, {"MAZEL_SERVER": "0"}):
+            client.main(["test"])
+
+        connect.assert_not_called()
+        self.cli.main.assert_called_once_with(args=["test"], prog_name="mazel")
+
+    @mock.patch.object(client, "connect")
+    def test_local_command(self, connect):
+        client.main(["shutdown"])
+
+        connect.assert_not_called()
+        self.cli.main.assert_called_once_with(args=["shutdown"], prog_name="mazel")
+
+    @mock.patch.object(client, "connect", side_effect=client.ServerUnavailable)
+    @mock.patch("subprocess.Popen", autospec=True)
+    def test_server_exited(self, popen, connect):
+        popen.return_value.poll.return_value = 1
+
+        with TemporaryDirectory() as tmpdir, mock.patch.object(
+            client, "find_workspace", return_value=Path(tmpdir)
+        ), mock.patch.dict(os.environ, {"MAZEL_SERVER": "1"}):
+            client.main(["test"])
+
+        # Without waiting for the startup timeout
+        self.assertEqual(connect.call_count, 2)
+        self.cli.main.assert_called_once_with(args=["test"], prog_name="mazel")
+
+    @mock.patch.object(client, "run_remote", return_value=3)
+    @mock.patch.object(client, "connect")
+    def test_server(self, connect, run_remote):
+        with self.assertRaises(SystemExit) as cm:
+            client.main(["test"])
+
+        self.assertEqual(cm.exception.code, 3)
+        run_remote.assert_called_once_with(
+            connect.return_value, ["test"], Path.cwd(), mock.ANY
+        )
+        self.cli.main.assert_not_called()
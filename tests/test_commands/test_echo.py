@@ -19,6 +19,7 @@ class EchoCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
 
         self.assertEqual(result.exit_code, 0)
@@ -17,6 +17,7 @@ class FormatCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
 
         self.assertEqual(result.exit_code, 0)
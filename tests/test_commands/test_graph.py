@@ -0,0 +1,85 @@
+import json
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from mazel.main import cli
+
+from .utils import CommandTestCase
+
+
+class GraphStatsCommandTest(CommandTestCase):
+    def invoke(self, *args):
+        return CliRunner().invoke(cli, ["graph", "stats", *args])
+
+    def test_text(self):
+        result = self.invoke()
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            result.output,
+            "Packages: 3, dependencies: 3\n"
+            "Depth: 3 level(s)\n"
+            "Packages per level:\n"
+            "  0: 1\n"
+            "  1: 1\n"
+            "  2: 1\n"
+            "Most dependents (fan-in):\n"
+            "  //nested/package_c: 2 direct, 2 transitive\n"
+            "  //package_b: 1 direct, 1 transitive\n"
+            "Most dependencies (fan-out):\n"
+            "  //package_a: 2 direct, 2 transitive\n"
+            "  //package_b: 1 direct, 1 transitive\n"
+            "Longest chain (3 package(s)):\n"
+            "  //nested/package_c\n"
+            "  //package_b\n"
+            "  //package_a\n",
+        )
+
+    @patch("mazel.commands.graph.read_durations", autospec=True)
+    def test_durations(self, read_durations):
+        read_durations.return_value = {"//nested/package_c": 3.0, "//package_a": 1.0}
+
+        result = self.invoke("--durations", "test", "--top", "1")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn(
+            "Critical path by test duration: 4.0s of 4.0s in total, at most 1.0x "
+            "faster in parallel:\n"
+            "  //nested/package_c: 3.0s\n"
+            "  //package_b: 0.0s\n"
+            "  //package_a: 1.0s\n"
+            "No recorded test duration for 1 package(s), counted as 0s\n",
+            result.output,
+        )
+
+    @patch("mazel.commands.graph.read_durations", autospec=True)
+    def test_no_durations(self, read_durations):
+        read_durations.return_value = {}
+
+        result = self.invoke("--durations", "test")
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("No recorded durations for the test target", result.output)
+
+    def test_json(self):
+        result = self.invoke("--output", "json", "--top", "1")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            json.loads(result.output),
+            {
+                "packages": 3,
+                "dependencies": 3,
+                "depth": 3,
+                "widths": [1, 1, 1],
+                "fan_in": [
+                    {"label": "//nested/package_c", "direct": 2, "transitive": 2}
+                ],
+                "fan_out": [{"label": "//package_a", "direct": 2, "transitive": 2}],
+                "longest_chain": ["//nested/package_c", "//package_b", "//package_a"],
+                "critical_path": [],
+                "total_duration": 0.0,
+                "missing_durations": [],
+            },
+        )
@@ -5,7 +5,7 @@ from datetime import datetime
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import TestCase
-from unittest.mock import call, create_autospec, patch
+from unittest.mock import ANY, call, create_autospec, patch
 
 import click
 
@@ -16,7 +16,9 @@ from mazel.commands.label_common import (
     MakeLabelPassInterrupt,
     RunOrder,
     TargetHandler,
+    expand_ancestry,
 )
+from mazel.exceptions import WatchError
 from mazel.fs import cd
 from mazel.label import Target
 from mazel.package import Package
@@ -56,6 +58,7 @@ class LabelRunnerTest(CommandTestCase):
             self.package_a,
             Target("trgt"),
         )
+        self.handler.finish.assert_called_once_with()
 
     def test_multiple_packages(self):
         LabelRunner(self.handler, "fallback").run("//:trgt")
@@ -87,6 +90,29 @@ class LabelRunnerTest(CommandTestCase):
                 with self.assertRaises(click.ClickException):
                     LabelRunner(self.handler, Target("fallback")).run("//package_a")
 
+    def test_package_not_found(self):
+        with self.assertRaisesRegex(click.ClickException, "No package found"):
+            LabelRunner(self.handler, Target("fallback")).run("//nope")
+
+    def test_cyclic_dependency(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir)
+            path.joinpath("WORKSPACE.toml").touch()
+            for name, dependency in [("a", "//b"), ("b", "//a")]:
+                path.joinpath(name).mkdir()
+                path.joinpath(name, "BUILD.toml").write_text(
+                    f'[package]\ndepends_on = ["{dependency}"]\n'
+                )
+
+            with cd(tmpdir):
+                runner = LabelRunner(
+                    self.handler, Target("fallback"), with_ancestors=True
+                )
+                with self.assertRaisesRegex(
+                    click.ClickException, "Circular dependencies: //a -> //b -> //a"
+                ):
+                    runner.run("//a")
+
     def test_collect_errors(self):
         self.handler.handle.side_effect = click.ClickException("error")
 
@@ -102,6 +128,15 @@ class LabelRunnerTest(CommandTestCase):
 
         self.handler.handle.assert_has_calls([call(self.package_a, Target("trgt"))])
 
+    def test_single_package_skips_graph(self):
+        with patch.object(self.workspace, "graph") as graph:
+            runner = LabelRunner(self.handler, "fallback", RunOrder.ORDERED)
+            runner.workspace = self.workspace
+            runner.run("//package_a:trgt")
+
+        graph.assert_not_called()
+        self.handler.handle.assert_called_once_with(self.package_a, Target("trgt"))
+
     def test_run_order_multiple_ordered(self):
         LabelRunner(self.handler, "fallback", RunOrder.ORDERED).run("//:trgt")
         self.handler.handle.assert_has_calls(
@@ -150,6 +185,24 @@ class LabelRunnerTest(CommandTestCase):
             ]
         )
 
+    def test_expand_ancestry(self):
+        graph = self.workspace.graph()
+
+        # In the graph's order, i.e. by path
+        self.assertEqual(
+            expand_ancestry([self.package_a], graph, with_ancestors=True),
+            [self.package_c, self.package_a, self.package_b],
+        )
+        self.assertEqual(
+            expand_ancestry([self.package_c], graph, with_descendants=True),
+            [self.package_c, self.package_a, self.package_b],
+        )
+        self.assertEqual(
+            expand_ancestry([self.package_b], graph, with_descendants=True),
+            [self.package_a, self.package_b],
+        )
+        self.assertEqual(expand_ancestry([self.package_b], graph), [self.package_b])
+
     def test_modified_range(self):
         with patch("mazel.workspace.git_modified_files", autospec=True) as mock_git:
             mock_git.return_value = [
@@ -170,6 +223,158 @@ class LabelRunnerTest(CommandTestCase):
         )
 
 
+class LabelRunnerWatchTest(CommandTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler = create_autospec(TargetHandler)
+
+        patcher = patch("mazel.commands.label_common.Watcher", autospec=True)
+        self.mock_watcher = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.watcher = self.mock_watcher.return_value
+        self.watcher.batch.return_value = set()
+
+        self.workspace = example_workspace()
+        self.package_a = Package(
+            abspath("examples/simple_workspace/package_a"), self.workspace
+        )
+        self.package_b = Package(
+            abspath("examples/simple_workspace/package_b"), self.workspace
+        )
+        self.package_c = Package(
+            abspath("examples/simple_workspace/nested/package_c"), self.workspace
+        )
+
+    def run_watch(self, label, batches, **kwargs):
+        self.watcher.batches.return_value = iter(batches)
+        LabelRunner(
+            self.handler, "fallback", RunOrder.ORDERED, watch=True, **kwargs
+        ).run(label)
+
+    def test_watches_packages(self):
+        self.run_watch("//package_b:trgt", [], with_ancestors=True)
+
+        # The dependencies are watched too
+        self.mock_watcher.assert_called_once_with(self.workspace.path, ANY, ignore=ANY)
+        self.assertCountEqual(
+            self.mock_watcher.call_args[0][1],
+            [self.package_c.path, self.package_b.path],
+        )
+        self.assertEqual(self.handler.handle.call_count, 2)
+
+    def test_rerun_changed(self):
+        self.run_watch(
+            "//:trgt",
+            [
+                {self.package_b.path / "src/a.py", self.package_b.path / "src/b.py"},
+                {self.workspace.path / "non_package/x"},
+            ],
+        )
+
+        self.assertEqual(
+            self.handler.handle.call_args_list[3:],
+            [call(self.package_b, Target("trgt"))],
+        )
+
+    def test_rerun_changed_while_running(self):
+        # Edited during the re-run
+        self.watcher.batch.side_effect = [{self.package_a.path / "y"}, set()]
+
+        self.run_watch("//package_a:trgt", [{self.package_a.path / "x"}])
+
+        self.assertEqual(self.handler.handle.call_count, 3)
+        self.watcher.batch.assert_called_with(0, debounce=ANY)
+
+    def test_ignore_output_while_running(self):
+        self.watcher.batch.side_effect = [{self.package_a.path / "build/out"}]
+
+        with patch(
+            "mazel.commands.label_common.git_ignored", autospec=True
+        ) as mock_ignored:
+            mock_ignored.return_value = {self.package_a.path / "build/out"}
+            self.run_watch("//package_a:trgt", [{self.package_a.path / "x"}])
+
+        self.assertEqual(self.handler.handle.call_count, 2)
+
+    def test_ignore_overflow_while_running(self):
+        def overflow(*args, **kwargs):
+            self.watcher.overflowed = True
+            return {self.package_a.path}
+
+        self.watcher.batch.side_effect = overflow
+
+        self.run_watch("//package_a:trgt", [{self.package_a.path / "x"}])
+
+        self.assertEqual(self.handler.handle.call_count, 2)
+
+    def test_rerun_with_descendants(self):
+        self.run_watch(
+            "//:trgt",
+            [{self.package_c.path / "README.md", self.package_b.path / "x"}],
+            with_descendants=True,
+        )
+
+        self.assertEqual(
+            self.handler.handle.call_args_list[3:],
+            [
+                call(self.package_c, Target("trgt")),
+                call(self.package_b, Target("trgt")),
+                call(self.package_a, Target("trgt")),
+            ],
+        )
+
+    def test_rerun_dependents(self):
+        self.run_watch(
+            "//package_b:trgt",
+            [{self.package_c.path / "README.md"}],
+            with_ancestors=True,
+        )
+
+        # package_b depends on the changed package_c
+        self.assertEqual(
+            self.handler.handle.call_args_list[2:],
+            [
+                call(self.package_c, Target("trgt")),
+                call(self.package_b, Target("trgt")),
+            ],
+        )
+
+    def test_rerun_modified_range(self):
+        with patch("mazel.workspace.git_modified_files", autospec=True) as mock_git:
+            mock_git.return_value = [Path("nested/package_c/README.md")]
+
+            self.run_watch(
+                "//:trgt", [{self.package_b.path / "x"}], modified_since="90daff2"
+            )
+
+        # package_b is re-run, despite not being modified since the commit
+        self.assertEqual(
+            self.handler.handle.call_args_list,
+            [
+                call(self.package_c, Target("trgt")),
+                call(self.package_b, Target("trgt")),
+            ],
+        )
+
+    def test_rerun_not_watched(self):
+        self.run_watch("//package_a:trgt", [{self.package_b.path / "x"}])
+
+        self.handler.handle.assert_called_once_with(self.package_a, Target("trgt"))
+
+    def test_errors_keep_watching(self):
+        self.handler.handle.side_effect = click.ClickException("error")
+
+        self.run_watch("//package_a:trgt", [{self.package_a.path / "x"}])
+
+        self.assertEqual(self.handler.handle.call_count, 2)
+
+    def test_watch_error(self):
+        self.watcher.batches.side_effect = WatchError("no inotify")
+
+        with self.assertRaises(click.ClickException):
+            self.run_watch("//package_a:trgt", [])
+
+
 class TargetHandlerTest(TestCase):
     def test_hande(self):
         with self.assertRaises(TypeError):
@@ -200,6 +405,10 @@ class MakeLabelTestCase(TestCase):
             )
             self.mock_datetime.now.return_value = datetime(2020, 4, 19, 12, 0)
 
+            self.mock_record_durations = stack.enter_context(
+                patch("mazel.commands.label_common.record_durations", autospec=True)
+            )
+
             super().run(result=result)
 
     def setUp(self):
@@ -211,7 +420,11 @@ class MakeLabelTestCase(TestCase):
         del self.workspace
 
     def call_handle(self, path):
-        self.handler_cls().handle(Package(path, self.workspace), Target("test"))
+        handler = self.handler_cls()
+        try:
+            handler.handle(Package(path, self.workspace), Target("test"))
+        finally:
+            handler.finish()
 
 
 class MakeLabelTest(MakeLabelTestCase):
@@ -229,6 +442,9 @@ class MakeLabelTest(MakeLabelTestCase):
                 call("\u2714 //package_b:test (Elapsed time: 0:00:00)", fg="green"),
             ]
         )
+        self.mock_record_durations.assert_called_once_with(
+            self.workspace.path, "test", {"//package_b": 0.0}
+        )
 
     def test_error(self):
         self.mock_run.side_effect = subprocess.CalledProcessError(2, "make ...")
@@ -249,6 +465,7 @@ class MakeLabelTest(MakeLabelTestCase):
                 ),
             ]
         )
+        self.mock_record_durations.assert_not_called()
 
     def test_target_not_exist(self):
         self.mock_target_exists.return_value = False
@@ -0,0 +1,51 @@
+import json
+
+from click.testing import CliRunner
+
+from mazel.main import cli
+
+from .utils import CommandTestCase
+
+
+class QueryCommandTest(CommandTestCase):
+    def invoke(self, *args):
+        return CliRunner().invoke(cli, ["query", *args])
+
+    def test_label(self):
+        result = self.invoke("deps(//package_b)")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output, "//nested/package_c\n//package_b\n")
+
+    def test_json(self):
+        result = self.invoke("--output", "json", "deps(//package_b)")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            json.loads(result.output),
+            [
+                {"label": "//nested/package_c", "deps": []},
+                {"label": "//package_b", "deps": ["//nested/package_c"]},
+            ],
+        )
+
+    def test_dot(self):
+        result = self.invoke("--output", "dot", "deps(//package_b)")
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            result.output,
+            "digraph mazel {\n"
+            '  "//nested/package_c"\n'
+            '  "//package_b"\n'
+            '  "//package_b" -> "//nested/package_c"\n'
+            "}\n",
+        )
+
+    def test_invalid(self):
+        result = self.invoke("deps(//package_b")
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertEqual(
+            result.output, "Error: Invalid query 'deps(//package_b': unexpected end\n"
+        )
@@ -18,6 +18,7 @@ class RunCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
         self.assertIsInstance(
             self.mock_runner.call_args_list[0][1]["handler"], MakeLabelPassInterrupt
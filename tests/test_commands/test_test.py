@@ -20,6 +20,7 @@ class TestCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
         self.assertIsInstance(
             self.mock_runner.call_args_list[0][1]["handler"], MakeLabel
@@ -40,10 +41,26 @@ class TestCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
 
         self.assertEqual(result.exit_code, 1)
 
+    def test_watch(self):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["test", "//package_b", "--watch"])
+
+        self.assertLabelRun(
+            "//package_b",
+            Target("test"),
+            run_order=RunOrder.ORDERED,
+            with_ancestors=False,
+            with_descendants=False,
+            modified_since=None,
+            watch=True,
+        )
+        self.assertEqual(result.exit_code, 0)
+
     def test_test_output_errors(self):
         runner = CliRunner()
         result = runner.invoke(cli, ["test", "//package_b", "--test_output=errors"])
@@ -55,6 +72,7 @@ class TestCommandTest(LabelCommandTestCase):
             with_ancestors=False,
             with_descendants=False,
             modified_since=None,
+            watch=False,
         )
         self.assertIsInstance(
             self.mock_runner.call_args_list[0][1]["handler"], MakeLabelCaptureErrors
@@ -0,0 +1,239 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mazel.depcache import Dependencies, DependencyCache, stamp
+from mazel.exceptions import InvalidBuildToml
+from mazel.package import Package
+from mazel.scan import RACY_WINDOW_NS
+from mazel.workspace import Workspace
+
+from .utils import with_cache
+
+# Comfortably outside the racy window
+OLD_NS = 1_000_000_000_000_000_000
+
+
+@with_cache
+class DependencyCacheTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name)
+        self.path.joinpath("BUILD.toml").write_text("[package]\n")
+        os.utime(self.path / "BUILD.toml", ns=(OLD_NS, OLD_NS))
+
+        self.cache = DependencyCache()
+        self.dependencies = Dependencies(
+            runtimes=["python"], depends_on=["//a"], runtime_deps=["//b"]
+        )
+
+    def stamps(self):
+        return self.cache.stamps(self.path, ["BUILD.toml", "pyproject.toml"])
+
+    def test_stamp(self):
+        self.assertEqual(stamp(self.path / "BUILD.toml"), [10, OLD_NS])
+        self.assertIsNone(stamp(self.path / "missing"))
+
+    def test_lookup(self):
+        self.assertIsNone(self.cache.lookup("pkg", self.path))
+
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+
+        self.assertTrue(self.cache.changed)
+        self.assertEqual(self.cache.lookup("pkg", self.path), self.dependencies)
+        self.assertIsNone(self.cache.lookup("other", self.path))
+
+    def test_lookup_modified(self):
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+
+        self.path.joinpath("BUILD.toml").write_text("[package]\nruntimes = []\n")
+        self.assertIsNone(self.cache.lookup("pkg", self.path))
+
+    def test_lookup_created(self):
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+
+        self.path.joinpath("pyproject.toml").touch()
+        self.assertIsNone(self.cache.lookup("pkg", self.path))
+
+    def test_record_racy(self):
+        stamps = self.stamps()
+
+        # Modified just before being read
+        self.cache.record("pkg", stamps, self.dependencies, now_ns=OLD_NS + 1)
+
+        self.assertEqual(self.cache.lookup("pkg", self.path), self.dependencies)
+        self.cache.save(self.path)
+        self.assertIsNone(DependencyCache.load(self.path).lookup("pkg", self.path))
+
+        self.cache.record(
+            "pkg", stamps, self.dependencies, now_ns=OLD_NS + RACY_WINDOW_NS + 1
+        )
+        self.cache.save(self.path)
+        self.assertEqual(
+            DependencyCache.load(self.path).lookup("pkg", self.path), self.dependencies
+        )
+
+    def test_discard(self):
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+        self.cache.changed = False
+
+        self.cache.discard("pkg")
+        self.cache.discard("other")
+
+        self.assertIsNone(self.cache.lookup("pkg", self.path))
+        self.assertTrue(self.cache.changed)
+
+    def test_prune(self):
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+        self.cache.record("removed", self.stamps(), self.dependencies)
+        self.cache.changed = False
+
+        self.cache.prune(["pkg"])
+
+        self.assertEqual(list(self.cache.entries), ["pkg"])
+        self.assertTrue(self.cache.changed)
+
+    def test_consumers(self):
+        stamps = {"go.mod": None, "../go.work": None, "../../go.work": None}
+        self.cache.record("apps/api", stamps, self.dependencies)
+        self.cache.record("apps/web", {"../go.work": None}, self.dependencies)
+
+        self.assertEqual(self.cache.consumers("apps/go.work"), ["apps/api", "apps/web"])
+        self.assertEqual(self.cache.consumers("go.work"), ["apps/api"])
+        # Files in the Package itself are not indexed
+        self.assertEqual(self.cache.consumers("apps/api/go.mod"), [])
+
+        # Kept up to date once built
+        self.cache.record("apps/web", {}, self.dependencies)
+        self.cache.discard("apps/api")
+        self.cache.record("libs/go", {"../../go.work": None}, self.dependencies)
+        self.assertEqual(self.cache.consumers("apps/go.work"), [])
+        self.assertEqual(self.cache.consumers("go.work"), ["libs/go"])
+
+    def test_save_load(self):
+        self.cache.record("pkg", self.stamps(), self.dependencies)
+        self.cache.save(self.path)
+
+        self.assertFalse(self.cache.changed)
+        loaded = DependencyCache.load(self.path)
+        self.assertEqual(loaded.lookup("pkg", self.path), self.dependencies)
+
+    def test_lookup_probes(self):
+        self.cache.record(
+            "pkg", self.stamps(), self.dependencies, probes={"owner:lib/sub": "lib"}
+        )
+
+        self.assertEqual(
+            self.cache.lookup("pkg", self.path, {"owner:lib/sub": "lib"}.get),
+            self.dependencies,
+        )
+        self.assertIsNone(
+            self.cache.lookup("pkg", self.path, {"owner:lib/sub": "lib/sub"}.get)
+        )
+        self.assertIsNone(self.cache.lookup("pkg", self.path))
+
+    def test_load_missing(self):
+        self.assertEqual(DependencyCache.load(self.path).entries, {})
+
+
+@with_cache
+class WorkspaceDependencyCacheTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name)
+        self.path.joinpath("WORKSPACE.toml").touch()
+
+        self.write("a/BUILD.toml", '[package]\nruntimes = ["python"]\n')
+        self.write("a/pyproject.toml", "[tool.poetry]\n")
+        self.write("b/BUILD.toml", '[package]\nruntimes = ["python"]\n')
+        self.write(
+            "b/pyproject.toml",
+            '[tool.poetry.dependencies]\na = {path = "../a"}\n',
+        )
+        self.write("c/BUILD.toml", '[package]\ndepends_on = ["//b"]\n')
+
+    def write(self, relpath, content):
+        path = self.path.joinpath(relpath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        os.utime(path, ns=(OLD_NS, OLD_NS))
+
+    def parents(self):
+        return {
+            node.package.label_path: sorted(p.package.label_path for p in node.parents)
+            for node in Workspace(self.path).graph().nodes()
+        }
+
+    def test_warm(self):
+        expected = {"//a": [], "//b": ["//a"], "//c": ["//b"]}
+        self.assertEqual(self.parents(), expected)
+
+        with mock.patch.object(
+            Package, "read_toml", side_effect=AssertionError("parsed")
+        ):
+            self.assertEqual(self.parents(), expected)
+
+    def test_manifest_modified(self):
+        self.parents()
+
+        self.write("b/pyproject.toml", "[tool.poetry]\n")
+        with mock.patch.object(
+            Package, "read_toml", autospec=True, side_effect=Package.read_toml
+        ) as read_toml:
+            self.assertEqual(self.parents(), {"//a": [], "//b": [], "//c": ["//b"]})
+
+        # Only //b was re-read
+        self.assertCountEqual(
+            [(call.args[0].label_path, call.args[1]) for call in read_toml.mock_calls],
+            [("//b", "BUILD.toml"), ("//b", "pyproject.toml")],
+        )
+
+    def test_package_removed(self):
+        self.parents()
+
+        self.path.joinpath("c/BUILD.toml").unlink()
+        self.parents()
+
+        cache = DependencyCache.load(self.path)
+        self.assertCountEqual(cache.entries, ["a", "b"])
+
+    def test_package_added_below_path_dependency(self):
+        self.write(
+            "b/pyproject.toml",
+            '[tool.poetry.dependencies]\nsub = {path = "../a/sub"}\n',
+        )
+        self.assertEqual(self.parents()["//b"], ["//a"])
+
+        self.write("a/sub/BUILD.toml", "[package]\n")
+
+        self.assertEqual(self.parents()["//b"], ["//a/sub"])
+
+    def test_package_renamed(self):
+        # npm workspaces, resolved by name
+        self.write("js/package.json", '{"workspaces": ["*"]}')
+        self.write("js/app/BUILD.toml", '[package]\nruntimes = ["javascript"]\n')
+        self.write(
+            "js/app/package.json", '{"dependencies": {"ui": "^1", "icons": "^1"}}'
+        )
+        self.write("js/ui/BUILD.toml", "[package]\n")
+        self.write("js/ui/package.json", '{"name": "ui"}')
+        self.write("js/icons/BUILD.toml", "[package]\n")
+        self.write("js/icons/package.json", '{"name": "old-icons"}')
+        self.assertEqual(self.parents()["//js/app"], ["//js/ui"])
+
+        # A name that matched nothing
+        self.write("js/icons/package.json", '{"name": "icons"}')
+        self.assertEqual(self.parents()["//js/app"], ["//js/icons", "//js/ui"])
+
+        # Another package taking a used name: the first by path wins
+        self.write("js/icons/package.json", '{"name": "ui"}')
+        self.assertEqual(self.parents()["//js/app"], ["//js/icons"])
+
+    def test_invalid_depends_on(self):
+        self.write("c/BUILD.toml", "[package]\ndepends_on = [1]\n")
+
+        with self.assertRaises(InvalidBuildToml):
+            self.parents()
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mazel.durations import read_durations, record_durations
+
+from .utils import with_cache
+
+
+@with_cache
+class DurationsTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name)
+
+    def test_missing(self):
+        self.assertEqual(read_durations(self.path, "test"), {})
+
+    def test_record(self):
+        record_durations(self.path, "test", {"//a": 1.23456, "//b": 2})
+        record_durations(self.path, "lint", {"//a": 3})
+        record_durations(self.path, "test", {"//a": 4})
+
+        self.assertEqual(read_durations(self.path, "test"), {"//a": 4, "//b": 2})
+        self.assertEqual(read_durations(self.path, "lint"), {"//a": 3})
+        self.assertEqual(read_durations(self.path, "build"), {})
+
+    def test_rounded(self):
+        record_durations(self.path, "test", {"//a": 1.23456})
+
+        self.assertEqual(read_durations(self.path, "test"), {"//a": 1.235})
+
+    def test_without_fcntl(self):
+        # e.g. on Windows
+        with mock.patch.dict(sys.modules, {"fcntl": None}):
+            record_durations(self.path, "test", {"//a": 1})
+
+        self.assertEqual(read_durations(self.path, "test"), {"//a": 1})
+
+    def test_empty(self):
+        record_durations(self.path, "test", {})
+
+        self.assertFalse(self.path.joinpath(".mazel").exists())
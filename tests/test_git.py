@@ -1,8 +1,9 @@
+import subprocess
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import TestCase, mock
 
-from mazel.git import git_modified_files
+from mazel.git import escape_pathspec, git_ignored, git_ls_files, git_modified_files
 from mazel.types import CommitRange
 
 
@@ -48,3 +49,82 @@ class GitModifiedFilesTest(TestCase):
             text=True,
             check=True,
         )
+
+
+class GitLsFilesTest(TestCase):
+    def run(self, result=None):
+        with mock.patch(
+            "mazel.git.subprocess.run", autospec=True
+        ) as self.mock_run, mock.patch(
+            "mazel.git.cd", autospec=True
+        ) as self.mock_cd, TemporaryDirectory() as temp_dir:
+
+            self.mock_run.return_value.stdout = (
+                "package_a/BUILD.toml\0dir with space/BUILD.toml\0"
+            )
+            self.temp_dir = Path(temp_dir)
+            super().run(result=result)
+
+    def test(self):
+        files = git_ls_files(self.temp_dir, ["BUILD.toml", "*/BUILD.toml"])
+
+        self.assertEqual(
+            files, [Path("package_a/BUILD.toml"), Path("dir with space/BUILD.toml")]
+        )
+
+        self.mock_run.assert_called_once_with(
+            ["git", "ls-files", "-z", "--cached", "--", "BUILD.toml", "*/BUILD.toml"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.mock_cd.assert_called_once_with(self.temp_dir)
+
+    def test_untracked(self):
+        git_ls_files(self.temp_dir, ["BUILD.toml"], untracked=True)
+
+        self.mock_run.assert_called_once_with(
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "BUILD.toml",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+
+class EscapePathspecTest(TestCase):
+    def test(self):
+        self.assertEqual(escape_pathspec("routes/[id]"), "routes/\\[id]")
+        self.assertEqual(escape_pathspec("a*b?"), "a\\*b\\?")
+        self.assertEqual(escape_pathspec("a\\b"), "a\\\\b")
+        self.assertEqual(escape_pathspec("libs/a"), "libs/a")
+
+
+class GitIgnoredTest(TestCase):
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name)
+        self.path.joinpath(".gitignore").write_text("build/\n")
+
+    def test(self):
+        subprocess.run(["git", "init", "-q"], cwd=self.path, check=True)
+
+        self.assertEqual(
+            git_ignored(self.path, [self.path / "build/out", self.path / "src/a.py"]),
+            {self.path / "build/out"},
+        )
+
+    def test_not_a_git_repository(self):
+        self.assertEqual(git_ignored(self.path, [self.path / "build/out"]), set())
+
+    def test_no_paths(self):
+        self.assertEqual(git_ignored(self.path, []), set())
@@ -2,7 +2,8 @@ import random
 from unittest import TestCase
 from unittest.mock import create_autospec
 
-from mazel.graph import Node, PackageGraph
+from mazel.exceptions import CyclicDependency
+from mazel.graph import Node, PackageGraph, bit_indices, bits_of
 from mazel.package import Package
 
 from .test_package import make_package
@@ -59,6 +60,27 @@ class WalkLogger(object):
         return len(self.steps)
 
 
+class StubPackage(object):
+    """Cheaper than create_autospec(Package), for larger graphs"""
+
+    def __init__(self, label_path):
+        self.label_path = label_path
+        self.dependencies = []
+
+    def depends_on(self):
+        return self.dependencies
+
+
+def make_graph(edges, condense_cycles=False):
+    """Packages named by label path, with their dependencies' label paths"""
+    packages = {label_path: StubPackage(label_path) for label_path in edges}
+    for label_path, deps in edges.items():
+        packages[label_path].dependencies = [packages[dep] for dep in deps]
+    shuffled = list(packages.values())
+    random.shuffle(shuffled)
+    return PackageGraph.from_packages(shuffled, condense_cycles)
+
+
 class PackageGraphTest(TestCase):
     def setUp(self):
         self.pkg_one = create_autospec(Package)
@@ -141,5 +163,318 @@ class PackageGraphTest(TestCase):
 
         self.assertEqual(result, [pkg_one, pkg_two, pkg_three])
 
+    def test_add(self):
+        graph = PackageGraph.from_packages([self.pkg_one])
+        pkg_four = create_autospec(Package)
+
+        node = graph.add(pkg_four)
+
+        self.assertIs(graph.add(pkg_four), node)
+        self.assertCountEqual(graph._nodes.keys(), [self.pkg_one, pkg_four])
+        self.assertEqual(node.parents, [])
+        self.assertEqual(node.children, [])
+
+    def test_remove(self):
+        pkg_one, pkg_two, pkg_three = self.pkg_one, self.pkg_two, self.pkg_three
+        graph = PackageGraph.from_packages([pkg_one, pkg_two, pkg_three])
+
+        self.assertEqual(graph.remove(pkg_two), [pkg_three])
+
+        self.assertCountEqual(graph._nodes.keys(), [pkg_one, pkg_three])
+        self.assertCountEqual(graph._nodes[pkg_one].children, [Node(pkg_three)])
+        self.assertCountEqual(graph._nodes[pkg_three].parents, [Node(pkg_one)])
+        self.assertEqual(graph.remove(pkg_two), [])
+
+    def test_set_parents(self):
+        pkg_one, pkg_two, pkg_three = self.pkg_one, self.pkg_two, self.pkg_three
+        graph = PackageGraph.from_packages([pkg_one, pkg_two, pkg_three])
+
+        graph.set_parents(pkg_three, [pkg_two])
+
+        self.assertCountEqual(graph._nodes[pkg_three].parents, [Node(pkg_two)])
+        self.assertCountEqual(graph._nodes[pkg_one].children, [Node(pkg_two)])
+        self.assertCountEqual(graph._nodes[pkg_two].children, [Node(pkg_three)])
+
+        graph.set_parents(pkg_two, [])
+
+        self.assertEqual(graph._nodes[pkg_two].parents, [])
+        self.assertEqual(graph._nodes[pkg_one].children, [])
+
+    def plan_labels(self, graph):
+        return [(node.package.label_path, level) for node, level in graph.plan()]
+
+    def test_plan(self):
+        graph = make_graph(
+            {
+                "//d": ["//b", "//c"],
+                "//c": ["//a"],
+                "//b": ["//a"],
+                "//a": [],
+                "//z": [],
+                "//e": ["//d", "//z"],
+                "//f": ["//z"],
+            }
+        )
+
+        # Sorted by label path within each level, however the packages are ordered
+        self.assertEqual(
+            self.plan_labels(graph),
+            [
+                ("//a", 0),
+                ("//z", 0),
+                ("//b", 1),
+                ("//c", 1),
+                ("//f", 1),
+                ("//d", 2),
+                ("//e", 3),
+            ],
+        )
+        self.assertEqual(
+            self.plan_labels(graph.invert()),
+            [
+                ("//e", 0),
+                ("//f", 0),
+                ("//d", 1),
+                ("//z", 1),
+                ("//b", 2),
+                ("//c", 2),
+                ("//a", 3),
+            ],
+        )
+
+    def test_from_packages_cycle(self):
+        with self.assertRaisesRegex(
+            CyclicDependency, "^Circular dependencies: //b -> //c -> //b$"
+        ):
+            make_graph(
+                {"//a": [], "//b": ["//a", "//c"], "//c": ["//b"], "//d": ["//c"]}
+            )
+
+    def test_from_packages_cycles(self):
+        with self.assertRaisesRegex(
+            CyclicDependency,
+            "^Circular dependencies: //a -> //a; //b -> //c -> //d -> //b$",
+        ):
+            make_graph(
+                {
+                    "//a": ["//a"],
+                    "//b": ["//c"],
+                    "//c": ["//d"],
+                    "//d": ["//b"],
+                }
+            )
+
+    def test_components(self):
+        graph = make_graph(
+            {
+                "//a": [],
+                "//b": ["//a", "//c"],
+                "//c": ["//b"],
+                "//d": ["//c"],
+            },
+            condense_cycles=True,
+        )
+
+        components = [
+            [node.package.label_path for node in component]
+            for component in graph.components()
+        ]
+
+        self.assertCountEqual(components, [["//a"], ["//b", "//c"], ["//d"]])
+        # Children before parents
+        self.assertLess(components.index(["//d"]), components.index(["//b", "//c"]))
+        self.assertLess(components.index(["//b", "//c"]), components.index(["//a"]))
+
+        self.assertEqual(
+            [[node.package.label_path for node in cycle] for cycle in graph.cycles()],
+            [["//b", "//c", "//b"]],
+        )
+
+    def test_plan_cycle(self):
+        graph = make_graph({"//a": [], "//b": ["//a"], "//c": ["//b"]})
+        packages = {node.package.label_path: node.package for node in graph.nodes()}
+        # e.g. a refresh introducing a cycle
+        graph.set_parents(packages["//b"], [packages["//a"], packages["//c"]])
+
+        with self.assertRaisesRegex(CyclicDependency, "//b -> //c -> //b"):
+            graph.plan()
+
+    def test_plan_condense_cycles(self):
+        graph = make_graph(
+            {
+                "//a": [],
+                "//b": ["//a", "//c"],
+                "//c": ["//b", "//z"],
+                "//d": ["//c"],
+                "//z": [],
+                "//y": ["//z"],
+            },
+            condense_cycles=True,
+        )
+
+        # //b and //c are planned together, after both //a and //z
+        self.assertEqual(
+            self.plan_labels(graph),
+            [
+                ("//a", 0),
+                ("//z", 0),
+                ("//b", 1),
+                ("//c", 1),
+                ("//y", 1),
+                ("//d", 2),
+            ],
+        )
+        self.assertEqual(
+            self.plan_labels(graph.invert()),
+            [
+                ("//d", 0),
+                ("//y", 0),
+                ("//b", 1),
+                ("//c", 1),
+                ("//a", 2),
+                ("//z", 2),
+            ],
+        )
+
+    def test_components_long_cycle(self):
+        count = 5000
+        graph = make_graph(
+            {f"//p{i:04}": [f"//p{(i - 1) % count:04}"] for i in range(count)},
+            condense_cycles=True,
+        )
+
+        self.assertEqual(len(graph.components()), 1)
+        self.assertEqual(len(graph.cycles()[0]), count + 1)
+
+    def test_plan_long_chain(self):
+        count = 5000
+        graph = make_graph(
+            {f"//p{i:04}": [f"//p{i - 1:04}"] if i else [] for i in range(count)}
+        )
+
+        plan = graph.plan()
+
+        self.assertEqual(plan[-1][0].package.label_path, f"//p{count - 1:04}")
+        self.assertEqual(plan[-1][1], count - 1)
+
+    def test_compact_forgotten(self):
+        graph = make_graph({"//a": [], "//b": ["//a"]})
+        packages = {node.package.label_path: node.package for node in graph.nodes()}
+        compact = graph.compact()
+
+        self.assertIs(graph.compact(), compact)
+        graph.set_parents(packages["//b"], [])
+        self.assertIsNot(graph.compact(), compact)
+        self.assertEqual(graph.compact().parents(1).tolist(), [])
+
     # def test_walk(self):
     #     self.fail("TODO walk()")
+
+
+class CompactGraphTest(TestCase):
+    def setUp(self):
+        self.graph = make_graph(
+            {
+                "//a": [],
+                "//b": ["//a"],
+                "//c": ["//a"],
+                "//d": ["//b", "//c"],
+                "//e": ["//d"],
+                "//z": [],
+            }
+        )
+        self.compact = self.graph.compact()
+
+    def labels(self, bits, compact=None):
+        packages = (compact or self.compact).packages_of(bits)
+        return sorted(package.label_path for package in packages)
+
+    def bits(self, *label_paths):
+        return self.compact.bits(
+            package
+            for package in self.compact.packages
+            if package.label_path in label_paths
+        )
+
+    def test_csr(self):
+        compact = self.compact
+        d = compact.index[next(p for p in compact.packages if p.label_path == "//d")]
+
+        self.assertEqual(len(compact.parent_offsets), 7)
+        self.assertEqual(len(compact.parent_indices), 5)
+        self.assertEqual(
+            sorted(compact.packages[i].label_path for i in compact.parents(d)),
+            ["//b", "//c"],
+        )
+        self.assertEqual(
+            [compact.packages[i].label_path for i in compact.children(d)], ["//e"]
+        )
+
+    def test_with_ancestors(self):
+        self.assertEqual(
+            self.labels(self.compact.with_ancestors(self.bits("//d"))),
+            ["//a", "//b", "//c", "//d"],
+        )
+        self.assertEqual(
+            self.labels(self.compact.with_ancestors(self.bits("//b", "//z"))),
+            ["//a", "//b", "//z"],
+        )
+
+    def test_with_descendants(self):
+        self.assertEqual(
+            self.labels(self.compact.with_descendants(self.bits("//b"))),
+            ["//b", "//d", "//e"],
+        )
+        self.assertEqual(self.compact.with_descendants(0), 0)
+
+    def test_inverted(self):
+        self.compact.with_ancestors(0)
+        inverted = self.graph.invert().compact()
+
+        self.assertEqual(
+            self.labels(inverted.with_descendants(self.bits("//d")), inverted),
+            ["//a", "//b", "//c", "//d"],
+        )
+        self.assertEqual(
+            self.labels(inverted.with_ancestors(self.bits("//b")), inverted),
+            ["//b", "//d", "//e"],
+        )
+
+    def test_cycle(self):
+        graph = make_graph(
+            {"//a": [], "//b": ["//a", "//c"], "//c": ["//b"], "//d": ["//c"]},
+            condense_cycles=True,
+        )
+        compact = graph.compact()
+        b = compact.bits(p for p in compact.packages if p.label_path == "//b")
+
+        self.assertEqual(
+            self.labels(compact.with_ancestors(b), compact), ["//a", "//b", "//c"]
+        )
+        self.assertEqual(
+            self.labels(compact.with_descendants(b), compact), ["//b", "//c", "//d"]
+        )
+
+    def test_long_chain(self):
+        count = 5000
+        graph = make_graph(
+            {f"//p{i:04}": [f"//p{i - 1:04}"] if i else [] for i in range(count)}
+        )
+        compact = graph.compact()
+        last = compact.bits(
+            p for p in compact.packages if p.label_path == f"//p{count - 1:04}"
+        )
+
+        self.assertEqual(bin(compact.with_ancestors(last)).count("1"), count)
+
+
+class BitIndicesTest(TestCase):
+    def test_bit_indices(self):
+        self.assertEqual(bit_indices(0), [])
+        self.assertEqual(bit_indices(0b101001), [0, 3, 5])
+        self.assertEqual(bit_indices(1 << 10000), [10000])
+
+    def test_bits_of(self):
+        self.assertEqual(bits_of([]), 0)
+        self.assertEqual(bits_of([5, 0, 3]), 0b101001)
+        self.assertEqual(bits_of(iter([10000])), 1 << 10000)
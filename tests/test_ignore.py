@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from mazel.ignore import IgnoreRules, parse_line
+
+
+class ParseLineTest(TestCase):
+    def test_comment_and_blank(self):
+        self.assertIsNone(parse_line("# comment"))
+        self.assertIsNone(parse_line(""))
+        self.assertIsNone(parse_line("   "))
+        self.assertIsNone(parse_line("/"))
+
+    def test_negated(self):
+        negated, _ = parse_line("!keep")
+        self.assertTrue(negated)
+
+        negated, _ = parse_line("\\!literal")
+        self.assertFalse(negated)
+
+
+class IgnoreRulesTest(TestCase):
+    def assertIgnored(self, rules, *paths):
+        for path in paths:
+            self.assertTrue(rules.is_ignored(path), path)
+
+    def assertNotIgnored(self, rules, *paths):
+        for path in paths:
+            self.assertFalse(rules.is_ignored(path), path)
+
+    def test_empty(self):
+        rules = IgnoreRules([])
+        self.assertFalse(rules)
+        self.assertNotIgnored(rules, "node_modules", "a/b")
+
+    def test_name_any_depth(self):
+        rules = IgnoreRules(["node_modules", "dist/"])
+        self.assertTrue(rules)
+        self.assertIgnored(
+            rules, "node_modules", "js/app/node_modules", "dist", "a/dist"
+        )
+        self.assertNotIgnored(rules, "node_modules_x", "x_node_modules", "distx")
+
+    def test_anchored(self):
+        rules = IgnoreRules(["/build", "tools/out"])
+        self.assertIgnored(rules, "build", "tools/out")
+        self.assertNotIgnored(rules, "libs/build", "libs/tools/out")
+
+    def test_wildcards(self):
+        rules = IgnoreRules(["*.egg-info", "tmp?", "[ab]x", "[!c]y"])
+        self.assertIgnored(rules, "mazel.egg-info", "a/b.egg-info", "tmp1", "ax", "by")
+        self.assertNotIgnored(rules, "tmp12", "cx", "cy", "a/b.egg-info/c")
+
+    def test_double_star(self):
+        rules = IgnoreRules(["**/vendor", "docs/**", "a/**/z"])
+        self.assertIgnored(rules, "vendor", "go/svc/vendor", "docs/api", "docs/a/b")
+        self.assertIgnored(rules, "a/z", "a/b/z", "a/b/c/z")
+        self.assertNotIgnored(rules, "docs", "b/a/z", "vendors")
+
+    def test_negation_last_match_wins(self):
+        rules = IgnoreRules(["build", "!libs/build", "libs/build"])
+        self.assertIgnored(rules, "build", "libs/build")
+
+        rules = IgnoreRules(["build", "!libs/build"])
+        self.assertIgnored(rules, "build", "tools/build")
+        self.assertNotIgnored(rules, "libs/build")
+
+    def test_patterns(self):
+        rules = IgnoreRules(["# comment", "node_modules ", "", "!keep"])
+        self.assertEqual(rules.patterns, ["node_modules", "!keep"])
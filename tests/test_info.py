@@ -38,10 +38,19 @@ class InfoTest(TestCase):
                 "active_package",
                 "active_package_path",
                 "packages",
+                "scanned_dirs",
+                "pruned_dirs",
                 "py_project_poetry_name",
             ],
         )
 
+    def test_fact_scanned_dirs(self):
+        # workspace root, nested, non_package, the 3 packages and package_b/nested
+        self.assertEqual(self.info.get_fact("scanned_dirs"), "7")
+
+    def test_fact_pruned_dirs(self):
+        self.assertEqual(self.info.get_fact("pruned_dirs"), "0")
+
     def test_fact_py_project_poetry_name(self):
         with patch("mazel.package.Package.path_exists", autospec=True) as path_exists:
             with patch("mazel.package.Package.read_toml", autospec=True) as read_toml:
@@ -34,6 +34,27 @@ class LabelTest(TestCase):
     def test_parse_only_target_without_separator(self):
         self.assertEqual(Label.parse("action"), Label(None, "action"))
 
+    def test_parse_recursive(self):
+        self.assertEqual(Label.parse("//tools/..."), Label("//tools/...", None))
+        self.assertEqual(Label.parse("..."), Label("...", None))
+        self.assertEqual(Label.parse("tools/...:action"), Label("tools/...", "action"))
+
+    def test_recursive(self):
+        self.assertTrue(Label("//tools/...", None).recursive)
+        self.assertTrue(Label("//...", None).recursive)
+        self.assertTrue(Label("...", None).recursive)
+        self.assertFalse(Label("//tools", None).recursive)
+        self.assertFalse(Label("//tools...", None).recursive)
+        self.assertFalse(Label(None, "action").recursive)
+
+    def test_base_path(self):
+        self.assertEqual(Label("//tools/...", None).base_path, "//tools")
+        self.assertEqual(Label("//...", None).base_path, "//")
+        self.assertEqual(Label("tools/...", None).base_path, "tools")
+        self.assertEqual(Label("...", None).base_path, ".")
+        self.assertEqual(Label("//tools", None).base_path, "//tools")
+        self.assertIsNone(Label(None, "action").base_path)
+
     def test_is_absolute(self):
         self.assertTrue(Label.is_absolute("//tools/app"))
         self.assertTrue(Label.is_absolute("//"))
@@ -2,6 +2,7 @@ from pathlib import Path
 from unittest import TestCase
 from unittest.mock import Mock, PropertyMock, patch
 
+from mazel.depcache import DependencyCache
 from mazel.exceptions import InvalidBuildToml, PackageNotFound
 from mazel.package import Package
 from mazel.runtimes import PythonRuntime
@@ -9,6 +10,12 @@ from mazel.workspace import Workspace
 
 from .utils import abspath, example_workspace
 
+# Ignore the DependencyCache persisted in the example workspace, so the mocked
+# BUILD.toml is read
+EMPTY_CACHE = patch(
+    "mazel.workspace.DependencyCache.load", side_effect=lambda path: DependencyCache()
+)
+
 
 def make_package(path: str, workspace=None) -> Package:
     if workspace is None:
@@ -73,6 +80,17 @@ class PackageTest(TestCase):
         expected = {"package": {"runtimes": ["python"]}}
         self.assertEqual(package.read_toml("BUILD.toml"), expected)
 
+    def test_read_toml_plain_types(self):
+        package = Package(
+            abspath("examples/simple_workspace/package_b"),
+            workspace=Workspace(abspath("examples/simple_workspace")),
+        )
+        toml = package.read_toml("pyproject.toml")
+
+        # Plain dicts, not tomlkit's style preserving containers
+        self.assertIs(type(toml), dict)
+        self.assertIs(type(toml["tool"]["poetry"]["dependencies"]["package_c"]), dict)
+
     def test_build_toml(self):
         # similar test to test_read_toml
         package = Package(
@@ -126,7 +144,8 @@ class PackageTest(TestCase):
         with self.assertRaises(PackageNotFound):
             package.relative_package(Path("../package_x"))
 
-    def test_runtimes(self):
+    @EMPTY_CACHE
+    def test_runtimes(self, load_cache):
         package = Package(
             abspath("examples/simple_workspace/package_a"),
             workspace=Workspace(abspath("examples/simple_workspace")),
@@ -137,7 +156,22 @@ class PackageTest(TestCase):
         self.assertEqual(len(runtimes), 1)
         self.assertIsInstance(runtimes[0], PythonRuntime)
 
-    def test_runtimes_not_array(self):
+    @EMPTY_CACHE
+    def test_runtimes_cached(self, load_cache):
+        package = Package(
+            abspath("examples/simple_workspace/package_a"),
+            workspace=Workspace(abspath("examples/simple_workspace")),
+        )
+        package.read_toml = Mock(return_value={"package": {"runtimes": ["python"]}})
+
+        runtimes = package.runtimes()
+        self.assertIs(package.runtimes()[0], runtimes[0])
+
+        package.invalidate()
+        self.assertIsNot(package.runtimes()[0], runtimes[0])
+
+    @EMPTY_CACHE
+    def test_runtimes_not_array(self, load_cache):
         package = Package(
             abspath("examples/simple_workspace/package_a"),
             workspace=Workspace(abspath("examples/simple_workspace")),
@@ -148,7 +182,8 @@ class PackageTest(TestCase):
         self.assertEqual(len(runtimes), 1)
         self.assertIsInstance(runtimes[0], PythonRuntime)
 
-    def test_runtimes_no_runtime_defined(self):
+    @EMPTY_CACHE
+    def test_runtimes_no_runtime_defined(self, load_cache):
         package = Package(
             abspath("examples/simple_workspace/package_a"),
             workspace=Workspace(abspath("examples/simple_workspace")),
@@ -158,7 +193,8 @@ class PackageTest(TestCase):
         runtimes = package.runtimes()
         self.assertEqual(len(runtimes), 0)
 
-    def test_runtimes_no_package_section(self):
+    @EMPTY_CACHE
+    def test_runtimes_no_package_section(self, load_cache):
         package = Package(
             abspath("examples/simple_workspace/package_a"),
             workspace=Workspace(abspath("examples/simple_workspace")),
@@ -182,7 +218,49 @@ class PackageTest(TestCase):
             ],
         )
 
-    def test_depends_on_duplicate(self):
+    def test_metadata(self):
+        package = make_package("examples/simple_workspace/package_a")
+
+        metadata = package.metadata()
+
+        self.assertIs(package.metadata(), metadata)
+        self.assertEqual(metadata.label_path, "//package_a")
+        self.assertEqual(metadata.runtimes, ("python", "docker"))
+        self.assertEqual(metadata.depends_on, ("//package_b",))
+        self.assertCountEqual(
+            metadata.dependencies,
+            [
+                package.relative_package("../package_b"),
+                package.relative_package("../nested/package_c"),
+            ],
+        )
+        self.assertNotIn("build_toml", package.__dict__)
+
+    def test_metadata_immutable(self):
+        metadata = make_package("examples/simple_workspace/package_a").metadata()
+
+        with self.assertRaises(AttributeError):
+            metadata.runtimes = ()
+        self.assertFalse(hasattr(metadata, "__dict__"))
+
+    def test_metadata_invalidate(self):
+        package = make_package("examples/simple_workspace/package_a")
+        metadata = package.metadata()
+
+        package.invalidate()
+
+        self.assertIsNot(package.metadata(), metadata)
+        self.assertEqual(package.metadata(), metadata)
+
+    def test_manifests(self):
+        package = make_package("examples/simple_workspace/package_a")
+        self.assertEqual(package.manifests(), ["pyproject.toml", "Dockerfile"])
+
+        package = make_package("examples/simple_workspace/nested/package_c")
+        self.assertEqual(package.manifests(), [])
+
+    @EMPTY_CACHE
+    def test_depends_on_duplicate(self, load_cache):
         package = Package(
             abspath("examples/simple_workspace/package_b"),
             workspace=Workspace(abspath("examples/simple_workspace")),
@@ -0,0 +1,139 @@
+import re
+from unittest import TestCase
+
+from mazel.exceptions import InvalidQuery, PackageNotFound
+from mazel.query import Query, tokenize
+from mazel.workspace import Workspace
+
+from .utils import TemporaryWorkspaceTestCase
+
+
+class TokenizeTest(TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("deps(//libs/my-lib, 2)+'//a b'-//c"),
+            [
+                ("word", "deps"),
+                ("punctuation", "("),
+                ("word", "//libs/my-lib"),
+                ("punctuation", ","),
+                ("word", "2"),
+                ("punctuation", ")"),
+                ("punctuation", "+"),
+                ("quoted", "//a b"),
+                ("punctuation", "-"),
+                ("word", "//c"),
+            ],
+        )
+
+    def test_unterminated_quote(self):
+        with self.assertRaises(InvalidQuery):
+            tokenize("deps('//a)")
+
+
+class QueryTest(TemporaryWorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+
+        #   libs/common <- libs/db <- services/api
+        #               <- libs/web <-/
+        #   tools/lint
+        self.write_package("libs/common")
+        self.write_package("libs/db", ["//libs/common"])
+        self.write_package("libs/web", ["//libs/common"])
+        self.write_package("services/api", ["//libs/db", "//libs/web"])
+        self.write_package("tools/lint")
+
+        self.query = Query(Workspace(self.path))
+
+    def assertQuery(self, expression, expected):
+        self.assertEqual(
+            [package.label_path for package in self.query.evaluate(expression)],
+            expected,
+        )
+
+    def test_labels(self):
+        self.assertQuery("//libs/db", ["//libs/db"])
+        self.assertQuery("//libs/...", ["//libs/common", "//libs/db", "//libs/web"])
+        self.assertQuery("'//tools/lint'", ["//tools/lint"])
+
+    def test_unknown_label(self):
+        with self.assertRaises(PackageNotFound):
+            self.query.evaluate("//libs/nope")
+
+    def test_deps(self):
+        self.assertQuery(
+            "deps(//services/api)",
+            ["//libs/common", "//libs/db", "//libs/web", "//services/api"],
+        )
+        self.assertQuery(
+            "deps(//services/api, 1)", ["//libs/db", "//libs/web", "//services/api"]
+        )
+        self.assertQuery("deps(//services/api, 0)", ["//services/api"])
+
+    def test_rdeps(self):
+        self.assertQuery(
+            "rdeps(//..., //libs/common)",
+            ["//libs/common", "//libs/db", "//libs/web", "//services/api"],
+        )
+        self.assertQuery(
+            "rdeps(//libs/..., //libs/common)",
+            ["//libs/common", "//libs/db", "//libs/web"],
+        )
+        self.assertQuery(
+            "rdeps(//..., //libs/common, 1)",
+            ["//libs/common", "//libs/db", "//libs/web"],
+        )
+
+    def test_somepath(self):
+        self.assertQuery(
+            "somepath(//services/api, //libs/common)",
+            ["//libs/common", "//libs/db", "//services/api"],
+        )
+        self.assertQuery("somepath(//libs/common, //services/api)", [])
+        self.assertQuery("somepath(//tools/lint, //libs/common)", [])
+
+    def test_allpaths(self):
+        self.assertQuery(
+            "allpaths(//services/api, //libs/common)",
+            ["//libs/common", "//libs/db", "//libs/web", "//services/api"],
+        )
+        self.assertQuery("allpaths(//libs/db, //libs/web)", [])
+
+    def test_operators(self):
+        self.assertQuery(
+            "//libs/... - //libs/db + //tools/lint",
+            ["//libs/common", "//libs/web", "//tools/lint"],
+        )
+        self.assertQuery("//libs/... - (//libs/db + //libs/web)", ["//libs/common"])
+        self.assertQuery(
+            "deps(//libs/db) intersect deps(//libs/web)", ["//libs/common"]
+        )
+        self.assertQuery("deps(//libs/db) ^ //libs/...", ["//libs/common", "//libs/db"])
+        self.assertQuery("//libs/db union //libs/web except //libs/db", ["//libs/web"])
+
+    def test_set(self):
+        self.assertQuery("set(//tools/lint //libs/db)", ["//libs/db", "//tools/lint"])
+        self.assertQuery("set()", [])
+
+    def test_edges(self):
+        packages = self.query.evaluate("deps(//libs/db) + //services/api")
+
+        self.assertEqual(
+            [(a.label_path, b.label_path) for a, b in self.query.edges(packages)],
+            [("//libs/db", "//libs/common"), ("//services/api", "//libs/db")],
+        )
+
+    def test_invalid(self):
+        for expression, message in [
+            ("deps(//libs/db", "unexpected end"),
+            ("deps(//libs/db))", "unexpected ')'"),
+            ("depz(//libs/db)", "unknown function depz"),
+            ("deps(//libs/db, two)", "expected a depth, not 'two'"),
+            ("somepath(//libs/db)", "expected ',', not ')'"),
+            ("//libs/db:test", "not the target '//libs/db:test'"),
+            ("//libs/db +", "unexpected end"),
+        ]:
+            with self.subTest(expression):
+                with self.assertRaisesRegex(InvalidQuery, re.escape(message)):
+                    self.query.evaluate(expression)
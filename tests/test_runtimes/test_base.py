@@ -1,23 +1,53 @@
+import os
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+from pathlib import Path
 from unittest import TestCase
-from unittest.mock import create_autospec
+from unittest.mock import create_autospec, patch
 
+import mazel
 from mazel.exceptions import RuntimeNotFound
 from mazel.package import Package
 from mazel.runtimes import (
+    CargoRuntime,
     DockerRuntime,
     GoRuntime,
     JavascriptRuntime,
     MeteorRuntime,
     PythonRuntime,
     Runtime,
+    base,
 )
 
 
+class CustomRuntime(Runtime):
+    runtime_label = "custom"
+
+    def workspace_dependencies(self):
+        return []
+
+
+NOT_A_RUNTIME = object()
+
+
 class RuntimeTest(TestCase):
+    def setUp(self):
+        base.plugin_runtimes.cache_clear()
+        self.addCleanup(base.plugin_runtimes.cache_clear)
+        self.addCleanup(base._loaded.pop, "custom", None)
+
     def test_runtime_implementations(self):
         self.assertCountEqual(
             Runtime.implementations(),
-            [DockerRuntime, GoRuntime, JavascriptRuntime, MeteorRuntime, PythonRuntime],
+            [
+                CargoRuntime,
+                DockerRuntime,
+                GoRuntime,
+                JavascriptRuntime,
+                MeteorRuntime,
+                PythonRuntime,
+            ],
         )
 
     def test_resolve(self):
@@ -31,3 +61,61 @@ class RuntimeTest(TestCase):
         package = create_autospec(Package)
         with self.assertRaises(RuntimeNotFound):
             Runtime.resolve("badruntime", package)
+
+    def test_implementation_builtin_labels(self):
+        for label in base.BUILTIN_RUNTIMES:
+            self.assertEqual(Runtime.implementation(label).runtime_label, label)
+
+    @patch("importlib.metadata.entry_points", autospec=True)
+    def test_plugin(self, entry_points):
+        entry_points.return_value = [
+            EntryPoint("custom", f"{__name__}:CustomRuntime", base.ENTRY_POINT_GROUP),
+            # Can not replace a built in Runtime
+            EntryPoint("python", f"{__name__}:CustomRuntime", base.ENTRY_POINT_GROUP),
+        ]
+
+        self.assertIs(Runtime.implementation("custom"), CustomRuntime)
+        self.assertIs(Runtime.implementation("python"), PythonRuntime)
+        self.assertIn(CustomRuntime, Runtime.implementations())
+        entry_points.assert_called_once_with(group=base.ENTRY_POINT_GROUP)
+
+    @patch("importlib.metadata.entry_points", autospec=True)
+    def test_builtin_skips_plugins(self, entry_points):
+        Runtime.implementation("python")
+
+        entry_points.assert_not_called()
+
+    @patch.object(base, "plugin_runtimes", autospec=True)
+    def test_plugin_not_importable(self, plugin_runtimes):
+        plugin_runtimes.return_value = {"custom": "mazel_missing.runtime:Runtime"}
+
+        with self.assertRaisesRegex(RuntimeNotFound, "Unable to load"):
+            Runtime.implementation("custom")
+
+    @patch.object(base, "plugin_runtimes", autospec=True)
+    def test_plugin_missing_attribute(self, plugin_runtimes):
+        plugin_runtimes.return_value = {"custom": f"{__name__}:MissingRuntime"}
+
+        with self.assertRaisesRegex(RuntimeNotFound, "Unable to load"):
+            Runtime.implementation("custom")
+
+    @patch.object(base, "plugin_runtimes", autospec=True)
+    def test_plugin_not_a_runtime(self, plugin_runtimes):
+        plugin_runtimes.return_value = {"custom": f"{__name__}:NOT_A_RUNTIME"}
+
+        with self.assertRaisesRegex(RuntimeNotFound, "is not a Runtime"):
+            Runtime.implementation("custom")
+
+    def test_lazy_import(self):
+        code = (
+            "import sys\n"
+            "from mazel.runtimes import Runtime\n"
+            "Runtime.implementation('python')\n"
+            "print(sorted(m for m in sys.modules if m.startswith('mazel.runtimes.')))\n"
+        )
+        env = dict(os.environ, PYTHONPATH=str(Path(mazel.__file__).parents[1]))
+        output = subprocess.check_output([sys.executable, "-c", code], env=env)
+
+        self.assertEqual(
+            output.decode().strip(), "['mazel.runtimes.base', 'mazel.runtimes.python']"
+        )
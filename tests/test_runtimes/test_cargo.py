@@ -0,0 +1,165 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from textwrap import dedent
+
+from mazel.exceptions import PackageNotFound
+from mazel.runtimes import CargoRuntime
+from mazel.workspace import Workspace
+
+from ..utils import TemporaryWorkspaceTestCase
+from .utils import RuntimeTestCase
+
+EXAMPLE_CARGO_TOML = """\
+[package]
+name = "api"
+
+[dependencies]
+serde = "1.0"
+common = { path = "../../crates/common" }
+models = { workspace = true, features = ["json"] }
+
+[dev-dependencies]
+testing = { path = "../../crates/testing" }
+
+[build-dependencies]
+codegen = { version = "0.1", path = "../../crates/codegen" }
+
+[target.'cfg(unix)'.dependencies]
+unix = { path = "../../crates/unix" }
+"""
+
+ROOT_CARGO_TOML = """\
+[workspace]
+members = ["crates/*", "services/api"]
+exclude = ["crates/unix"]
+
+[workspace.dependencies]
+models = { path = "crates/models" }
+serde = "1.0"
+"""
+
+
+class CargoRuntimeTest(RuntimeTestCase, TemporaryWorkspaceTestCase):
+    runtime_cls = CargoRuntime
+
+    def setUp(self):
+        super().setUp()
+        for name in ["common", "testing", "codegen", "unix", "models"]:
+            self.write_crate(f"crates/{name}")
+
+    def write_crate(self, name, cargo_toml=None):
+        if cargo_toml is None:
+            cargo_toml = f'[package]\nname = "{Path(name).name}"\n'
+        self.write_package(
+            name, runtimes=["cargo"], files={"Cargo.toml": dedent(cargo_toml)}
+        )
+
+    def runtime(self, name):
+        return self.make_runtime(Workspace(self.path).get_package(self.path / name))
+
+    def dependencies(self, name):
+        return [p.label_path for p in self.runtime(name).workspace_dependencies()]
+
+    def test_runtime_label(self):
+        runtime = self.make_runtime()
+        self.assertEqual(runtime.runtime_label, "cargo")
+
+    def test_workspace_dependencies(self):
+        self.write_crate("services/api", EXAMPLE_CARGO_TOML)
+        self.path.joinpath("Cargo.toml").write_text(ROOT_CARGO_TOML)
+
+        runtime = self.runtime("services/api")
+        self.assertEqual(
+            [p.label_path for p in runtime.workspace_dependencies()],
+            [
+                "//crates/common",
+                "//crates/models",
+                "//crates/testing",
+                "//crates/codegen",
+                "//crates/unix",
+            ],
+        )
+        # Looking for the Cargo workspace's root
+        self.assertCountEqual(runtime.consulted, ["../Cargo.toml", "../../Cargo.toml"])
+
+    def test_explicit_workspace_root(self):
+        self.write_crate(
+            "services/api",
+            '[package]\nname = "api"\nworkspace = "../../rust"\n\n'
+            "[dependencies]\nmodels = { workspace = true }\n",
+        )
+        self.path.joinpath("rust").mkdir()
+        self.path.joinpath("rust/Cargo.toml").write_text(
+            "[workspace]\n[workspace.dependencies]\n"
+            'models = { path = "../crates/models" }\n'
+        )
+
+        self.assertEqual(self.dependencies("services/api"), ["//crates/models"])
+
+    def test_explicit_workspace_root_outside(self):
+        outside = TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        Path(outside.name, "Cargo.toml").write_text(
+            "[workspace]\n[workspace.dependencies]\n"
+            f'models = {{ path = "{self.path}/crates/models" }}\n'
+        )
+        relative = os.path.relpath(outside.name, self.path / "services/api")
+        self.write_crate(
+            "services/api",
+            f'[package]\nname = "api"\nworkspace = "{relative}"\n\n'
+            "[dependencies]\nmodels = { workspace = true }\n",
+        )
+
+        # Starting with ../.., but outside of the Workspace once resolved
+        self.assertEqual(self.dependencies("services/api"), [])
+
+    def test_no_workspace_root(self):
+        self.write_crate(
+            "services/api",
+            '[package]\nname = "api"\n[dependencies]\nmodels = { workspace = true }\n',
+        )
+
+        self.assertEqual(self.dependencies("services/api"), [])
+
+    def test_workspace_members(self):
+        self.write_crate("services/api")
+        self.write_crate("rust", ROOT_CARGO_TOML.replace("crates/", "../crates/"))
+
+        runtime = self.runtime("rust")
+        self.assertEqual(
+            [p.label_path for p in runtime.workspace_dependencies()],
+            [
+                "//crates/codegen",
+                "//crates/common",
+                "//crates/models",
+                "//crates/testing",
+            ],
+        )
+        self.assertIn("../crates", runtime.consulted)
+        # Every candidate member, so one becoming a crate is noticed
+        self.assertIsNotNone(runtime.consulted["../crates/common/Cargo.toml"])
+        self.assertIsNone(runtime.consulted["services/api/Cargo.toml"])
+
+    def test_root_package_members(self):
+        self.write_crate("services/api")
+        self.write_crate(".", ROOT_CARGO_TOML)
+
+        self.assertEqual(
+            self.dependencies("."),
+            [
+                "//crates/codegen",
+                "//crates/common",
+                "//crates/models",
+                "//crates/testing",
+                "//services/api",
+            ],
+        )
+
+    def test_not_a_package(self):
+        self.write_crate(
+            "services/api", '[dependencies]\nmissing = { path = "../../missing" }\n'
+        )
+
+        with self.assertRaises(PackageNotFound):
+            self.dependencies("services/api")
@@ -1,16 +1,172 @@
+from textwrap import dedent
+from unittest import TestCase
+
+from mazel.exceptions import InvalidBuildToml, PackageNotFound
 from mazel.runtimes import DockerRuntime
+from mazel.runtimes.docker import image_name, instructions
+from mazel.workspace import Workspace
 
+from ..utils import TemporaryWorkspaceTestCase
 from .utils import RuntimeTestCase
 
+EXAMPLE_DOCKERFILE = dedent(
+    """\
+    # syntax=docker/dockerfile:1
+    FROM --platform=linux/amd64 sampleproject/base:1.0 AS build
+    COPY libs/py/common /src/common
+    COPY --chown=app \\
+        # the service itself
+        services/api/ /src/api/
+    RUN make -C /src/api
+
+    FROM build AS test
+    FROM registry:5000/sampleproject/runtime@sha256:abc
+    COPY --from=build /src/api/dist /app
+    COPY ["libs/js/*.js", "/app/js/"]
+    ADD https://example.com/file.tar.gz /tmp/
+    """
+)
+
+
+class DockerfileTest(TestCase):
+    def test_instructions(self):
+        self.assertEqual(
+            list(instructions(EXAMPLE_DOCKERFILE))[:4],
+            [
+                ("FROM", "--platform=linux/amd64 sampleproject/base:1.0 AS build"),
+                ("COPY", "libs/py/common /src/common"),
+                ("COPY", "--chown=app  services/api/ /src/api/"),
+                ("RUN", "make -C /src/api"),
+            ],
+        )
+
+    def test_heredocs(self):
+        dockerfile = dedent(
+            """\
+            FROM base
+            RUN <<EOF
+            FROM other
+            EOF
+            COPY <<-"END" <<two /etc/
+            \tCOPY libs /libs
+            \tEND
+            two
+            RUN cat <<EOF
+            ADD libs /libs
+            EOF
+            """
+        )
+
+        self.assertEqual(
+            list(instructions(dockerfile)),
+            [
+                ("FROM", "base"),
+                ("RUN", "<<EOF"),
+                ("COPY", '<<-"END" <<two /etc/'),
+                ("RUN", "cat <<EOF"),
+            ],
+        )
+
+    def test_image_name(self):
+        self.assertEqual(image_name("base"), "base")
+        self.assertEqual(image_name("org/base:1.0"), "org/base")
+        self.assertEqual(image_name("registry:5000/base"), "registry:5000/base")
+        self.assertEqual(image_name("registry:5000/base:1.0"), "registry:5000/base")
+        self.assertEqual(image_name("base@sha256:abc"), "base")
 
-class DockerRuntimeTest(RuntimeTestCase):
+
+class DockerRuntimeTest(RuntimeTestCase, TemporaryWorkspaceTestCase):
     runtime_cls = DockerRuntime
 
+    def setUp(self):
+        super().setUp()
+        for name in ["libs/py/common", "libs/js/ui", "images/base", "images/runtime"]:
+            self.write_package(name)
+
+    def write_docker_package(self, name, build_toml="[package]\n", dockerfile=None):
+        files = {"Dockerfile": dockerfile} if dockerfile is not None else None
+        self.write_package(name, build_toml=build_toml, files=files)
+
+    def dependencies(self, name):
+        package = Workspace(self.path).get_package(self.path / name)
+        return [
+            p.label_path for p in self.make_runtime(package).workspace_dependencies()
+        ]
+
     def test_runtime_label(self):
         runtime = self.make_runtime()
         self.assertEqual(runtime.runtime_label, "docker")
 
     def test_workspace_dependencies(self):
-        runtime = self.make_runtime()
-        # TODO Actually implement
-        self.assertEqual(list(runtime.workspace_dependencies()), [])
+        self.write_docker_package(
+            "services/api",
+            dedent(
+                """\
+                [package]
+                runtimes = ["docker"]
+
+                [docker]
+                context = "../.."
+
+                [docker.images]
+                "sampleproject/base" = "//images/base"
+                "registry:5000/sampleproject/runtime" = "//images/runtime"
+                """
+            ),
+            EXAMPLE_DOCKERFILE,
+        )
+
+        self.assertEqual(
+            self.dependencies("services/api"),
+            [
+                "//images/base",
+                "//libs/py/common",
+                "//images/runtime",
+                "//libs/js/ui",
+            ],
+        )
+
+    def test_default_context(self):
+        self.write_docker_package(
+            "services/api",
+            dockerfile="FROM python:3.11\nCOPY . /app\nCOPY ../../libs/py /libs\n",
+        )
+
+        # Images not built by Packages are not dependencies
+        self.assertEqual(self.dependencies("services/api"), ["//libs/py/common"])
+
+    def test_heredoc_copy(self):
+        self.write_docker_package(
+            "services/api",
+            dockerfile="FROM python\nCOPY <<EOF /app/\nCOPY ../../libs/py /x\nEOF\n",
+        )
+
+        self.assertEqual(self.dependencies("services/api"), [])
+
+    def test_build_stage(self):
+        self.write_docker_package(
+            "app",
+            '[docker.images]\n"base" = "//images/base"\n',
+            "FROM base AS base\nFROM base\n",
+        )
+
+        self.assertEqual(self.dependencies("app"), ["//images/base"])
+
+    def test_unknown_label(self):
+        self.write_docker_package(
+            "app", '[docker.images]\n"base" = "//images/missing"\n', "FROM base\n"
+        )
+
+        with self.assertRaises(PackageNotFound):
+            self.dependencies("app")
+
+    def test_invalid_images(self):
+        self.write_docker_package("app", '[docker]\nimages = ["base"]\n', "FROM base\n")
+
+        with self.assertRaises(InvalidBuildToml):
+            self.dependencies("app")
+
+    def test_no_dockerfile(self):
+        self.write_docker_package("app")
+
+        self.assertEqual(self.dependencies("app"), [])
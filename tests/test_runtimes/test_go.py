@@ -1,16 +1,196 @@
+from textwrap import dedent
+from unittest import TestCase
+
 from mazel.runtimes import GoRuntime
+from mazel.runtimes.go import GoModFile, is_local_path, parse_go_mod
+from mazel.workspace import Workspace
 
+from ..utils import TemporaryWorkspaceTestCase
 from .utils import RuntimeTestCase
 
+EXAMPLE_GO_MOD = dedent(
+    """\
+    module example.com/app // the app
+
+    go 1.21
+
+    require example.com/common v0.0.0
+    require (
+        "example.com/models" v1.2.0
+        golang.org/x/text v0.14.0 // indirect
+    )
+
+    replace example.com/common => ../common
+    replace (
+        example.com/models v1.2.0 => ./internal/models
+        golang.org/x/text => golang.org/x/text v0.13.0
+    )
+    """
+)
+
+
+class ParseGoModTest(TestCase):
+    def test_parse_go_mod(self):
+        self.assertEqual(
+            parse_go_mod(EXAMPLE_GO_MOD),
+            GoModFile(
+                module="example.com/app",
+                requires=[
+                    "example.com/common",
+                    "example.com/models",
+                    "golang.org/x/text",
+                ],
+                replaces={
+                    "example.com/common": "../common",
+                    "example.com/models": "./internal/models",
+                    "golang.org/x/text": "golang.org/x/text",
+                },
+            ),
+        )
+
+    def test_parse_go_work(self):
+        parsed = parse_go_mod(
+            "go 1.21\n\nuse (\n\t./app\n\t`../libs/common`\n)\nuse ./tools\n"
+        )
+        self.assertEqual(parsed.uses, ["./app", "../libs/common", "./tools"])
+
+    def test_is_local_path(self):
+        self.assertTrue(is_local_path("../common"))
+        self.assertTrue(is_local_path("./common"))
+        self.assertTrue(is_local_path("/abs/common"))
+        self.assertFalse(is_local_path("example.com/common"))
+        self.assertFalse(is_local_path(""))
 
-class JavascriptRuntimeTest(RuntimeTestCase):
+
+class GoRuntimeTest(RuntimeTestCase, TemporaryWorkspaceTestCase):
     runtime_cls = GoRuntime
 
+    def write_module(self, name, go_mod=None):
+        if go_mod is None:
+            go_mod = f"module example.com/{name}\n"
+        self.write_package(name, runtimes=["go"], files={"go.mod": go_mod})
+
+    def dependencies(self, name):
+        package = Workspace(self.path).get_package(self.path / name)
+        runtime = self.make_runtime(package)
+        return [p.label_path for p in runtime.workspace_dependencies()], runtime
+
     def test_runtime_label(self):
         runtime = self.make_runtime()
         self.assertEqual(runtime.runtime_label, "go")
 
-    def test_workspace_dependencies(self):
-        runtime = self.make_runtime()
-        # TODO Actually implement
-        self.assertEqual(list(runtime.workspace_dependencies()), [])
+    def test_replace(self):
+        self.write_module("common")
+        self.write_module("app/internal/models")
+        self.write_module("app", EXAMPLE_GO_MOD)
+
+        deps, _ = self.dependencies("app")
+        self.assertEqual(deps, ["//common", "//app/internal/models"])
+
+    def test_replace_not_a_package(self):
+        # Like go.work's modules, local modules need not be Packages
+        self.write_module("common")
+        self.write_module("app", EXAMPLE_GO_MOD)
+
+        deps, _ = self.dependencies("app")
+        self.assertEqual(deps, ["//common"])
+
+    def test_no_go_mod(self):
+        self.write_module("app")
+        self.path.joinpath("app/go.mod").unlink()
+
+        deps, runtime = self.dependencies("app")
+        self.assertEqual(deps, [])
+        self.assertEqual(runtime.consulted, {"go.mod": None})
+
+    def test_go_work(self):
+        self.write_module("libs/common")
+        self.write_module("libs/unused")
+        self.write_module(
+            "app",
+            "module example.com/app\n"
+            "require (\n\texample.com/libs/common v0.0.0\n"
+            "\texample.com/vendored v0.0.0\n\texample.com/remote v1.0.0\n)\n",
+        )
+        self.write_module("vendored")
+        # A module of the go.work that is not a Package
+        self.path.joinpath("scratch").mkdir()
+        self.path.joinpath("scratch/go.mod").write_text("module example.com/remote\n")
+        self.path.joinpath("go.work").write_text(
+            "go 1.21\n"
+            "use (\n\t./app\n\t./libs/common\n\t./libs/unused\n\t./scratch\n)\n"
+            "replace example.com/vendored => ./vendored\n"
+        )
+
+        deps, runtime = self.dependencies("app")
+        self.assertEqual(deps, ["//libs/common", "//vendored"])
+        self.assertEqual(
+            sorted(runtime.consulted),
+            [
+                "../go.work",
+                "../libs/common/go.mod",
+                "../libs/unused/go.mod",
+                "../scratch/go.mod",
+                "go.mod",
+                "go.work",
+            ],
+        )
+
+    def test_go_work_module_renamed(self):
+        self.write_module("common")
+        self.write_module("other")
+        self.write_module(
+            "app", "module example.com/app\nrequire example.com/renamed v0\n"
+        )
+        self.path.joinpath("go.work").write_text(
+            "use (\n\t./app\n\t./common\n\t./other\n)\n"
+        )
+        self.assertEqual(self.dependencies("app")[0], [])
+
+        # A go.mod that matched nothing, the result must not be reused
+        self.path.joinpath("other/go.mod").write_text("module example.com/renamed\n")
+        self.assertEqual(self.dependencies("app")[0], ["//other"])
+
+        self.path.joinpath("other/go.mod").write_text("module example.com/other\n")
+        self.path.joinpath("common/go.mod").write_text("module example.com/renamed\n")
+        self.assertEqual(self.dependencies("app")[0], ["//common"])
+
+    def test_go_work_replace_precedence(self):
+        self.write_module("common")
+        self.write_module(
+            "app",
+            "module example.com/app\nrequire example.com/common v0.0.0\n"
+            "replace example.com/common => ../common\n",
+        )
+        self.path.joinpath("go.work").write_text(
+            "use ./app\nreplace example.com/common => example.com/common v1.0.0\n"
+        )
+
+        deps, _ = self.dependencies("app")
+        self.assertEqual(deps, [])
+
+    def test_go_work_lookup_stops_at_workspace(self):
+        self.write_module("app/api")
+
+        _, runtime = self.dependencies("app/api")
+        # Not found, each recorded as missing, so creating one is noticed
+        self.assertEqual(
+            sorted(runtime.consulted),
+            ["../../go.work", "../go.work", "go.mod", "go.work"],
+        )
+        self.assertEqual(runtime.consulted["../../go.work"], None)
+
+    def test_extract_dependencies_stamps_go_work(self):
+        self.write_module("common")
+        self.write_module(
+            "app", "module example.com/app\nrequire example.com/common v0\n"
+        )
+        self.path.joinpath("go.work").write_text("use (\n\t./app\n\t./common\n)\n")
+
+        package = Workspace(self.path).get_package(self.path / "app")
+        stamps, dependencies, probes = package.extract_dependencies()
+
+        self.assertEqual(dependencies.runtime_deps, ["//common"])
+        self.assertEqual(probes, {"at:common": "common"})
+        self.assertIsNotNone(stamps["../go.work"])
+        self.assertIsNotNone(stamps["../common/go.mod"])
@@ -1,8 +1,12 @@
 import json
+from unittest import TestCase
 
 from mazel.runtimes import JavascriptRuntime
+from mazel.runtimes.javascript import matches_workspaces, workspaces_patterns
+from mazel.workspace import Workspace
 
 from ..test_package import make_package
+from ..utils import TemporaryWorkspaceTestCase
 from .utils import RuntimeTestCase
 
 EXAMPLE_PACKAGE_JSON = {
@@ -66,3 +70,171 @@ class JavascriptRuntimeTest(RuntimeTestCase):
                 make_package("examples/simple_workspace/nested/package_c"),
             ],
         )
+
+    def test_peer_and_optional_dependencies(self):
+        runtime = self.make_runtime()
+
+        runtime.package.read_path.return_value = json.dumps(
+            {
+                "peerDependencies": {"react": "^16"},
+                "optionalDependencies": {"fsevents": "^2"},
+            }
+        )
+
+        self.assertEqual(runtime.peer_dependencies(), {"react": "^16"})
+        self.assertEqual(runtime.optional_dependencies(), {"fsevents": "^2"})
+
+
+class WorkspacesPatternsTest(TestCase):
+    def test_workspaces_patterns(self):
+        self.assertEqual(workspaces_patterns({}), [])
+        self.assertEqual(workspaces_patterns({"workspaces": ["a/*"]}), ["a/*"])
+        self.assertEqual(
+            workspaces_patterns({"workspaces": {"packages": ["a/*"], "nohoist": []}}),
+            ["a/*"],
+        )
+
+    def test_matches_workspaces(self):
+        patterns = ["./packages/*", "tools/cli/", "!packages/legacy"]
+        self.assertTrue(matches_workspaces(patterns, "packages/ui"))
+        self.assertTrue(matches_workspaces(patterns, "tools/cli"))
+        self.assertFalse(matches_workspaces(patterns, "packages/legacy"))
+        self.assertFalse(matches_workspaces(patterns, "tools/other"))
+
+
+class JavascriptWorkspaceDependenciesTest(TemporaryWorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.workspace = Workspace(self.path)
+
+    def write_js_package(self, name, package_json, build_toml=True):
+        files = {"package.json": json.dumps(package_json)}
+        if build_toml:
+            self.write_package(name, runtimes=["javascript"], files=files)
+        else:
+            # Not a mazel package
+            self.path.joinpath(name).mkdir(parents=True, exist_ok=True)
+            self.path.joinpath(name, "package.json").write_text(files["package.json"])
+
+    def runtime(self, name):
+        return JavascriptRuntime(self.workspace.get_package(self.path / name))
+
+    def dependencies(self, name):
+        return [p.label_path for p in self.runtime(name).workspace_dependencies()]
+
+    def test_link_and_workspace_protocol(self):
+        self.write_js_package("libs/common", {"name": "@acme/common"})
+        self.write_js_package("libs/ui", {"name": "@acme/ui"})
+        self.write_js_package("libs/icons", {"name": "icons"})
+        self.write_js_package("libs/theme", {"name": "theme"})
+        self.write_js_package(
+            "apps/web",
+            {
+                "name": "web",
+                "dependencies": {
+                    "@acme/common": "workspace:*",
+                    "react": "^18.0.0",
+                    "ui": "workspace:@acme/ui@^1.0.0",
+                },
+                "peerDependencies": {"icons": "link:../../libs/icons"},
+                "optionalDependencies": {"theme": "workspace:../../libs/theme"},
+            },
+        )
+
+        self.assertCountEqual(
+            self.dependencies("apps/web"),
+            ["//libs/common", "//libs/ui", "//libs/icons", "//libs/theme"],
+        )
+
+    def test_workspace_protocol_not_found(self):
+        self.write_js_package(
+            "apps/web", {"name": "web", "dependencies": {"missing": "workspace:^"}}
+        )
+
+        # Skipped, like any other unresolved name
+        with self.assertLogs("mazel.runtimes.javascript", "WARNING"):
+            self.assertEqual(self.dependencies("apps/web"), [])
+
+    def test_workspace_protocol_pnpm_workspace(self):
+        self.path.joinpath("js").mkdir()
+        self.path.joinpath("js/pnpm-workspace.yaml").write_text("packages: ['*']\n")
+        self.write_js_package("js/common", {"name": "common"})
+        self.write_js_package("other", {"name": "other"})
+        self.write_js_package(
+            "js/web",
+            {
+                "name": "web",
+                "dependencies": {"common": "workspace:*", "other": "workspace:*"},
+            },
+        )
+
+        runtime = self.runtime("js/web")
+        with self.assertLogs("mazel.runtimes.javascript", "WARNING"):
+            self.assertEqual(
+                [p.label_path for p in runtime.workspace_dependencies()],
+                ["//js/common"],
+            )
+        # Only the names of the packages in the pnpm workspace
+        self.assertEqual(list(runtime.probes), ["stamps:js/package.json"])
+
+    def test_workspaces_members(self):
+        # The npm/yarn workspaces root, not itself a Package
+        self.write_js_package(
+            "js",
+            {"private": True, "workspaces": ["packages/*", "!packages/legacy"]},
+            build_toml=False,
+        )
+        self.write_js_package("js/packages/common", {"name": "common"})
+        self.write_js_package("js/packages/legacy", {"name": "legacy"})
+        self.write_js_package("other", {"name": "other"})
+        self.write_js_package(
+            "js/packages/web",
+            {
+                "name": "web",
+                "dependencies": {
+                    "common": "^1.0.0",
+                    "legacy": "^1.0.0",
+                    "other": "^1.0.0",
+                    "web": "^1.0.0",
+                    "react": "^18.0.0",
+                },
+            },
+        )
+
+        runtime = self.runtime("js/packages/web")
+        self.assertEqual(
+            [p.label_path for p in runtime.workspace_dependencies()],
+            ["//js/packages/common"],
+        )
+        # Looking for the workspaces root
+        self.assertCountEqual(
+            runtime.consulted, ["../package.json", "../../package.json"]
+        )
+        # The names of every package below the workspaces root
+        self.assertEqual(list(runtime.probes), ["stamps:js/package.json"])
+
+    def test_no_workspaces(self):
+        self.write_js_package("libs/common", {"name": "common"})
+        self.write_js_package(
+            "apps/web", {"name": "web", "dependencies": {"common": "^1.0.0"}}
+        )
+
+        self.assertEqual(self.dependencies("apps/web"), [])
+
+    def test_name_index_shared(self):
+        self.write_js_package("libs/common", {"name": "common"})
+        self.write_js_package("apps/web", {"dependencies": {"common": "workspace:*"}})
+        self.workspace.graph()
+
+        self.path.joinpath("libs/common/package.json").write_text(
+            json.dumps({"name": "renamed"})
+        )
+        # Until the Workspace is refreshed
+        self.assertEqual(self.dependencies("apps/web"), ["//libs/common"])
+
+        # Refreshing updates the Packages depending on the name too
+        with self.assertLogs("mazel.runtimes.javascript", "WARNING"):
+            self.assertTrue(
+                self.workspace.refresh([self.path / "libs/common/package.json"])
+            )
+            self.assertEqual(self.dependencies("apps/web"), [])
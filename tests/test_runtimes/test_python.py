@@ -1,6 +1,11 @@
+from textwrap import dedent
+
+from mazel.exceptions import PackageNotFound
 from mazel.runtimes import PythonRuntime
+from mazel.workspace import Workspace
 
 from ..test_package import make_package
+from ..utils import TemporaryWorkspaceTestCase
 from .utils import RuntimeTestCase
 
 # Pre-parsed toml
@@ -75,3 +80,84 @@ class PythonRuntimeTest(RuntimeTestCase):
                 make_package("examples/simple_workspace/nested/package_c"),
             ],
         )
+
+
+class PythonWorkspaceDependenciesTest(TemporaryWorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["libs/a", "libs/b", "libs/c", "app/vendored", "wheels"]:
+            self.write_package(name)
+        self.workspace = Workspace(self.path)
+
+    def dependencies(self, pyproject):
+        self.write_package(
+            "app", runtimes=["python"], files={"pyproject.toml": dedent(pyproject)}
+        )
+        runtime = PythonRuntime(self.workspace.get_package(self.path / "app"))
+        return [p.label_path for p in runtime.workspace_dependencies()]
+
+    def test_poetry_groups(self):
+        deps = self.dependencies(
+            """\
+            [tool.poetry.dependencies]
+            a = {path = "../libs/a", develop = true}
+            vendored = {path = "vendored"}
+
+            [tool.poetry.group.test.dependencies]
+            b = [
+                {path = "../libs/b", python = ">=3.11"},
+                {version = "^1.0", python = "<3.11"},
+            ]
+
+            [tool.poetry.group.docs.dependencies]
+            wheel = {path = "./../wheels/c-1.0-py3-none-any.whl"}
+            """
+        )
+
+        self.assertEqual(deps, ["//libs/a", "//app/vendored", "//libs/b", "//wheels"])
+
+    def test_pep621_uv_sources(self):
+        deps = self.dependencies(
+            f"""\
+            [project]
+            name = "app"
+            dependencies = [
+                "requests>=2",
+                "a",
+                "b[extra] @ file://{self.path}/libs/b ; python_version >= '3.10'",
+                "remote @ https://example.com/remote-1.0.tar.gz",
+            ]
+
+            [project.optional-dependencies]
+            extra = ["c @ file:../libs/c"]
+
+            [dependency-groups]
+            dev = [{{include-group = "test"}}, "vendored"]
+
+            [tool.uv.sources]
+            a = {{path = "../libs/a", editable = true}}
+            vendored = [{{path = "vendored", marker = "sys_platform == 'linux'"}}]
+            requests = {{index = "pypi"}}
+            """
+        )
+
+        self.assertEqual(deps, ["//libs/b", "//libs/c", "//libs/a", "//app/vendored"])
+
+    def test_outside_workspace(self):
+        deps = self.dependencies(
+            '[tool.poetry.dependencies]\nx = {path = "/opt/wheels/x.whl"}\n'
+        )
+
+        self.assertEqual(deps, [])
+
+    def test_symlink(self):
+        self.path.joinpath("vendor").mkdir()
+        self.path.joinpath("vendor/a").symlink_to("../libs/a")
+
+        deps = self.dependencies('[tool.uv.sources]\na = {path = "../vendor/a"}\n')
+
+        self.assertEqual(deps, ["//libs/a"])
+
+    def test_not_a_package(self):
+        with self.assertRaises(PackageNotFound):
+            self.dependencies('[tool.uv.sources]\nx = {path = "../not_a_package"}\n')
@@ -0,0 +1,304 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mazel import scan
+from mazel.ignore import IgnoreRules
+from mazel.scan import (
+    PackageScanner,
+    ScanIndex,
+    ScanStats,
+    chunk,
+    package_dirs_from_files,
+    scan_dir,
+    scan_packages,
+)
+
+from .utils import abspath, with_cache
+
+
+def make_tree(root: Path, dirs, packages) -> None:
+    for path in dirs:
+        root.joinpath(path).mkdir(parents=True, exist_ok=True)
+    for path in packages:
+        root.joinpath(path).mkdir(parents=True, exist_ok=True)
+        root.joinpath(path, "BUILD.toml").touch()
+
+
+class ScanDirTest(TestCase):
+    def test_package(self):
+        is_package, subdirs = scan_dir(
+            str(abspath("examples/simple_workspace/package_b"))
+        )
+
+        self.assertTrue(is_package)
+        # Descend further, for nested packages
+        self.assertEqual(subdirs, ["nested"])
+
+    def test_not_package(self):
+        is_package, subdirs = scan_dir(str(abspath("examples/simple_workspace/nested")))
+
+        self.assertFalse(is_package)
+        self.assertEqual(subdirs, ["package_c"])
+
+    def test_build_toml_directory(self):
+        # A directory named BUILD.toml does not make a package
+        with TemporaryDirectory() as tmpdir:
+            Path(tmpdir, "BUILD.toml").mkdir()
+            self.assertEqual(scan_dir(tmpdir), (False, ["BUILD.toml"]))
+
+    def test_hidden(self):
+        with TemporaryDirectory() as tmpdir:
+            make_tree(Path(tmpdir), [".git", ".venv/lib"], [])
+            self.assertEqual(scan_dir(tmpdir), (False, []))
+
+    def test_nested_workspace(self):
+        with TemporaryDirectory() as tmpdir:
+            make_tree(Path(tmpdir), ["a"], ["."])
+            Path(tmpdir, "WORKSPACE.toml").touch()
+
+            self.assertEqual(scan_dir(tmpdir), (False, []))
+            # The root of the Workspace being scanned
+            self.assertEqual(scan_dir(tmpdir, nested=False), (True, ["a"]))
+
+
+class PackageDirsFromFilesTest(TestCase):
+    def test(self):
+        self.assertEqual(
+            package_dirs_from_files(
+                ["libs/b/BUILD.toml", "libs/a/BUILD.toml", "services/c/BUILD.toml"]
+            ),
+            (["libs/a", "libs/b", "services/c"], 0),
+        )
+
+    def test_nested(self):
+        self.assertEqual(
+            package_dirs_from_files(
+                ["a/b/c/BUILD.toml", "a/BUILD.toml", "ab/BUILD.toml"]
+            ),
+            (["a", "a/b/c", "ab"], 0),
+        )
+
+    def test_root(self):
+        self.assertEqual(
+            package_dirs_from_files(["a/BUILD.toml", "BUILD.toml"]), ([".", "a"], 0)
+        )
+
+    def test_nested_workspace(self):
+        self.assertEqual(
+            package_dirs_from_files(
+                ["a/BUILD.toml", "a/b/BUILD.toml", "a/b/c/BUILD.toml"],
+                workspace_files=["WORKSPACE.toml", "a/b/WORKSPACE.toml"],
+            ),
+            (["a"], 0),
+        )
+
+    def test_hidden(self):
+        self.assertEqual(
+            package_dirs_from_files([".github/a/BUILD.toml", "b/.venv/BUILD.toml"]),
+            ([], 0),
+        )
+
+    def test_ignore(self):
+        self.assertEqual(
+            package_dirs_from_files(
+                [
+                    "app/BUILD.toml",
+                    "dist/app/BUILD.toml",
+                    "dist/lib/BUILD.toml",
+                    "js/node_modules/dep/BUILD.toml",
+                ],
+                ignore=IgnoreRules(["/dist", "node_modules"]),
+            ),
+            (["app"], 2),
+        )
+
+
+class ChunkTest(TestCase):
+    def test_chunk(self):
+        self.assertEqual(chunk(list("abcde"), 2), [["a", "b", "c"], ["d", "e"]])
+        self.assertEqual(chunk(list("ab"), 4), [["a"], ["b"]])
+
+
+class ScanPackagesTest(TestCase):
+    def test_simple_workspace(self):
+        self.assertEqual(
+            scan_packages(abspath("examples/simple_workspace")),
+            [
+                abspath("examples/simple_workspace/nested/package_c"),
+                abspath("examples/simple_workspace/package_a"),
+                abspath("examples/simple_workspace/package_b"),
+            ],
+        )
+
+    def test_nested(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_tree(root, [], [".", "a", "a/b", "c/d"])
+
+            self.assertEqual(
+                scan_packages(root), [root, root / "a", root / "a/b", root / "c/d"]
+            )
+
+    def test_nested_workspace(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_tree(root, [], ["a", "a/b", "a/b/c"])
+            root.joinpath("WORKSPACE.toml").touch()
+            root.joinpath("a/b/WORKSPACE.toml").touch()
+
+            self.assertEqual(scan_packages(root), [root / "a"])
+
+    def test_symlinked_package(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_tree(root, [], ["app", "lib"])
+            root.joinpath("app/packages").mkdir()
+            root.joinpath("app/packages/lib").symlink_to("../../lib")
+
+            self.assertEqual(scan_packages(root), [root / "app", root / "lib"])
+
+    def test_symlink_cycle(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_tree(root, ["a/b"], ["a"])
+            root.joinpath("a/b/up").symlink_to("../../a")
+
+            self.assertEqual(scan_packages(root), [root / "a"])
+
+    def test_ignore(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_tree(
+                root,
+                ["js/node_modules/dep/x", "libs/build/lib"],
+                ["js/app", "js/node_modules/dep", "libs/a", "libs/build/lib/copy"],
+            )
+
+            scanner = PackageScanner(
+                root, ignore=IgnoreRules(["node_modules", "/libs/build"])
+            )
+
+            self.assertEqual(scanner.scan(), [root / "js/app", root / "libs/a"])
+            self.assertEqual(scanner.stats, ScanStats(visited=5, listed=5, pruned=2))
+            # The index records the unfiltered listing
+            self.assertCountEqual(scanner.index.dirs["libs"][2], ["a", "build"])
+
+    def test_parallel(self):
+        # Force every level through the thread pool, the results should be the same
+        # as when scanned serially
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            packages = [f"group_{i}/pkg_{j}" for i in range(10) for j in range(10)]
+            make_tree(root, [f"group_{i}/other/deep" for i in range(10)], packages)
+
+            serial = scan_packages(root)
+            with mock.patch.object(scan, "PARALLEL_THRESHOLD", 0):
+                parallel = scan_packages(root, max_workers=4)
+
+            self.assertEqual(len(serial), 100)
+            self.assertEqual(serial, parallel)
+            self.assertEqual(serial, sorted(root / path for path in packages))
+
+
+def age(root: Path) -> None:
+    """Backdate every directory's mtime, so it is outside of the racy window"""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (1_600_000_000, 1_600_000_000))
+
+
+@with_cache
+class PackageScannerIndexTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+
+        make_tree(self.root, ["docs/api"], ["libs/a", "libs/b", "services/c"])
+        age(self.root)
+
+        self.first = PackageScanner(self.root)
+        self.packages = self.first.scan()
+
+    def rescan(self):
+        scanner = PackageScanner(self.root, index=self.first.index)
+        with mock.patch("mazel.scan.scan_dir", wraps=scan_dir) as mock_scan_dir:
+            packages = scanner.scan()
+        listed = [Path(call.args[0]) for call in mock_scan_dir.call_args_list]
+        return scanner, packages, listed
+
+    def test_index(self):
+        self.assertTrue(self.first.changed)
+        self.assertCountEqual(
+            self.first.index.dirs.keys(),
+            [".", "docs", "docs/api", "libs", "libs/a", "libs/b", "services"]
+            + ["services/c"],
+        )
+        _, is_package, subdirs = self.first.index.dirs["libs"]
+        self.assertFalse(is_package)
+        self.assertCountEqual(subdirs, ["a", "b"])
+        self.assertEqual(self.first.index.dirs["libs/a"][1:], (True, []))
+
+    def test_unchanged(self):
+        scanner, packages, listed = self.rescan()
+
+        self.assertEqual(packages, self.packages)
+        self.assertEqual(listed, [])
+        self.assertFalse(scanner.changed)
+
+    def test_added_package(self):
+        make_tree(self.root, [], ["libs/d"])
+
+        scanner, packages, listed = self.rescan()
+
+        self.assertEqual(packages, sorted(self.packages + [self.root / "libs/d"]))
+        # Only the modified directory, plus the new one
+        self.assertEqual(listed, [self.root / "libs", self.root / "libs/d"])
+        self.assertTrue(scanner.changed)
+
+    def test_removed_package(self):
+        self.root.joinpath("libs/a/BUILD.toml").unlink()
+
+        scanner, packages, listed = self.rescan()
+
+        self.assertEqual(packages, [self.root / "libs/b", self.root / "services/c"])
+        self.assertEqual(listed, [self.root / "libs/a"])
+        self.assertTrue(scanner.changed)
+
+    def test_removed_directory(self):
+        self.root.joinpath("docs/api").rmdir()
+
+        scanner, packages, listed = self.rescan()
+
+        self.assertEqual(packages, self.packages)
+        self.assertEqual(listed, [self.root / "docs"])
+        self.assertNotIn("docs/api", scanner.index.dirs)
+        self.assertTrue(scanner.changed)
+
+    def test_racy(self):
+        # A directory modified around the time of the last scan is listed again
+        os.utime(self.root / "docs", None)
+
+        _, _, listed = self.rescan()
+
+        self.assertEqual(listed, [self.root / "docs"])
+
+    def test_save_load(self):
+        self.first.index.save(self.root)
+
+        index = ScanIndex.load(self.root)
+
+        self.assertEqual(index.scanned_ns, self.first.index.scanned_ns)
+        self.assertEqual(
+            {relpath: list(record[2]) for relpath, record in index.dirs.items()},
+            {
+                relpath: list(record[2])
+                for relpath, record in self.first.index.dirs.items()
+            },
+        )
+        self.assertTrue(self.root.joinpath(".mazel/cache/packages.json").exists())
+
+    def test_load_missing(self):
+        index = ScanIndex.load(self.root.joinpath("does_not_exist"))
+        self.assertEqual(index.dirs, {})
@@ -0,0 +1,163 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock, skipUnless
+
+from mazel import client
+from mazel.exceptions import WatchError
+from mazel.server import Server, ServerError
+
+from .utils import abspath
+
+
+@skipUnless(sys.platform.startswith("linux"), "the server's watcher requires Linux")
+class ServerTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name, "workspace")
+        shutil.copytree(
+            abspath("examples/simple_workspace"),
+            self.path,
+            ignore=shutil.ignore_patterns(".mazel"),
+        )
+        # Run the server from this checkout
+        self.env = dict(os.environ, PYTHONPATH=str(Path(client.__file__).parents[1]))
+
+    def start(self, *args):
+        server = subprocess.Popen(
+            [sys.executable, "-m", "mazel.main", "server", *args],
+            cwd=self.path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=self.env,
+        )
+        self.addCleanup(server.stdout.close)
+        self.addCleanup(server.wait, timeout=10)
+        self.addCleanup(client.shutdown, self.path)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                client.connect(self.path).close()
+                return server
+            except client.ServerUnavailable:
+                time.sleep(0.05)
+        self.fail(f"Server did not start: {server.stdout}")
+
+    def run_remote(self, *argv):
+        read_fd, write_fd = os.pipe()
+        with open(read_fd) as output:
+            with client.connect(self.path) as sock:
+                try:
+                    code = client.run_remote(
+                        sock,
+                        list(argv),
+                        self.path,
+                        dict(os.environ),
+                        fds=[0, write_fd, write_fd],
+                    )
+                finally:
+                    os.close(write_fd)
+            return code, output.read()
+
+    def test_run(self):
+        self.start()
+
+        code, output = self.run_remote("echo", "//...")
+
+        self.assertEqual(code, 0)
+        self.assertIn("//package_a:echo", output)
+        self.assertIn("//nested/package_c:echo", output)
+
+    def test_exit_code(self):
+        self.start()
+
+        code, output = self.run_remote("run", "//package_a")
+
+        self.assertEqual(code, 1)
+
+    def test_invalidation(self):
+        self.start()
+        self.run_remote("echo", "//...")
+
+        self.path.joinpath("package_d").mkdir()
+        self.path.joinpath("package_d/BUILD.toml").write_text("[package]\n")
+
+        _, output = self.run_remote("echo", "//...")
+        self.assertIn("//package_d:echo", output)
+
+    def test_shutdown(self):
+        server = self.start()
+
+        self.assertTrue(client.shutdown(self.path))
+
+        self.assertEqual(server.wait(timeout=10), 0)
+        self.assertIn("Shutdown requested", server.stdout.read())
+        self.assertFalse(client.shutdown(self.path))
+
+    def test_terminate(self):
+        server = self.start()
+
+        server.terminate()
+
+        self.assertEqual(server.wait(timeout=10), 0)
+        self.assertFalse(client.socket_path(self.path).exists())
+
+    def test_idle_timeout(self):
+        server = self.start("--idle-timeout", "0.5")
+
+        self.assertEqual(server.wait(timeout=10), 0)
+        self.assertIn("Idle timeout", server.stdout.read())
+
+    def test_already_running(self):
+        self.start()
+
+        result = subprocess.run(
+            [sys.executable, "-m", "mazel.main", "server"],
+            cwd=self.path,
+            capture_output=True,
+            text=True,
+            env=self.env,
+        )
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("already running", result.stderr)
+
+
+class ServeTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name)
+        self.server = Server(self.path)
+        self.server.socket_path = self.path / "mazel" / "server.sock"
+
+    @mock.patch("mazel.server.check_supported", side_effect=WatchError("No inotify"))
+    def test_not_supported(self, check_supported):
+        with self.assertRaises(WatchError):
+            self.server.serve()
+
+        self.assertFalse(self.server.socket_path.parent.exists())
+
+    def test_bind(self):
+        with self.server.bind():
+            self.assertTrue(client.is_private(self.server.socket_path))
+
+    def test_bind_left_over(self):
+        self.server.socket_path.parent.mkdir(mode=0o700)
+        self.server.socket_path.touch()
+
+        with self.server.bind():
+            self.assertTrue(client.is_private(self.server.socket_path))
+
+    def test_bind_not_private(self):
+        self.server.socket_path.parent.mkdir(mode=0o755)
+
+        with self.assertRaisesRegex(ServerError, "0700 permissions"):
+            self.server.bind()
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from mazel.stats import graph_stats
+
+from .test_graph import make_graph
+
+
+def labels(packages):
+    return [package.label_path for package in packages]
+
+
+class GraphStatsTest(TestCase):
+    def setUp(self):
+        #   //a <- //b <- //c <- //d
+        #       <- //e <-------/
+        #   //z
+        self.graph = make_graph(
+            {
+                "//a": [],
+                "//b": ["//a"],
+                "//c": ["//b"],
+                "//d": ["//c", "//e"],
+                "//e": ["//a"],
+                "//z": [],
+            }
+        )
+
+    def test_shape(self):
+        stats = graph_stats(self.graph, top=2)
+
+        self.assertEqual(stats.packages, 6)
+        self.assertEqual(stats.dependencies, 5)
+        self.assertEqual(stats.depth, 4)
+        self.assertEqual(stats.widths, [2, 2, 1, 1])
+        self.assertEqual(
+            [(s.package.label_path, s.direct, s.transitive) for s in stats.fan_in],
+            [("//a", 2, 4), ("//b", 1, 2)],
+        )
+        self.assertEqual(
+            [(s.package.label_path, s.direct, s.transitive) for s in stats.fan_out],
+            [("//d", 2, 4), ("//c", 1, 2)],
+        )
+        self.assertEqual(labels(stats.longest_chain), ["//a", "//b", "//c", "//d"])
+        self.assertEqual(stats.critical_path, [])
+
+    def test_critical_path(self):
+        stats = graph_stats(
+            self.graph, durations={"//a": 1.0, "//b": 1.0, "//c": 2.0, "//e": 10.0}
+        )
+
+        # Not the longest chain, but the slowest
+        self.assertEqual(
+            [(package.label_path, seconds) for package, seconds in stats.critical_path],
+            [("//a", 1.0), ("//e", 10.0), ("//d", 0.0)],
+        )
+        self.assertEqual(stats.critical_duration, 11.0)
+        self.assertEqual(stats.total_duration, 14.0)
+        self.assertEqual(labels(stats.missing_durations), ["//z", "//d"])
+
+    def test_empty(self):
+        stats = graph_stats(make_graph({}), durations={})
+
+        self.assertEqual(stats.depth, 0)
+        self.assertEqual(stats.fan_in, [])
+        self.assertEqual(stats.longest_chain, [])
+        self.assertEqual(stats.critical_path, [])
+
+    def test_condensed_cycle(self):
+        graph = make_graph(
+            {"//a": [], "//b": ["//a", "//c"], "//c": ["//b"], "//d": ["//c"]},
+            condense_cycles=True,
+        )
+
+        stats = graph_stats(graph)
+
+        self.assertEqual(stats.widths, [1, 2, 1])
+        # //c depends upon //a via //b, in the same cycle
+        self.assertEqual(labels(stats.longest_chain), ["//a", "//c", "//d"])
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+from mazel.trie import PathTrie
+
+
+class PathTrieTest(TestCase):
+    def setUp(self):
+        self.trie = PathTrie(
+            [
+                (("libs", "py", "common"), "common"),
+                (("libs", "js"), "js"),
+                (("services", "api"), "api"),
+                (("libs", "py", "aaa"), "aaa"),
+            ]
+        )
+
+    def test_len(self):
+        self.assertEqual(len(self.trie), 4)
+
+        self.trie.insert(("libs", "js"), "js2")
+        self.assertEqual(len(self.trie), 4)
+        self.assertEqual(self.trie.get(("libs", "js")), "js2")
+
+    def test_get(self):
+        self.assertEqual(self.trie.get(("libs", "py", "common")), "common")
+        self.assertIsNone(self.trie.get(("libs", "py")))
+        self.assertIsNone(self.trie.get(("libs", "py", "common", "src")))
+        self.assertIsNone(self.trie.get(("other",)))
+        self.assertIsNone(self.trie.get(()))
+
+    def test_owner(self):
+        self.assertEqual(self.trie.owner(("libs", "py", "common")), "common")
+        self.assertEqual(self.trie.owner(("libs", "py", "common", "src")), "common")
+        self.assertEqual(self.trie.owner(("libs", "js", "a", "b", "c")), "js")
+        self.assertIsNone(self.trie.owner(("libs", "py")))
+        self.assertIsNone(self.trie.owner(("other", "x")))
+        self.assertIsNone(self.trie.owner(()))
+
+    def test_owner_longest_prefix(self):
+        self.trie.insert(("libs",), "libs")
+
+        self.assertEqual(self.trie.owner(("libs", "py")), "libs")
+        self.assertEqual(self.trie.owner(("libs", "js", "src")), "js")
+
+    def test_owner_root(self):
+        self.trie.insert((), "root")
+
+        self.assertEqual(self.trie.owner(()), "root")
+        self.assertEqual(self.trie.owner(("other", "x")), "root")
+        self.assertEqual(self.trie.owner(("services", "api", "x")), "api")
+
+    def test_under(self):
+        self.assertEqual(self.trie.under(("libs",)), ["js", "aaa", "common"])
+        self.assertEqual(self.trie.under(("libs", "py", "common")), ["common"])
+        self.assertEqual(self.trie.under(("libs", "py", "common", "src")), [])
+        self.assertEqual(self.trie.under(("other",)), [])
+        self.assertEqual(self.trie.under(()), ["js", "aaa", "common", "api"])
+
+    def test_remove(self):
+        self.trie.insert(("libs",), "libs")
+
+        self.assertEqual(self.trie.remove(("libs", "py", "common")), "common")
+        self.assertEqual(len(self.trie), 4)
+        self.assertIsNone(self.trie.get(("libs", "py", "common")))
+        self.assertEqual(self.trie.owner(("libs", "py", "common")), "libs")
+        self.assertEqual(self.trie.under(("libs",)), ["libs", "js", "aaa"])
+
+        self.assertEqual(self.trie.remove(("libs",)), "libs")
+        self.assertEqual(self.trie.under(("libs",)), ["js", "aaa"])
+
+    def test_remove_missing(self):
+        self.assertIsNone(self.trie.remove(("libs", "py")))
+        self.assertIsNone(self.trie.remove(("other",)))
+        self.assertEqual(len(self.trie), 4)
+
+    def test_remove_prunes(self):
+        self.trie.remove(("services", "api"))
+
+        self.assertNotIn("services", self.trie._root.children)
+        self.assertIn("libs", self.trie._root.children)
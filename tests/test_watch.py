@@ -0,0 +1,114 @@
+import os
+import struct
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+from mazel.ignore import IgnoreRules
+from mazel.watch import IN_CREATE, IN_ISDIR, IN_MODIFY, Watcher, parse_events
+
+
+def event(wd, mask, name=b""):
+    # Names are NUL padded to a multiple of 16 bytes
+    padded = name.ljust(-(-len(name) // 16) * 16, b"\0") if name else b""
+    return struct.pack("iIII", wd, mask, 0, len(padded)) + padded
+
+
+class ParseEventsTest(TestCase):
+    def test_parse(self):
+        buffer = event(1, IN_MODIFY, b"file.py") + event(2, IN_CREATE | IN_ISDIR, b"d")
+
+        self.assertEqual(
+            parse_events(buffer),
+            [(1, IN_MODIFY, "file.py"), (2, IN_CREATE | IN_ISDIR, "d")],
+        )
+
+    def test_no_name(self):
+        self.assertEqual(parse_events(event(3, IN_MODIFY)), [(3, IN_MODIFY, "")])
+
+    def test_empty(self):
+        self.assertEqual(parse_events(b""), [])
+
+
+@skipUnless(sys.platform.startswith("linux"), "inotify requires Linux")
+class WatcherTest(TestCase):
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+
+        for path in ["a/src", "a/.git", "a/node_modules/dep", "b"]:
+            self.root.joinpath(path).mkdir(parents=True)
+
+        self.watcher = Watcher(
+            self.root, [self.root / "a"], ignore=IgnoreRules(["node_modules"])
+        )
+        self.watcher.start()
+        self.addCleanup(self.watcher.close)
+
+    def next_batch(self):
+        return next(self.watcher.batches(debounce=0.05))
+
+    def test_watch_count(self):
+        # a and a/src
+        self.assertEqual(self.watcher.watch_count, 2)
+
+    def test_coalesced(self):
+        for i in range(50):
+            self.root.joinpath(f"a/src/{i}.py").write_text("x")
+
+        batch = self.next_batch()
+
+        self.assertEqual(
+            batch, {self.root.joinpath(f"a/src/{i}.py") for i in range(50)}
+        )
+        self.assertIsNone(self.watcher.read(0))
+
+    def test_excluded(self):
+        self.root.joinpath("b/x").write_text("x")
+        self.root.joinpath("a/.git/x").write_text("x")
+        self.root.joinpath("a/node_modules/dep/x").write_text("x")
+        self.root.joinpath("a/.x.swp").write_text("x")
+        self.root.joinpath("a/x").write_text("x")
+
+        self.assertEqual(self.next_batch(), {self.root / "a/x"})
+
+    def test_new_directory(self):
+        self.root.joinpath("a/new").mkdir()
+        self.assertEqual(self.next_batch(), {self.root / "a/new"})
+
+        self.root.joinpath("a/new/x").write_text("x")
+        self.assertEqual(self.next_batch(), {self.root / "a/new/x"})
+
+    def test_new_directory_with_files(self):
+        # e.g. moved into place, so there is no event for the file itself
+        self.root.joinpath("b/x").write_text("x")
+        os.rename(self.root / "b", self.root / "a/b")
+
+        self.assertEqual(self.next_batch(), {self.root / "a/b", self.root / "a/b/x"})
+
+    def test_hidden(self):
+        watcher = Watcher(self.root, [self.root / "a"], hidden=[".mazelignore"])
+        watcher.start()
+        self.addCleanup(watcher.close)
+
+        self.root.joinpath("a/.x.swp").write_text("x")
+        self.root.joinpath("a/.mazelignore").write_text("x")
+
+        self.assertEqual(
+            next(watcher.batches(debounce=0.05)), {self.root / "a/.mazelignore"}
+        )
+
+    def test_removed_directory(self):
+        os.rmdir(self.root / "a/src")
+
+        self.assertEqual(self.next_batch(), {self.root / "a/src"})
+        self.assertEqual(self.watcher.watch_count, 1)
+
+    def test_batch(self):
+        self.assertEqual(self.watcher.batch(0, debounce=0.05), set())
+
+        self.root.joinpath("a/x").write_text("x")
+        # Already changed, so no waiting for the first change
+        self.assertEqual(self.watcher.batch(0, debounce=0.05), {self.root / "a/x"})
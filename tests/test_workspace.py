@@ -1,16 +1,24 @@
+import shutil
+import subprocess
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import TestCase, mock
 
-from mazel.exceptions import PackageNotFound
+from mazel.exceptions import (
+    CyclicDependency,
+    InvalidWorkspaceToml,
+    PackageNotFound,
+    RuntimeNotFound,
+)
 from mazel.fs import cd
 from mazel.info import Info
 from mazel.label import Label, ResolvedLabel, Target
 from mazel.package import Package
+from mazel.scan import ScanIndex
 from mazel.types import CommitRange
 from mazel.workspace import Workspace
 
-from .utils import abspath, example_workspace
+from .utils import TemporaryWorkspaceTestCase, abspath, example_workspace, with_cache
 
 
 class WorkspaceDunderTest(TestCase):
@@ -139,6 +147,259 @@ class WorkspacePackageTest(TestCase):
         self.assertTrue(len(graph._nodes), 3)
 
 
+@with_cache
+class WorkspacePersistedTest(TemporaryWorkspaceTestCase):
+    def test_packages_persisted(self):
+        self.write_package("package_a")
+        self.write_package("nested/package_c")
+        workspace = Workspace(self.path)
+        workspace.packages()
+
+        # The next mazel invocation can reuse the record of the scanned directories
+        index = ScanIndex.load(self.path)
+        self.assertEqual(list(index.dirs["package_a"][1:]), [True, []])
+        self.assertEqual(list(index.dirs["nested"][1:]), [False, ["package_c"]])
+
+        self.assertEqual(Workspace(self.path).packages(), workspace.packages())
+
+
+class WorkspaceIgnoreTest(TemporaryWorkspaceTestCase):
+    workspace_toml = None
+
+    def setUp(self):
+        super().setUp()
+        for package in [
+            "app",
+            "app/node_modules/dep",
+            "dist/app",
+            "libs/dist",
+            "js/node_modules/dep",
+        ]:
+            self.write_package(package)
+
+    def test_no_exclusions(self):
+        self.path.joinpath("WORKSPACE.toml").touch()
+        workspace = Workspace(self.path)
+
+        self.assertFalse(workspace.ignore_rules())
+        self.assertEqual(len(workspace.packages()), 5)
+        self.assertEqual(workspace.scan_stats.pruned, 0)
+
+    def test_exclusions(self):
+        self.path.joinpath("WORKSPACE.toml").write_text(
+            '[workspace]\nexclude = ["node_modules"]\n'
+        )
+        self.path.joinpath(".mazelignore").write_text("# Build output\n/dist\n")
+        workspace = Workspace(self.path)
+
+        self.assertEqual(workspace.ignore_rules().patterns, ["node_modules", "/dist"])
+        self.assertEqual(
+            [package.label_path for package in workspace.packages()],
+            ["//app", "//libs/dist"],
+        )
+        # dist, app/node_modules and js/node_modules
+        self.assertEqual(workspace.scan_stats.pruned, 3)
+
+    def test_invalid_exclusions(self):
+        for exclude in ['"node_modules"', '["node_modules", 1]']:
+            with self.subTest(exclude):
+                self.path.joinpath("WORKSPACE.toml").write_text(
+                    f"[workspace]\nexclude = {exclude}\n"
+                )
+
+                with self.assertRaises(InvalidWorkspaceToml):
+                    Workspace(self.path).ignore_rules()
+
+
+class WorkspaceGitDiscoveryTest(TemporaryWorkspaceTestCase):
+    workspace_toml = None
+
+    def setUp(self):
+        super().setUp()
+        for package in ["libs/a", "services/b", "build/services/b"]:
+            self.write_package(package)
+        # build/ holds a copy of services/b, which git ignores
+        self.path.joinpath(".gitignore").write_text("/build/\n")
+
+    def git(self, *args):
+        subprocess.run(
+            ["git", *args], cwd=self.path, check=True, capture_output=True, text=True
+        )
+
+    def make_workspace(self, workspace_toml='[workspace]\ndiscovery = "git"\n'):
+        self.path.joinpath("WORKSPACE.toml").write_text(workspace_toml)
+        return Workspace(self.path)
+
+    def label_paths(self, workspace):
+        return [package.label_path for package in workspace.packages()]
+
+    def test_scan_finds_ignored_copy(self):
+        # For comparison, the filesystem scan finds the phantom package
+        workspace = self.make_workspace("")
+        self.assertEqual(
+            self.label_paths(workspace),
+            ["//build/services/b", "//libs/a", "//services/b"],
+        )
+
+    def test_not_a_git_repository(self):
+        # Falls back to the filesystem scan
+        workspace = self.make_workspace()
+        self.assertEqual(
+            self.label_paths(workspace),
+            ["//build/services/b", "//libs/a", "//services/b"],
+        )
+
+    def test_git(self):
+        self.git("init", "-q")
+        self.git("add", "libs/a/BUILD.toml")
+
+        workspace = self.make_workspace()
+
+        # services/b is untracked but not ignored, build/ is ignored
+        self.assertEqual(self.label_paths(workspace), ["//libs/a", "//services/b"])
+        self.assertEqual(workspace.scan_stats.visited, 2)
+
+    def test_git_tracked_only(self):
+        self.git("init", "-q")
+        self.git("add", "libs/a/BUILD.toml")
+
+        workspace = self.make_workspace(
+            '[workspace]\ndiscovery = "git"\ninclude_untracked = false\n'
+        )
+
+        self.assertEqual(self.label_paths(workspace), ["//libs/a"])
+
+    def test_git_deleted(self):
+        self.git("init", "-q")
+        self.git("add", "libs/a/BUILD.toml", "services/b/BUILD.toml")
+        self.path.joinpath("services/b/BUILD.toml").unlink()
+
+        workspace = self.make_workspace()
+
+        self.assertEqual(self.label_paths(workspace), ["//libs/a"])
+
+    def test_git_subtree(self):
+        self.git("init", "-q")
+        self.git("add", "libs/a/BUILD.toml")
+
+        workspace = self.make_workspace()
+
+        self.assertEqual(
+            workspace.packages_under(self.path / "services"),
+            [Package(self.path / "services/b", workspace)],
+        )
+        self.assertEqual(workspace.scan_stats.visited, 1)
+
+    def test_git_subtree_glob_characters(self):
+        self.write_package("routes/[id]")
+        self.write_package("routes/i")
+        self.git("init", "-q")
+
+        workspace = self.make_workspace()
+
+        self.assertEqual(
+            workspace.packages_under(self.path / "routes/[id]"),
+            [Package(self.path / "routes/[id]", workspace)],
+        )
+
+    def test_invalid_discovery(self):
+        workspace = self.make_workspace('[workspace]\ndiscovery = "magic"\n')
+
+        with self.assertRaises(InvalidWorkspaceToml):
+            workspace.packages()
+
+
+class WorkspacePackagesUnderTest(TemporaryWorkspaceTestCase):
+    workspace_toml = '[workspace]\nexclude = ["services"]\n'
+
+    def setUp(self):
+        super().setUp()
+        for package in [
+            "libs/a",
+            "libs/a/sub/b",
+            "libs/c",
+            "libs/other/d",
+            "services/e",
+            ".hidden/f",
+        ]:
+            self.write_package(package)
+        # Nested Workspace
+        self.path.joinpath("libs/other/WORKSPACE.toml").touch()
+        self.workspace = Workspace(self.path)
+
+    def label_paths(self, path):
+        return [
+            package.label_path
+            for package in self.workspace.packages_under(self.path / path)
+        ]
+
+    def test_subtree(self):
+        self.assertEqual(
+            self.label_paths("libs"), ["//libs/a", "//libs/a/sub/b", "//libs/c"]
+        )
+        # Only the subtree was scanned: libs, other, a, c, sub and b
+        self.assertEqual(self.workspace.scan_stats.visited, 6)
+        self.assertFalse(hasattr(self.workspace, "_packages"))
+
+        self.assertEqual(self.label_paths("libs/c"), ["//libs/c"])
+        self.assertEqual(self.workspace.scan_stats.visited, 1)
+
+    def test_unreachable(self):
+        self.assertEqual(self.label_paths("libs/other"), [])  # nested Workspace
+        self.assertEqual(self.label_paths("libs/other/d"), [])
+        self.assertEqual(self.label_paths("services"), [])  # excluded
+        self.assertEqual(self.label_paths(".hidden"), [])
+        self.assertEqual(self.label_paths("missing"), [])
+        self.assertEqual(self.label_paths("../"), [])  # outside of the Workspace
+
+    def test_matches_full_scan(self):
+        for path in ["libs", "libs/a/sub", "libs/other", "services", "."]:
+            lazy = self.label_paths(path)
+            self.workspace.packages()
+            self.assertEqual(self.label_paths(path), lazy)
+            del self.workspace._packages
+
+    def test_resolve_label(self):
+        with mock.patch.object(
+            self.workspace, "discover", wraps=self.workspace.discover
+        ) as discover:
+            resolved = self.workspace.resolve_label(Label("//libs/c", "test"))
+
+        self.assertEqual(
+            resolved.packages, [Package(self.path / "libs/c", self.workspace)]
+        )
+        # The package itself, no need to scan
+        discover.assert_not_called()
+
+    def test_resolve_label_nested(self):
+        def resolve(label):
+            return [
+                package.label_path
+                for package in self.workspace.resolve_label(Label.parse(label)).packages
+            ]
+
+        for _ in range(2):
+            # Lazily, then from the full scan
+            self.assertEqual(resolve("//libs/a:test"), ["//libs/a"])
+            self.assertEqual(
+                resolve("//libs/a/...:test"), ["//libs/a", "//libs/a/sub/b"]
+            )
+            self.assertEqual(resolve("//libs/a/sub:test"), ["//libs/a/sub/b"])
+            with self.assertRaises(PackageNotFound):
+                resolve("//libs/other/d:test")
+            self.workspace.packages()
+
+    def test_owning_package(self):
+        self.assertEqual(
+            self.workspace.owning_package(self.path / "libs/a/sub/b/src"),
+            Package(self.path / "libs/a/sub/b", self.workspace),
+        )
+        self.assertEqual(
+            self.workspace.owning_package(self.path / "libs/a/sub"),
+            Package(self.path / "libs/a", self.workspace),
+        )
+
+
 class WorkspaceResolveLabelTest(TestCase):
     def setUp(self):
         self.workspace = example_workspace()
@@ -276,6 +537,31 @@ class WorkspaceResolveLabelPathTest(TestCase):
         with self.assertRaises(PackageNotFound):
             self.workspace.resolve_label_path("//package_b/x")
 
+    def test_outside_workspace(self):
+        with self.assertRaises(PackageNotFound):
+            self.workspace.resolve_label_path("../../package_b")
+
+
+class WorkspaceOwningPackageTest(TestCase):
+    def setUp(self):
+        self.workspace = example_workspace()
+
+    def test_package(self):
+        expected = Package(
+            abspath("examples/simple_workspace/package_b"), self.workspace
+        )
+        path = abspath("examples/simple_workspace/package_b")
+
+        self.assertEqual(self.workspace.owning_package(path), expected)
+        self.assertEqual(self.workspace.owning_package(path / "src/x.py"), expected)
+
+    def test_no_package(self):
+        self.assertIsNone(self.workspace.owning_package(self.workspace.path))
+        self.assertIsNone(
+            self.workspace.owning_package(abspath("examples/simple_workspace/nested"))
+        )
+        self.assertIsNone(self.workspace.owning_package(Path("/elsewhere")))
+
 
 class WorkspaceReadTest(TestCase):
     def setUp(self):
@@ -338,3 +624,297 @@ class WorkspaceModifiedPackagesTest(TestCase):
         self.mock_git_modified.assert_called_once_with(
             repo_dir=self.workspace.path, commit_range=commits
         )
+
+
+class WorkspaceRefreshTest(TemporaryWorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_package("a")
+        self.write_package("b", depends_on=["//a"])
+        self.write_package("c", depends_on=["//b"])
+        self.workspace = Workspace(self.path)
+
+    def edges(self, workspace):
+        return {
+            node.package.label_path: sorted(p.package.label_path for p in node.parents)
+            for node in workspace.graph().nodes()
+        }, {
+            node.package.label_path: sorted(c.package.label_path for c in node.children)
+            for node in workspace.graph().nodes()
+        }
+
+    def assertGraph(self, parents):
+        """The refreshed graph matches both `parents` and a freshly built graph"""
+        refreshed = self.edges(self.workspace)
+        self.assertEqual(refreshed[0], parents)
+        self.assertEqual(refreshed, self.edges(Workspace(self.path)))
+        self.assertEqual(
+            [p.label_path for p in self.workspace.packages()], sorted(parents)
+        )
+
+    def test_not_loaded(self):
+        self.assertFalse(self.workspace.refresh([self.write_package("a")]))
+        self.assertFalse(self.workspace.is_loaded())
+
+    def test_unrelated(self):
+        self.workspace.graph()
+        self.path.joinpath("a/README.md").touch()
+
+        self.assertFalse(self.workspace.refresh([self.path / "a/README.md"]))
+        self.assertFalse(self.workspace.refresh([Path("/elsewhere/BUILD.toml")]))
+
+    def test_depends_on_changed(self):
+        self.workspace.graph()
+        changed = self.write_package("c", depends_on=["//a"])
+
+        with mock.patch.object(
+            Package, "depends_on", autospec=True, side_effect=Package.depends_on
+        ) as depends_on:
+            self.assertTrue(self.workspace.refresh([changed]))
+
+        # Only the changed package is recomputed
+        self.assertEqual(
+            [call.args[0].label_path for call in depends_on.call_args_list], ["//c"]
+        )
+        self.assertGraph({"//a": [], "//b": ["//a"], "//c": ["//a"]})
+
+    def test_package_added(self):
+        self.workspace.graph()
+        added = self.write_package("d/e", depends_on=["//c"])
+
+        self.assertTrue(self.workspace.refresh([added]))
+
+        self.assertGraph({"//a": [], "//b": ["//a"], "//c": ["//b"], "//d/e": ["//c"]})
+        self.assertEqual(
+            self.workspace.owning_package(self.path / "d/e/x.py").label_path, "//d/e"
+        )
+
+    def test_package_removed(self):
+        self.workspace.graph()
+        self.write_package("c", depends_on=[])
+        self.path.joinpath("b/BUILD.toml").unlink()
+
+        self.assertTrue(
+            self.workspace.refresh(
+                [self.path / "b/BUILD.toml", self.path / "c/BUILD.toml"]
+            )
+        )
+
+        self.assertGraph({"//a": [], "//c": []})
+        self.assertIsNone(self.workspace.owning_package(self.path / "b/x.py"))
+
+    def test_directory_removed(self):
+        self.workspace.graph()
+        self.write_package("c", depends_on=[])
+        shutil.rmtree(self.path / "b")
+
+        self.assertTrue(
+            self.workspace.refresh([self.path / "b", self.path / "c/BUILD.toml"])
+        )
+
+        self.assertGraph({"//a": [], "//c": []})
+
+    def test_dependency_removed(self):
+        self.workspace.graph()
+        self.path.joinpath("b/BUILD.toml").unlink()
+
+        # //c still depends on //b
+        with self.assertRaises(PackageNotFound):
+            self.workspace.refresh([self.path / "b/BUILD.toml"])
+        self.assertFalse(self.workspace.is_loaded())
+
+    def test_manifest_changed(self):
+        self.write_package(
+            "d", runtimes=["python"], files={"pyproject.toml": "[tool.poetry]\n"}
+        )
+        self.workspace.graph()
+
+        self.path.joinpath("d/pyproject.toml").write_text(
+            '[tool.poetry.dependencies]\nc = {path = "../c"}\n'
+        )
+        self.assertTrue(self.workspace.refresh([self.path / "d/pyproject.toml"]))
+
+        self.assertGraph({"//a": [], "//b": ["//a"], "//c": ["//b"], "//d": ["//c"]})
+
+    def test_other_runtime_manifest(self):
+        self.write_package(
+            "d", runtimes=["python"], files={"pyproject.toml": "[tool.poetry]\n"}
+        )
+        self.workspace.graph()
+
+        # Not one of the python Runtime's manifests
+        self.path.joinpath("d/package.json").write_text("{}")
+        self.assertFalse(self.workspace.refresh([self.path / "d/package.json"]))
+
+    def test_workspace_toml_resets(self):
+        self.workspace.graph()
+
+        self.assertTrue(self.workspace.refresh([self.path / "WORKSPACE.toml"]))
+
+        self.assertFalse(self.workspace.is_loaded())
+        self.assertGraph({"//a": [], "//b": ["//a"], "//c": ["//b"]})
+
+    def test_file_read_from_outside_the_package(self):
+        self.write_package(
+            "d",
+            runtimes=["go"],
+            files={"go.mod": "module example.com/d\nrequire example.com/c v0.0.0\n"},
+        )
+        self.write_package(
+            "c",
+            depends_on=["//b"],
+            runtimes=["go"],
+            files={"go.mod": "module example.com/c\n"},
+        )
+        self.workspace.graph()
+
+        # Looked up, though missing, by the Go Packages
+        self.path.joinpath("go.work").write_text("use (\n\t./c\n\t./d\n)\n")
+        self.assertTrue(self.workspace.refresh([self.path / "go.work"]))
+
+        self.assertTrue(self.workspace.is_loaded())
+        self.assertGraph({"//a": [], "//b": ["//a"], "//c": ["//b"], "//d": ["//c"]})
+
+    def test_package_added_below_path_dependency(self):
+        self.write_package(
+            "d",
+            runtimes=["python"],
+            files={
+                "pyproject.toml": '[tool.poetry.dependencies]\nx = {path = "../c/x"}\n'
+            },
+        )
+        self.workspace.graph()
+
+        added = self.write_package("c/x")
+        self.assertTrue(self.workspace.refresh([added]))
+
+        # Now owned by //c/x rather than //c
+        self.assertGraph(
+            {"//a": [], "//b": ["//a"], "//c": ["//b"], "//c/x": [], "//d": ["//c/x"]}
+        )
+
+    def test_package_renamed(self):
+        self.write_package("ui", files={"package.json": '{"name": "ui"}'})
+        self.write_package("icons", files={"package.json": '{"name": "icons"}'})
+        self.write_package(
+            "d",
+            runtimes=["javascript"],
+            files={"package.json": '{"dependencies": {"ui": "workspace:*"}}'},
+        )
+        self.workspace.graph()
+
+        # Not a manifest of //icons, yet the first Package named "ui"
+        self.path.joinpath("icons/package.json").write_text('{"name": "ui"}')
+        self.assertTrue(self.workspace.refresh([self.path / "icons/package.json"]))
+
+        self.assertEqual(
+            [
+                p.label_path
+                for p in self.workspace.get_package(self.path / "d").depends_on()
+            ],
+            ["//icons"],
+        )
+
+    def test_package_json_outside_names_root(self):
+        self.write_package("js/ui", files={"package.json": '{"name": "ui"}'})
+        self.write_package("other", files={"package.json": '{"name": "other"}'})
+        self.write_package(
+            "js/d",
+            runtimes=["javascript"],
+            files={"package.json": '{"dependencies": {"ui": "workspace:*"}}'},
+        )
+        self.path.joinpath("js/pnpm-workspace.yaml").write_text("packages: ['*']\n")
+        self.workspace.graph()
+
+        # Not a manifest, nor below the pnpm workspace the names are resolved in
+        self.path.joinpath("other/package.json").write_text('{"name": "ui"}')
+        self.assertFalse(self.workspace.refresh([self.path / "other/package.json"]))
+
+
+class WorkspaceExtractDependenciesTest(TemporaryWorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, depends_on in [("a", []), ("b", ["//a"]), ("c/d", ["//a", "//b"])]:
+            self.write_package(name, depends_on)
+        self.workspace = Workspace(self.path)
+
+    def parents(self):
+        return {
+            node.package.label_path: sorted(p.package.label_path for p in node.parents)
+            for node in self.workspace.graph().nodes()
+        }
+
+    @mock.patch("mazel.workspace.EXTRACT_PARALLEL_THRESHOLD", 1)
+    def test_parallel(self):
+        packages = self.workspace.packages()
+        self.workspace.extract_dependencies(packages, workers=2)
+
+        cache = self.workspace.dependency_cache()
+        self.assertCountEqual(cache.entries, ["a", "b", "c/d"])
+
+        # Only resolved from the cache
+        with mock.patch.object(
+            Package, "read_toml", side_effect=AssertionError("parsed")
+        ):
+            self.assertEqual(
+                self.parents(), {"//a": [], "//b": ["//a"], "//c/d": ["//a", "//b"]}
+            )
+
+    @mock.patch("mazel.workspace.EXTRACT_PARALLEL_THRESHOLD", 1)
+    def test_parallel_error(self):
+        self.path.joinpath("b/BUILD.toml").write_text("[package]\nruntimes = ['x']\n")
+
+        with self.assertRaises(RuntimeNotFound):
+            self.workspace.extract_dependencies(self.workspace.packages(), workers=2)
+
+    @mock.patch("concurrent.futures.ProcessPoolExecutor")
+    def test_serial(self, executor):
+        self.workspace.extract_dependencies(self.workspace.packages(), workers=8)
+        self.assertEqual(
+            self.parents(), {"//a": [], "//b": ["//a"], "//c/d": ["//a", "//b"]}
+        )
+
+        executor.assert_not_called()
+
+    @mock.patch("mazel.workspace.EXTRACT_PARALLEL_THRESHOLD", 1)
+    @mock.patch("concurrent.futures.ProcessPoolExecutor")
+    def test_single_worker(self, executor):
+        self.workspace.extract_dependencies(self.workspace.packages(), workers=1)
+
+        executor.assert_not_called()
+
+
+class WorkspaceCyclesTest(TemporaryWorkspaceTestCase):
+    workspace_toml = None
+
+    def setUp(self):
+        super().setUp()
+        for name, depends_on in [("a", []), ("b", ["//a", "//c"]), ("c", ["//b"])]:
+            self.write_package(name, depends_on)
+
+    def make_workspace(self, workspace_toml):
+        self.path.joinpath("WORKSPACE.toml").write_text(workspace_toml)
+        return Workspace(self.path)
+
+    def test_error(self):
+        workspace = self.make_workspace("")
+
+        with self.assertRaisesRegex(CyclicDependency, "//b -> //c -> //b"):
+            workspace.graph()
+
+    def test_condense(self):
+        workspace = self.make_workspace('[workspace]\ncycles = "condense"\n')
+
+        self.assertEqual(
+            [
+                (node.package.label_path, level)
+                for node, level in workspace.graph().plan()
+            ],
+            [("//a", 0), ("//b", 1), ("//c", 1)],
+        )
+
+    def test_invalid(self):
+        workspace = self.make_workspace('[workspace]\ncycles = "ignore"\n')
+
+        with self.assertRaises(InvalidWorkspaceToml):
+            workspace.graph()
@@ -1,4 +1,8 @@
+import os
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, Optional, TypeVar
+from unittest import TestCase, mock
 
 from mazel.workspace import Workspace
 
@@ -8,5 +12,58 @@ def abspath(*args) -> Path:
     return Path(__file__).parent.joinpath(*args).resolve()
 
 
+T = TypeVar("T")
+
+
 def example_workspace() -> Workspace:
     return Workspace(abspath("examples/simple_workspace"))
+
+
+def with_cache(test: T) -> T:
+    """
+    Decorate a test (or TestCase) to read and write the caches in `.mazel/cache/`,
+    which are otherwise disabled (see `tests/__init__.py`)
+    """
+    return mock.patch.dict(os.environ, {"MAZEL_CACHE": "1"})(test)
+
+
+class TemporaryWorkspaceTestCase(TestCase):
+    """
+    A Workspace in a temporary directory, `self.path`, with packages added via
+    `write_package`. Set `workspace_toml` to None to write WORKSPACE.toml in the
+    test instead.
+    """
+
+    workspace_toml: Optional[str] = ""
+
+    def setUp(self):
+        super().setUp()
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name).resolve()
+        if self.workspace_toml is not None:
+            self.path.joinpath("WORKSPACE.toml").write_text(self.workspace_toml)
+
+    def write_package(
+        self,
+        name: str,
+        depends_on: Iterable[str] = (),
+        runtimes: Iterable[str] = (),
+        build_toml: Optional[str] = None,
+        files: Optional[Dict[str, str]] = None,
+    ) -> Path:
+        """
+        Write the package's BUILD.toml (`build_toml`, or one from `depends_on` and
+        `runtimes`) and any other `files`, returning the BUILD.toml path
+        """
+        directory = self.path.joinpath(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        if build_toml is None:
+            build_toml = (
+                f"[package]\ndepends_on = {list(depends_on)}\n"
+                f"runtimes = {list(runtimes)}\n"
+            )
+        for filename, content in (files or {}).items():
+            directory.joinpath(filename).write_text(content)
+        directory.joinpath("BUILD.toml").write_text(build_toml)
+        return directory.joinpath("BUILD.toml")